@@ -3,14 +3,14 @@ from .models import Slide, Banner
 
 @admin.register(Slide)
 class SlideAdmin(admin.ModelAdmin):
-    list_display  = ("id", "title", "is_active", "order", "created_at")
-    list_editable = ("is_active", "order")
+    list_display  = ("id", "title", "is_active", "order", "starts_at", "ends_at", "created_at")
+    list_editable = ("is_active", "order", "starts_at", "ends_at")
     search_fields = ("title", "alt")
-    list_filter   = ("is_active",)
+    list_filter   = ("is_active", "starts_at", "ends_at")
 
 @admin.register(Banner)
 class BannerAdmin(admin.ModelAdmin):
-    list_display  = ("id", "title", "is_active", "order", "created_at")
-    list_editable = ("is_active", "order")
+    list_display  = ("id", "title", "is_active", "order", "starts_at", "ends_at", "created_at")
+    list_editable = ("is_active", "order", "starts_at", "ends_at")
     search_fields = ("title", "subtitle")
-    list_filter   = ("is_active",)
+    list_filter   = ("is_active", "starts_at", "ends_at")
@@ -1,4 +1,5 @@
 from rest_framework import serializers, viewsets
+from core.utils.schedule import ScheduledListMixin
 from .models import Slide
 
 class SlideSerializer(serializers.ModelSerializer):
@@ -24,6 +25,6 @@ class SlideSerializer(serializers.ModelSerializer):
         except Exception:
             return None
 
-class SlideViewSet(viewsets.ReadOnlyModelViewSet):
+class SlideViewSet(ScheduledListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Slide.objects.filter(is_active=True).order_by("order", "-created_at")
     serializer_class = SlideSerializer
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.14 on 2026-10-19 16:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banners', '0002_banner_alter_slide_options_remove_slide_product_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='banner',
+            name='ends_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='banner',
+            name='starts_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='slide',
+            name='ends_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='slide',
+            name='starts_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -1,6 +1,8 @@
 # banners/models.py
 from django.db import models
 
+from core.utils.schedule import invalidate_on_change
+
 class TimeStampedModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -11,6 +13,9 @@ class TimeStampedModel(models.Model):
 class OrderedActiveModel(TimeStampedModel):
     order = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
+    # بازهٔ نمایش کمپین؛ خالی = بدون محدودیت
+    starts_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    ends_at   = models.DateTimeField(null=True, blank=True, db_index=True)
 
     class Meta:
         abstract = True
@@ -35,3 +40,5 @@ class Banner(OrderedActiveModel):
 
     def __str__(self):
         return self.title
+
+invalidate_on_change(Slide, Banner)
@@ -3,21 +3,23 @@ from rest_framework import viewsets, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from core.utils.schedule import ScheduledListMixin, scheduled
+
 from .models import Slide, Banner
 from .serializers import SlideSerializer, BannerSerializer
 
-class SlideViewSet(viewsets.ReadOnlyModelViewSet):
+class SlideViewSet(ScheduledListMixin, viewsets.ReadOnlyModelViewSet):
     """
-    GET /api/slides/    → لیست اسلایدهای فعال
+    GET /api/slides/    → لیست اسلایدهای فعال (در بازهٔ starts_at/ends_at)
     GET /api/slides/{id}/ → جزئیات اسلاید
     """
     queryset = Slide.objects.filter(is_active=True).order_by("order", "-created_at")
     serializer_class = SlideSerializer
     permission_classes = [permissions.AllowAny]
 
-class BannerViewSet(viewsets.ReadOnlyModelViewSet):
+class BannerViewSet(ScheduledListMixin, viewsets.ReadOnlyModelViewSet):
     """
-    GET /api/banners/    → لیست بنرهای فعال
+    GET /api/banners/    → لیست بنرهای فعال (در بازهٔ starts_at/ends_at)
     GET /api/banners/{id}/ → جزئیات بنر
     """
     queryset = Banner.objects.filter(is_active=True).order_by("order", "-created_at")
@@ -37,8 +39,9 @@ class HomeAPIView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request, *args, **kwargs):
-        slides_qs = Slide.objects.filter(is_active=True).order_by("order", "-created_at")
-        banners_qs = Banner.objects.filter(is_active=True).order_by("order", "-created_at")
+        # از کش زمان‌بندی؛ تا شروع/پایان بعدی هیچ query‌ای اجرا نمی‌شود
+        slides_qs = scheduled(Slide.objects.filter(is_active=True).order_by("order", "-created_at"), "banners-home")
+        banners_qs = scheduled(Banner.objects.filter(is_active=True).order_by("order", "-created_at"), "banners-home")
 
         slides = SlideSerializer(slides_qs, many=True, context={"request": request}).data
         banners = BannerSerializer(banners_qs, many=True, context={"request": request}).data
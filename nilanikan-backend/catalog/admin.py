@@ -16,6 +16,7 @@ from .models import (
     Attribute,
     AttributeValue,
     ProductVariant,
+    SyncRun,
 )
 
 # =========================
@@ -112,7 +113,7 @@ class ProductVideoInline(admin.TabularInline):
 class ProductVariantInline(admin.TabularInline):
     model = ProductVariant
     extra = 0
-    fields = ("color", "size", "price", "stock")
+    fields = ("color", "size", "price", "stock", "erp_code")
     autocomplete_fields = ("color", "size")
 
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
@@ -172,7 +173,7 @@ class ProductAdmin(admin.ModelAdmin):
     )
     list_filter = ("is_active", "is_recommended", "category")
     list_editable = ("is_active", "is_recommended")
-    search_fields = ("name", "sku", "slug")
+    search_fields = ("name", "sku", "slug", "erp_code")
     prepopulated_fields = {"slug": ("name",)}
     inlines = [ProductImageInline, ProductVideoInline, ProductVariantInline]
     filter_horizontal = ("attributes",)
@@ -194,6 +195,9 @@ class ProductAdmin(admin.ModelAdmin):
         ("وضعیت و موجودی", {
             "fields": ("stock", "is_active", "is_recommended")
         }),
+        ("هلو", {
+            "fields": ("erp_code",)
+        }),
     )
 
     def price_display(self, obj):
@@ -266,10 +270,10 @@ class BundleAdmin(admin.ModelAdmin):
 # =========================
 @admin.register(Banner)
 class BannerAdmin(admin.ModelAdmin):
-    list_display = ("id", "alt", "is_active", "order", "created_at")
-    list_editable = ("is_active", "order")
+    list_display = ("id", "alt", "is_active", "order", "starts_at", "ends_at", "created_at")
+    list_editable = ("is_active", "order", "starts_at", "ends_at")
     search_fields = ("alt",)
-    list_filter = ("is_active",)
+    list_filter = ("is_active", "starts_at", "ends_at")
 
 
 # =========================
@@ -313,3 +317,22 @@ class MenuItemAdmin(admin.ModelAdmin):
     search_fields = ("name", "slug", "url")
     autocomplete_fields = ("parent", "category")
     prepopulated_fields = {"slug": ("name",)}
+
+
+# =========================
+# SyncRun (فقط خواندنی)
+# =========================
+@admin.register(SyncRun)
+class SyncRunAdmin(admin.ModelAdmin):
+    list_display = (
+        "id", "kind", "status", "start_page", "last_page", "pages_done", "items",
+        "created", "updated", "unchanged", "duration_ms", "started_at",
+    )
+    list_filter = ("kind", "status")
+    readonly_fields = [f.name for f in SyncRun._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -1,6 +1,7 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import serializers, viewsets
+from core.utils.schedule import ScheduledListMixin
 from .models import Banner, Product, Bundle
 
 # ==== Banner Serializer (قدیمی) ====
@@ -18,7 +19,7 @@ class BannerSerializer(serializers.ModelSerializer):
             return None
 
 
-class BannerViewSet(viewsets.ReadOnlyModelViewSet):
+class BannerViewSet(ScheduledListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Banner.objects.filter(is_active=True).order_by("order", "-id")
     serializer_class = BannerSerializer
 
@@ -0,0 +1,94 @@
+# catalog/holoo_cache.py
+"""
+کش پروکسی‌های خواندنی هلو (محصولات/اشخاص):
+
+- کلید = نام endpoint + پارامترهای نرمال‌شده (مرتب، بدون مقدار خالی)
+- تا HOLOO_CACHE_TTL ثانیه: HIT
+- تا HOLOO_CACHE_STALE ثانیهٔ بعد از آن: STALE → همان دادهٔ قبلی برمی‌گردد و
+  به‌روزرسانی در پس‌زمینه انجام می‌شود (stale-while-revalidate)
+- بعد از آن یا نبودِ داده: MISS → درخواست مستقیم به هلو
+- درخواست‌های هم‌زمان با کلید یکسان فقط یک تماس با هلو می‌سازند (single-flight، در هر پروسه)
+"""
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger("holoo")
+
+HOLOO_CACHE_TTL = getattr(settings, "HOLOO_CACHE_TTL", 60)
+HOLOO_CACHE_STALE = getattr(settings, "HOLOO_CACHE_STALE", 300)
+SINGLE_FLIGHT_TIMEOUT = 60
+
+_inflight = {}  # key → Future
+_inflight_lock = threading.Lock()
+_refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="holoo-cache")
+
+
+def cache_key(name: str, params=None) -> str:
+    items = sorted((str(k), str(v)) for k, v in (params or {}).items() if v not in (None, ""))
+    digest = hashlib.sha1(urlencode(items).encode("utf-8")).hexdigest()
+    return f"holoo:{name}:{digest}"
+
+
+def _single_flight(key: str, fn):
+    with _inflight_lock:
+        fut = _inflight.get(key)
+        leader = fut is None
+        if leader:
+            fut = Future()
+            _inflight[key] = fut
+    if not leader:
+        return fut.result(timeout=SINGLE_FLIGHT_TIMEOUT)
+    try:
+        result = fn()
+        fut.set_result(result)
+        return result
+    except BaseException as e:
+        fut.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+def _load(key: str, fetch, params):
+    data = fetch(params=params)
+    if data is not None:  # HOLOO_ENABLED=false → None؛ کش نمی‌شود
+        cache.set(key, {"data": data, "at": time.time()}, HOLOO_CACHE_TTL + HOLOO_CACHE_STALE)
+    return data
+
+
+def _refresh(key: str, fetch, params):
+    try:
+        _single_flight(key, lambda: _load(key, fetch, params))
+    except Exception:
+        logger.warning("holoo cache refresh failed for %s", key, exc_info=True)
+
+
+def cached_call(name: str, fetch, params=None):
+    """
+    fetch(params=...) را با کش صدا می‌زند.
+    خروجی: (data, status, age_seconds) که status یکی از HIT / STALE / MISS است.
+    """
+    params = dict(params or {})
+    key = cache_key(name, params)
+    entry = cache.get(key)
+    if entry is not None:
+        age = time.time() - entry["at"]
+        if age < HOLOO_CACHE_TTL:
+            return entry["data"], "HIT", age
+        if age < HOLOO_CACHE_TTL + HOLOO_CACHE_STALE:
+            with _inflight_lock:
+                busy = key in _inflight
+            if not busy:
+                _refresher.submit(_refresh, key, fetch, params)
+            return entry["data"], "STALE", age
+
+    data = _single_flight(key, lambda: _load(key, fetch, params))
+    return data, "MISS", 0.0
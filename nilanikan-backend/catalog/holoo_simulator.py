@@ -0,0 +1,206 @@
+# nilanikan-backend/catalog/holoo_simulator.py
+"""
+شبیه‌ساز محلی وب‌سرویس هلو (TncHolooWebService) برای تست آفلاین holoo_client و
+سنجش throughput دستورات sync:
+
+    POST /Login                      → توکن (با انقضای قابل تنظیم)
+    GET  /Product                    → همهٔ کالاها
+    GET  /Product/{page}/{per_page}  → یک صفحه از کالاها
+    GET  /Customer                   → اشخاص
+    POST /Invoice/Invoice | /Invoice/PreInvoice | /Invoice/Order → ثبت و پاسخ به ازای هر id
+
+با latency، jitter، نرخ خطای HTTP (503) و عمر توکن (پس از آن 401) قابل تنظیم.
+استفاده:
+    python manage.py holoo_simulator --port 8766 --products 20000 --latency-ms 80
+    HOLOO_ENABLED=true HOLOO_ADDRESS=http://127.0.0.1:8766
+"""
+import json
+import random
+import re
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PRODUCT_PAGE_RE = re.compile(r"^/Product/(\d+)/(\d+)$")
+INVOICE_PATHS = ("/Invoice/Invoice", "/Invoice/PreInvoice", "/Invoice/Order")
+
+
+class HolooSimulator:
+    def __init__(self, host="127.0.0.1", port=0, *, products=1000, customers=100,
+                 latency_ms=0, jitter_ms=0, http_error_rate=0.0, token_ttl=0.0, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.http_error_rate = http_error_rate
+        self.token_ttl = token_ttl  # ثانیه؛ ۰ = بدون انقضا
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.tokens = {}  # token → زمان صدور
+        self.invoices = []
+        self.stats = {"login": 0, "product": 0, "customer": 0, "invoice": 0, "http_errors": 0, "unauthorized": 0}
+        self.products = [self._make_product(i) for i in range(1, products + 1)]
+        self.customers = [
+            {"ErpCode": f"C{i:05d}", "Name": f"مشتری {i}", "Mobile": f"0912{i:07d}"}
+            for i in range(1, customers + 1)
+        ]
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    # ---------- lifecycle ----------
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    # ---------- داده ----------
+    def _make_product(self, i):
+        return {
+            "ErpCode": f"{i:06d}",
+            "Name": f"کالای {i}",
+            "SellPrice": self.random.randint(10, 5000) * 1000,
+            "Few": self.random.randint(0, 50),
+        }
+
+    def mutate(self, fraction=0.05, *, stock_only=False):
+        """تغییر تصادفی قیمت/موجودی بخشی از کالاها (برای سنجش sync افزایشی)؛ تعداد تغییرها"""
+        with self.lock:
+            n = int(len(self.products) * fraction)
+            for p in self.random.sample(self.products, n):
+                p["Few"] = self.random.randint(0, 50)
+                if not stock_only:
+                    p["SellPrice"] = self.random.randint(10, 5000) * 1000
+        return n
+
+    def expire_tokens(self):
+        with self.lock:
+            self.tokens.clear()
+
+    # ---------- منطق وب‌سرویس ----------
+    def _sleep(self):
+        delay = self.latency_ms + (self.random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+    def handle_login(self, body):
+        info = body.get("userinfo") or {}
+        if not info.get("username") or not info.get("dbname"):
+            return {"Login": {"State": "false", "Token": None, "Error": "Invalid user info"}}
+        token = secrets.token_hex(16)
+        with self.lock:
+            self.stats["login"] += 1
+            self.tokens[token] = time.monotonic()
+        return {"Login": {"State": "true", "Token": token, "Error": ""}}
+
+    def authorized(self, token):
+        with self.lock:
+            issued = self.tokens.get(token)
+            if issued is None:
+                return False
+            if self.token_ttl and time.monotonic() - issued > self.token_ttl:
+                del self.tokens[token]
+                return False
+            return True
+
+    def handle_products(self, page=None, per_page=None):
+        with self.lock:
+            self.stats["product"] += 1
+            if page is None:
+                rows = [dict(p) for p in self.products]
+            else:
+                start = (max(page, 1) - 1) * per_page
+                rows = [dict(p) for p in self.products[start:start + per_page]]
+        return {"product": rows}
+
+    def handle_customers(self):
+        with self.lock:
+            self.stats["customer"] += 1
+        return {"customer": list(self.customers)}
+
+    def handle_invoice(self, kind, body):
+        infos = body.get("invoiceinfo") or []
+        if isinstance(infos, dict):
+            infos = [infos]
+        results = []
+        with self.lock:
+            self.stats["invoice"] += 1
+            for inv in infos:
+                if not inv.get("customererpcode") and kind != "/Invoice/Order":
+                    results.append({"id": inv.get("id"), "State": "false", "Error": "customererpcode is required"})
+                    continue
+                self.invoices.append({"kind": kind, **inv})
+                results.append({"id": inv.get("id"), "State": "true", "ErpCode": str(len(self.invoices))})
+        return {"invoiceinfo": results}
+
+    def _handler_class(sim):
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive برای Session سمت کلاینت
+
+            def log_message(self, fmt, *args):
+                return
+
+            def _send(self, status, payload):
+                raw = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def _body(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    return json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    return {}
+
+            def _pre(self):
+                """latency + خطای تصادفی + احراز هویت؛ اگر پاسخ داده شد True"""
+                sim._sleep()
+                if sim.http_error_rate and sim.random.random() < sim.http_error_rate:
+                    with sim.lock:
+                        sim.stats["http_errors"] += 1
+                    self._send(503, {"message": "Service Unavailable"})
+                    return True
+                if not sim.authorized(self.headers.get("Authorization")):
+                    with sim.lock:
+                        sim.stats["unauthorized"] += 1
+                    self._send(401, {"message": "Token is invalid or expired"})
+                    return True
+                return False
+
+            def do_POST(self):
+                body = self._body()
+                path = self.path.split("?", 1)[0]
+                if path == "/Login":
+                    sim._sleep()
+                    return self._send(200, sim.handle_login(body))
+                if self._pre():
+                    return
+                if path in INVOICE_PATHS:
+                    return self._send(200, sim.handle_invoice(path, body))
+                return self._send(404, {"message": "Not Found"})
+
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                if self._pre():
+                    return
+                if path == "/Product":
+                    return self._send(200, sim.handle_products())
+                m = PRODUCT_PAGE_RE.match(path)
+                if m:
+                    return self._send(200, sim.handle_products(int(m.group(1)), max(1, int(m.group(2)))))
+                if path == "/Customer":
+                    return self._send(200, sim.handle_customers())
+                return self._send(404, {"message": "Not Found"})
+
+        return Handler
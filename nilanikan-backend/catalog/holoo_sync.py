@@ -0,0 +1,281 @@
+# catalog/holoo_sync.py
+"""
+موتور upsert دسته‌ای برای همگام‌سازی کالاهای هلو.
+
+برای هر صفحه:
+  - کنار گذاشتن کدهایی که erp_code یک ProductVariant هستند (کار sync_holoo_stock)
+  - یک کوئری برای خواندن محصولات موجود با erp_code (و یک کوئری برای محصولات
+    قدیمی بدون erp_code که sku آن‌ها برابر کد هلوست)
+  - مقایسهٔ هش دادهٔ نگاشت‌شده با erp_hash؛ فقط ردیف‌های تغییرکرده به‌روز می‌شوند
+  - یک bulk_create و یک bulk_update، داخل یک تراکنش جدا برای همان صفحه
+
+iter_pages صفحه‌ها را با یک pool محدود از قبل می‌گیرد (producer) و به ترتیب
+تحویل می‌دهد تا upsert صفحهٔ جاری (consumer) منتظر رفت‌وبرگشت HTTP نماند.
+"""
+import hashlib
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils.text import slugify
+
+from holoo_client import holoo_request
+
+from .models import Category, Product, ProductVariant
+
+PER_PAGE = 100  # تعداد آیتم هر صفحه
+SYNC_CATEGORY_SLUG = "holoo"
+UPDATE_FIELDS = ("name", "price", "erp_code", "erp_hash")
+
+
+def fetch_products_page(page: int, per_page: int = PER_PAGE):
+    """
+    از وب‌سرویس هلو صفحه به صفحه می‌خوانیم:
+    GET /Product/{page}/{per_page}
+    """
+    path = f"/Product/{page}/{per_page}"
+    res = holoo_request("GET", path)
+    if not res:
+        return []
+    if isinstance(res, dict):
+        return res.get("product") or res.get("products") or []
+    return res  # بسته به خروجی
+
+
+def _price(value) -> Decimal:
+    try:
+        return Decimal(str(value or 0)).quantize(Decimal("0.01"))
+    except (InvalidOperation, ValueError):
+        return Decimal("0.00")
+
+
+def _code(item: dict):
+    code = item.get("ErpCode") or item.get("ProductErpCode") or item.get("Code")
+    return str(code).strip()[:64] if code else None
+
+
+def map_item(item: dict):
+    """نگاشت یک کالای خام هلو به فیلدهای Product؛ بدون کد → None"""
+    # --- نگاشت مینیمال؛ در صورت نیاز مطابق فیلدهای واقعی خروجی هلو اصلاح کن ---
+    code = _code(item)
+    if not code:
+        return None
+    # قیمت‌ها در هلو ممکنه sellprice یا SellPrice باشه
+    price = item.get("SellPrice") or item.get("sellprice") or item.get("Price") or 0
+    return {
+        "erp_code": code,
+        "name": (item.get("Name") or "").strip()[:200],
+        "price": _price(price),
+    }
+
+
+def item_hash(fields: dict) -> str:
+    raw = json.dumps({"name": fields["name"], "price": str(fields["price"])}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _code_digest(code: str) -> str:
+    return hashlib.sha1(code.encode("utf-8")).hexdigest()[:8]
+
+
+def product_slug(code: str) -> str:
+    """
+    slug یکتا برای محصول ساخته‌شده از هلو: کدهای متفاوت ممکن است یک slugify داشته باشند
+    (A.1 و A-1، حروف بزرگ/کوچک) یا بعد از برش ۵۰ کاراکتری یکی شوند؛ هش کد خام تفکیکشان می‌کند.
+    """
+    base = slugify(code, allow_unicode=True)[:35].strip("-")
+    return f"holoo-{base}-{_code_digest(code)}" if base else f"holoo-{_code_digest(code)}"
+
+
+def product_sku(code: str) -> str:
+    sku = f"HOLOO-{code}"
+    return sku if len(sku) <= 64 else f"{sku[:55]}-{_code_digest(code)}"
+
+
+def get_sync_category() -> Category:
+    cat, _ = Category.objects.get_or_create(
+        slug=SYNC_CATEGORY_SLUG,
+        defaults={"name": "هلو", "show_in_menu": False},
+    )
+    return cat
+
+
+def upsert_page(items, *, category: Category = None, batch_size: int = 500) -> dict:
+    """
+    اعمال یک صفحه از کالاهای هلو.
+    خروجی: {"created", "updated", "unchanged", "skipped"}؛ skipped = آیتم نامعتبر یا کد واریانت
+    """
+    stats = {"created": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+
+    mapped = {}
+    for item in items or []:
+        fields = map_item(item) if isinstance(item, dict) else None
+        if fields is None:
+            stats["skipped"] += 1
+            continue
+        fields["erp_hash"] = item_hash(fields)
+        mapped[fields["erp_code"]] = fields  # کد تکراری در یک صفحه: آخری برنده است
+
+    if not mapped:
+        return stats
+
+    with transaction.atomic():
+        # کدهای واریانت (رنگ/سایز) مال ProductVariant‌اند و sync_holoo_stock آن‌ها را به‌روز می‌کند؛
+        # نباید به شکل محصول سرگردان ساخته شوند
+        for code in ProductVariant.objects.filter(erp_code__in=list(mapped)).values_list("erp_code", flat=True):
+            del mapped[code]
+            stats["skipped"] += 1
+        if not mapped:
+            return stats
+
+        only = ("id", "name", "price", "sku", "erp_code", "erp_hash")
+        existing = {
+            p.erp_code: p
+            for p in Product.objects.filter(erp_code__in=list(mapped)).only(*only)
+        }
+        missing = [c for c in mapped if c not in existing]
+        if missing:
+            # محصولاتی که قبلاً دستی با sku = کد هلو ساخته شده‌اند را به هلو وصل کن
+            for p in Product.objects.filter(erp_code__isnull=True, sku__in=missing).only(*only):
+                p.erp_hash = ""  # اجبار به به‌روزرسانی و ثبت erp_code
+                existing[p.sku] = p
+                p.erp_code = p.sku
+
+        if category is None and len(existing) < len(mapped):
+            category = get_sync_category()
+
+        to_create, to_update = [], []
+        for code, fields in mapped.items():
+            obj = existing.get(code)
+            if obj is None:
+                to_create.append(Product(
+                    name=fields["name"] or code,
+                    slug=product_slug(code),
+                    sku=product_sku(code),
+                    category=category,
+                    price=fields["price"],
+                    erp_code=code,
+                    erp_hash=fields["erp_hash"],
+                ))
+            elif obj.erp_hash != fields["erp_hash"]:
+                obj.name = fields["name"] or obj.name
+                obj.price = fields["price"]
+                obj.erp_hash = fields["erp_hash"]
+                to_update.append(obj)
+            else:
+                stats["unchanged"] += 1
+
+        if to_create:
+            Product.objects.bulk_create(to_create, batch_size=batch_size)
+        if to_update:
+            Product.objects.bulk_update(to_update, UPDATE_FIELDS, batch_size=batch_size)
+
+    stats["created"] = len(to_create)
+    stats["updated"] = len(to_update)
+    return stats
+
+
+def iter_pages(fetch, *, start: int = 1, concurrency: int = 4, max_pages: int = 0):
+    """
+    fetch(page) → list؛ اولین صفحهٔ خالی پایان داده‌هاست.
+    حداکثر `concurrency` صفحه جلوتر از مصرف‌کننده درخواست می‌شود (backpressure):
+    تا صفحهٔ جاری تحویل گرفته نشود، درخواست جدیدی ارسال نمی‌شود.
+    خروجی: (page, items) به ترتیب شماره صفحه.
+    """
+    concurrency = max(1, concurrency)
+    last = start + max_pages - 1 if max_pages else None
+    pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="holoo-fetch")
+    window = deque()
+    next_page = start
+
+    def fill():
+        nonlocal next_page
+        while len(window) < concurrency and (last is None or next_page <= last):
+            window.append((next_page, pool.submit(fetch, next_page)))
+            next_page += 1
+
+    try:
+        fill()
+        while window:
+            page, fut = window.popleft()
+            items = fut.result()
+            if not items:
+                return
+            fill()
+            yield page, items
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ---------- همگام‌سازی سبک موجودی/قیمت (sync_holoo_stock) ----------
+def map_stock(item: dict):
+    """(code, stock, price)؛ مقدار نیامده = None یعنی دست نخورد"""
+    code = _code(item)
+    if not code:
+        return None
+    few = item.get("Few", item.get("few", item.get("Stock")))
+    price = item.get("SellPrice") or item.get("sellprice") or item.get("Price")
+    try:
+        stock = int(float(few)) if few is not None else None
+    except (TypeError, ValueError):
+        stock = None
+    return code, stock, (_price(price) if price is not None else None)
+
+
+class StockIndex:
+    """
+    ایندکس درون‌حافظه‌ای erp_code → ردیف‌های Product/ProductVariant با stock و price فعلی.
+    فقط با load() از DB خوانده می‌شود (دو کوئری)؛ تشخیص تغییر بدون کوئری انجام می‌شود
+    و بعد از هر apply خود ایندکس به‌روز می‌شود.
+    """
+
+    MODELS = (ProductVariant, Product)
+
+    def __init__(self):
+        self.rows = {}  # code → [[model, pk, stock, price], ...]
+
+    def load(self):
+        rows = {}
+        for model in self.MODELS:
+            qs = model.objects.filter(erp_code__isnull=False).values_list("pk", "erp_code", "stock", "price")
+            for pk, code, stock, price in qs.iterator(chunk_size=2000):
+                rows.setdefault(code, []).append([model, pk, stock, price])
+        self.rows = rows
+        return self
+
+    def __len__(self):
+        return len(self.rows)
+
+    def diff(self, items):
+        """لیست ردیف‌های تغییرکرده به شکل {model: [(entry, stock, price), ...]}"""
+        changes = {}
+        for item in items or []:
+            mapped = map_stock(item) if isinstance(item, dict) else None
+            if mapped is None:
+                continue
+            code, stock, price = mapped
+            for entry in self.rows.get(code, ()):
+                model, _pk, cur_stock, cur_price = entry
+                new_stock = cur_stock if stock is None else stock
+                new_price = cur_price if price is None else price
+                if new_stock != cur_stock or new_price != cur_price:
+                    changes.setdefault(model, []).append((entry, new_stock, new_price))
+        return changes
+
+    def apply(self, items, *, batch_size: int = 500) -> int:
+        """اعمال تغییرات یک دسته با یک bulk_update برای هر مدل؛ تعداد ردیف‌های تغییرکرده"""
+        changes = self.diff(items)
+        if not changes:
+            return 0
+        total = 0
+        with transaction.atomic():
+            for model, rows in changes.items():
+                objs = [model(pk=entry[1], stock=stock, price=price) for entry, stock, price in rows]
+                model.objects.bulk_update(objs, ["stock", "price"], batch_size=batch_size)
+                total += len(objs)
+        for rows in changes.values():
+            for entry, stock, price in rows:
+                entry[2], entry[3] = stock, price
+        return total
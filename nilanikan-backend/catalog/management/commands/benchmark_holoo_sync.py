@@ -0,0 +1,76 @@
+import logging
+import time
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+import holoo_client
+from catalog.holoo_simulator import HolooSimulator
+from catalog.models import SyncRun
+
+
+class Command(BaseCommand):
+    help = (
+        "سنجش throughput سرتاسری sync_holoo_products روی شبیه‌ساز هلو: برای هر مقدار concurrency "
+        "سه مرحله cold (درج)، warm (بدون تغییر) و delta (بعد از تغییر بخشی از کالاها). "
+        "تغییرات DB هر دور rollback می‌شود مگر با --keep."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=5000)
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument("--concurrency", default="1,4,8", help="لیست مقادیر با کاما")
+        parser.add_argument("--latency-ms", type=int, default=50)
+        parser.add_argument("--jitter-ms", type=int, default=20)
+        parser.add_argument("--http-error-rate", type=float, default=0.0)
+        parser.add_argument("--token-ttl", type=float, default=0, help="عمر توکن شبیه‌ساز (ثانیه)")
+        parser.add_argument("--mutate", type=float, default=0.05, help="نسبت کالاهای تغییرکرده در مرحلهٔ delta")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--keep", action="store_true", help="نتیجهٔ آخرین دور در DB بماند")
+
+    def _phase(self, label, concurrency, page_size):
+        started = time.monotonic()
+        call_command(
+            "sync_holoo_products", page_size=page_size, concurrency=concurrency, stdout=StringIO(),
+        )
+        elapsed = max(time.monotonic() - started, 1e-9)
+        run = SyncRun.objects.order_by("-id").first()
+        self.stdout.write(
+            f"{concurrency:>4} {label:<6} {run.pages_done:>6} {run.items:>8} {run.created:>8} "
+            f"{run.updated:>8} {elapsed:>8.2f} {run.pages_done / elapsed:>9.1f} {run.items / elapsed:>10.1f}"
+        )
+
+    def handle(self, *args, **opts):
+        levels = [max(1, int(x)) for x in str(opts["concurrency"]).split(",") if x.strip()]
+        if opts["verbosity"] < 2:
+            logging.getLogger("holoo").setLevel(logging.WARNING)  # لاگ هر درخواست فقط با -v 2
+        sim = HolooSimulator(
+            products=opts["products"], latency_ms=opts["latency_ms"], jitter_ms=opts["jitter_ms"],
+            http_error_rate=opts["http_error_rate"], token_ttl=opts["token_ttl"], seed=opts["seed"],
+        ).start()
+        holoo_client.configure(
+            base=sim.base_url, enabled=True, username="bench", dbname="bench", password_b64="YmVuY2g=",
+            backoff_base=0.05, backoff_max=0.5,
+        )
+        self.stdout.write(
+            f"simulator {sim.base_url}: {opts['products']} کالا، latency {opts['latency_ms']}±{opts['jitter_ms']}ms, "
+            f"page-size {opts['page_size']}"
+        )
+        self.stdout.write(f"{'conc':>4} {'phase':<6} {'pages':>6} {'items':>8} {'created':>8} "
+                          f"{'updated':>8} {'secs':>8} {'pages/s':>9} {'items/s':>10}")
+        try:
+            for i, concurrency in enumerate(levels):
+                keep = opts["keep"] and i == len(levels) - 1
+                with transaction.atomic():
+                    self._phase("cold", concurrency, opts["page_size"])
+                    self._phase("warm", concurrency, opts["page_size"])
+                    sim.mutate(opts["mutate"])
+                    self._phase("delta", concurrency, opts["page_size"])
+                    if not keep:
+                        transaction.set_rollback(True)
+        finally:
+            sim.stop()
+            holoo_client.configure()  # بازگشت به تنظیمات env
+        self.stdout.write(f"simulator stats: {sim.stats}")
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from catalog.holoo_simulator import HolooSimulator
+
+
+class Command(BaseCommand):
+    help = "اجرای شبیه‌ساز وب‌سرویس هلو روی لوکال (برای تست آفلاین holoo_client و دستورات sync)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8766)
+        parser.add_argument("--products", type=int, default=1000, help="تعداد کالاهای تولیدی")
+        parser.add_argument("--customers", type=int, default=100)
+        parser.add_argument("--latency-ms", type=int, default=0)
+        parser.add_argument("--jitter-ms", type=int, default=0)
+        parser.add_argument("--http-error-rate", type=float, default=0.0, help="نسبت پاسخ‌های 503")
+        parser.add_argument("--token-ttl", type=float, default=0, help="عمر توکن به ثانیه (۰ = بدون انقضا)")
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **opts):
+        sim = HolooSimulator(
+            opts["host"], opts["port"],
+            products=opts["products"], customers=opts["customers"],
+            latency_ms=opts["latency_ms"], jitter_ms=opts["jitter_ms"],
+            http_error_rate=opts["http_error_rate"], token_ttl=opts["token_ttl"], seed=opts["seed"],
+        ).start()
+        self.stdout.write(self.style.SUCCESS(
+            f"Holoo simulator: HOLOO_ENABLED=true HOLOO_ADDRESS={sim.base_url} "
+            f"({len(sim.products)} کالا، {len(sim.customers)} شخص)"
+        ))
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sim.stop()
+            self.stdout.write(f"stats: {sim.stats}")
@@ -1,77 +1,94 @@
-from django.core.management.base import BaseCommand
-from django.db import transaction
-from catalog.models import Product
-from holoo_client import holoo_request
-
-PER_PAGE = 100  # تعداد آیتم هر صفحه
+import time
+import traceback
+from functools import partial
 
-def fetch_products_page(page: int):
-    """
-    از وب‌سرویس هلو صفحه به صفحه می‌خوانیم:
-    GET /Product/{page}/{per_page}
-    """
-    path = f"/Product/{page}/{PER_PAGE}"
-    res = holoo_request("GET", path)
-    if not res:
-        return []
-    return res.get("product") or res.get("products") or res  # بسته به خروجی
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from catalog.holoo_sync import PER_PAGE, fetch_products_page, get_sync_category, iter_pages, upsert_page
+from catalog.models import SyncRun
 
 class Command(BaseCommand):
-    help = "همگام‌سازی محصولات از نرم‌افزار هلو به دیتابیس سایت (با صفحه‌بندی)"
+    help = "همگام‌سازی محصولات از نرم‌افزار هلو به دیتابیس سایت (با صفحه‌بندی، upsert دسته‌ای)"
 
     def add_arguments(self, parser):
         parser.add_argument("--pages", type=int, default=0, help="فقط این تعداد صفحه را بخوان (۰ یعنی تا آخر)")
+        parser.add_argument("--page-size", type=int, default=PER_PAGE, help="تعداد کالا در هر صفحهٔ هلو")
+        parser.add_argument("--concurrency", type=int, default=4,
+                            help="حداکثر صفحاتی که هم‌زمان از هلو پیش‌خوانی می‌شوند")
+        parser.add_argument("--resume", action="store_true",
+                            help="ادامه از checkpoint آخرین اجرا، اگر ناتمام مانده (failed/partial)")
 
-    @transaction.atomic
     def handle(self, *args, **opts):
-        self.stdout.write("دریافت لیست محصولات از هلو ...")
-
-        page = 1
-        count_new, count_update, total = 0, 0, 0
+        # هر صفحه همراه checkpoint خودش در یک تراکنش commit می‌شود؛ خطا در صفحهٔ n صفحات قبلی را برنمی‌گرداند
+        page_size = max(1, opts["page_size"])
         max_pages = opts.get("pages", 0)
+        previous = None
+        if opts["resume"]:
+            # فقط آخرین اجرا: اگر بعد از یک اجرای ناتمام، اجرای کامل یا resume دیگری انجام شده،
+            # checkpoint قدیمی کهنه است و نباید صفحه‌های اولِ کاتالوگ جاری رد شوند
+            previous = SyncRun.objects.filter(kind="products").order_by("-started_at", "-id").first()
+            if previous is not None and previous.status == SyncRun.STATUS_SUCCESS:
+                previous = None
+            if previous is None:
+                self.stdout.write("آخرین اجرا ناتمام نیست؛ از صفحه ۱ شروع می‌شود.")
+            elif previous.page_size != page_size:
+                self.stdout.write(self.style.WARNING(
+                    f"page-size اجرای قبلی ({previous.page_size}) استفاده می‌شود تا شماره صفحه‌ها جابه‌جا نشوند."
+                ))
+                page_size = previous.page_size
+        if previous is not None and previous.status == SyncRun.STATUS_RUNNING:
+            # اجرای قبلی بدون finish قطع شده (kill/crash)
+            previous.finish(SyncRun.STATUS_FAILED, previous.error or "interrupted")
 
-        while True:
-            items = fetch_products_page(page)
-            if not items:
-                break
+        run = SyncRun.objects.create(
+            kind="products",
+            page_size=page_size,
+            start_page=previous.next_page if previous else 1,
+            resumed_from=previous,
+        )
+        self.stdout.write(f"دریافت لیست محصولات از هلو ... (run #{run.pk}, از صفحه {run.start_page})")
 
-            for item in items:
-                # --- نگاشت مینیمال؛ در صورت نیاز مطابق فیلدهای واقعی خروجی هلو اصلاح کن ---
-                code  = item.get("ErpCode") or item.get("ProductErpCode") or item.get("Code")
-                name  = item.get("Name") or ""
-                # قیمت‌ها در هلو ممکنه sellprice یا SellPrice باشه
-                price = (
-                    item.get("SellPrice")
-                    or item.get("sellprice")
-                    or item.get("Price")
-                    or 0
-                )
+        category = None
+        pages = 0
+        started = time.monotonic()
 
-                if not code:
-                    continue  # بدون کد، رد می‌کنیم
+        fetch = partial(fetch_products_page, per_page=page_size)
+        try:
+            for page, items in iter_pages(fetch, start=run.start_page,
+                                          concurrency=opts["concurrency"], max_pages=max_pages):
+                if category is None:
+                    category = get_sync_category()
+                t0 = time.monotonic()
+                with transaction.atomic():
+                    stats = upsert_page(items, category=category)
+                    run.record_page(page, len(items), stats, int((time.monotonic() - t0) * 1000))
+                pages += 1
 
-                obj, created = Product.objects.update_or_create(
-                    external_code=code,
-                    defaults={
-                        "name": name,
-                        "price": float(price or 0),
-                        # اینجا هر فیلد دیگری از محصول سایتت را می‌توانی مقداردهی کنی
-                    },
+                self.stdout.write(
+                    f"صفحه {page} پردازش شد ({len(items)} کالا) | جدید: {stats['created']} | "
+                    f"تغییر: {stats['updated']} | بدون تغییر: {stats['unchanged']}"
                 )
-                total += 1
-                if created:
-                    count_new += 1
-                else:
-                    count_update += 1
+        except BaseException as e:
+            run.finish(SyncRun.STATUS_FAILED, "".join(traceback.format_exception_only(type(e), e)).strip())
+            if isinstance(e, Exception):
+                raise CommandError(
+                    f"همگام‌سازی در صفحه {run.next_page} متوقف شد (run #{run.pk}): {e}. "
+                    f"برای ادامه: --resume"
+                ) from e
+            raise
 
-            self.stdout.write(f"صفحه {page} پردازش شد ({len(items)} کالا).")
-            page += 1
-            if max_pages and page > max_pages:
-                break
+        run.finish(SyncRun.STATUS_PARTIAL if max_pages and pages >= max_pages else SyncRun.STATUS_SUCCESS)
 
+        elapsed = max(time.monotonic() - started, 1e-9)
+        total = run.created + run.updated + run.unchanged
         if total == 0:
             self.stdout.write(self.style.WARNING("هیچ داده‌ای دریافت نشد (شاید هلو وصل نیست)."))
         else:
             self.stdout.write(self.style.SUCCESS(
-                f"تمام شد: {total} کالا | جدید: {count_new} | به‌روزرسانی: {count_update}"
+                f"تمام شد: {total} کالا | جدید: {run.created} | به‌روزرسانی: {run.updated} | "
+                f"بدون تغییر: {run.unchanged} | ردشده: {run.skipped}"
             ))
+        self.stdout.write(
+            f"run #{run.pk} ({run.status}) | {pages} صفحه / {run.items} کالا در {elapsed:.2f}s | "
+            f"{pages / elapsed:.1f} pages/s | {run.items / elapsed:.1f} items/s"
+        )
@@ -0,0 +1,71 @@
+import time
+from functools import partial
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections
+from catalog.holoo_sync import PER_PAGE, StockIndex, fetch_products_page, iter_pages
+from holoo_client import HolooError, HolooUnavailable
+
+
+class Command(BaseCommand):
+    help = (
+        "همگام‌سازی سبک موجودی و قیمت از هلو به ProductVariant/Product بر اساس erp_code. "
+        "فقط ردیف‌هایی که با ایندکس درون‌حافظه فرق دارند نوشته می‌شوند؛ با --loop هر دقیقه قابل اجراست."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=PER_PAGE, help="تعداد کالا در هر صفحهٔ هلو")
+        parser.add_argument("--concurrency", type=int, default=4, help="صفحات پیش‌خوانی هم‌زمان")
+        parser.add_argument("--batch-size", type=int, default=500, help="اندازهٔ هر bulk_update")
+        parser.add_argument("--loop", action="store_true", help="اجرای دائمی با فاصلهٔ --interval")
+        parser.add_argument("--interval", type=float, default=60, help="فاصلهٔ دو دور (ثانیه)")
+        parser.add_argument("--max-backoff", type=float, default=900,
+                            help="سقف مکث بعد از خطاهای پیاپی هلو در --loop (ثانیه)")
+        parser.add_argument("--reload-every", type=int, default=10,
+                            help="هر چند دور ایندکس از DB دوباره خوانده شود (برای کدهای تازه نگاشت‌شده)")
+
+    def handle(self, *args, **opts):
+        index = StockIndex().load()
+        self.stdout.write(f"ایندکس: {len(index)} کد هلو نگاشت‌شده")
+        if not len(index):
+            self.stdout.write(self.style.WARNING("هیچ Product/ProductVariant با erp_code وجود ندارد."))
+
+        fetch = partial(fetch_products_page, per_page=max(1, opts["page_size"]))
+        rounds = failures = 0
+        while True:
+            rounds += 1
+            started = time.monotonic()
+            seen = changed = 0
+            try:
+                if rounds > 1 and opts["reload_every"] and (rounds - 1) % opts["reload_every"] == 0:
+                    index.load()
+                for _page, items in iter_pages(fetch, concurrency=opts["concurrency"]):
+                    seen += len(items)
+                    changed += index.apply(items, batch_size=opts["batch_size"])
+            except (HolooError, requests.HTTPError, OperationalError) as e:
+                # صفحه‌های قبل از خطا اعمال شده‌اند؛ در --loop با مکث نمایی دور بعد دوباره امتحان می‌شود
+                if not opts["loop"]:
+                    raise CommandError(f"دور {rounds} بعد از {seen} کالا متوقف شد: {e}") from e
+                failures += 1
+                delay = min(opts["max_backoff"], opts["interval"] * 2 ** (failures - 1))
+                if isinstance(e, OperationalError):
+                    kind = "خطای دیتابیس"
+                    close_old_connections()  # اتصال خراب دور بعد از نو باز شود
+                elif isinstance(e, requests.HTTPError):
+                    kind = "پاسخ HTTP ناموفق هلو"
+                else:
+                    kind = "circuit باز" if isinstance(e, HolooUnavailable) else "خطای هلو"
+                self.stderr.write(self.style.ERROR(
+                    f"دور {rounds}: {kind} بعد از {seen} کالا ({changed} ردیف به‌روز شد): {e} | "
+                    f"تلاش بعدی {delay:.0f}s دیگر"
+                ))
+                time.sleep(delay)
+                continue
+            failures = 0
+            elapsed = time.monotonic() - started
+            self.stdout.write(f"دور {rounds}: {seen} کالا بررسی شد | {changed} ردیف به‌روز شد | {elapsed:.2f}s")
+
+            if not opts["loop"]:
+                break
+            time.sleep(max(0.0, opts["interval"] - elapsed))
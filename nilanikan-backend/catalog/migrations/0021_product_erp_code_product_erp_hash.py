@@ -0,0 +1,23 @@
+# Generated by Django 4.2.14 on 2026-10-19 15:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0020_alter_product_size_guide_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='erp_code',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='erp_hash',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+    ]
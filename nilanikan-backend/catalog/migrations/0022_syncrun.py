@@ -0,0 +1,39 @@
+# Generated by Django 4.2.14 on 2026-10-19 15:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0021_product_erp_code_product_erp_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(db_index=True, default='products', max_length=32)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('partial', 'Partial'), ('success', 'Success'), ('failed', 'Failed')], default='running', max_length=10)),
+                ('page_size', models.PositiveIntegerField(default=100)),
+                ('start_page', models.PositiveIntegerField(default=1)),
+                ('last_page', models.PositiveIntegerField(default=0)),
+                ('pages', models.JSONField(blank=True, default=list)),
+                ('items', models.PositiveIntegerField(default=0)),
+                ('created', models.PositiveIntegerField(default=0)),
+                ('updated', models.PositiveIntegerField(default=0)),
+                ('unchanged', models.PositiveIntegerField(default=0)),
+                ('skipped', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('duration_ms', models.PositiveIntegerField(blank=True, null=True)),
+                ('resumed_from', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='catalog.syncrun')),
+            ],
+            options={
+                'ordering': ['-started_at', '-id'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.14 on 2026-10-19 15:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0022_syncrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productvariant',
+            name='erp_code',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.14 on 2026-10-19 16:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0023_productvariant_erp_code'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='banner',
+            name='ends_at',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='خالی = بدون پایان', null=True),
+        ),
+        migrations.AddField(
+            model_name='banner',
+            name='starts_at',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='خالی = از همین حالا', null=True),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.14 on 2026-10-19 16:45
+
+from django.db import migrations, models
+
+
+def backfill(apps, schema_editor):
+    SyncRun = apps.get_model("catalog", "SyncRun")
+    for run in SyncRun.objects.only("id", "pages").iterator(chunk_size=500):
+        pages = run.pages or []
+        SyncRun.objects.filter(pk=run.pk).update(
+            pages_done=len(pages),
+            pages_ms=sum(int(p.get("ms") or 0) for p in pages if isinstance(p, dict)),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0024_scheduling_window'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='syncrun',
+            name='pages_done',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='syncrun',
+            name='pages_ms',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='syncrun',
+            name='pages',
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.utils.text import slugify
 
 
@@ -77,6 +78,10 @@ class Product(models.Model):
     )
     size_chart = models.JSONField(blank=True, null=True)
 
+    # نگاشت به کالای هلو (sync_holoo_products)؛ erp_hash = هش آخرین دادهٔ دریافتی برای تشخیص تغییر
+    erp_code = models.CharField(max_length=64, unique=True, blank=True, null=True)
+    erp_hash = models.CharField(max_length=40, blank=True, default="")
+
     def __str__(self) -> str:
         return self.name
 
@@ -202,6 +207,8 @@ class Banner(models.Model):
     alt = models.CharField(max_length=200, blank=True, null=True)
     is_active = models.BooleanField(default=True)
     order = models.PositiveIntegerField(default=0, help_text="عدد کمتر = جلوتر")
+    starts_at = models.DateTimeField(null=True, blank=True, db_index=True, help_text="خالی = از همین حالا")
+    ends_at = models.DateTimeField(null=True, blank=True, db_index=True, help_text="خالی = بدون پایان")
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -261,6 +268,9 @@ class ProductVariant(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     stock = models.IntegerField(default=0)
 
+    # کد کالای هلو برای همین ترکیب رنگ/سایز (sync_holoo_stock)
+    erp_code = models.CharField(max_length=64, unique=True, blank=True, null=True)
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -314,3 +324,70 @@ class MenuItem(models.Model):
 
     def __str__(self) -> str:
         return self.name
+
+
+# =========================
+# SyncRun (تاریخچهٔ همگام‌سازی با هلو + checkpoint صفحه‌ها)
+# =========================
+class SyncRun(models.Model):
+    STATUS_RUNNING = "running"
+    STATUS_PARTIAL = "partial"   # با --pages زودتر متوقف شد؛ با --resume ادامه می‌یابد
+    STATUS_SUCCESS = "success"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, "Running"),
+        (STATUS_PARTIAL, "Partial"),
+        (STATUS_SUCCESS, "Success"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    kind = models.CharField(max_length=32, default="products", db_index=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_RUNNING)
+    resumed_from = models.ForeignKey("self", null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+
+    page_size = models.PositiveIntegerField(default=100)
+    start_page = models.PositiveIntegerField(default=1)
+    last_page = models.PositiveIntegerField(default=0)  # آخرین صفحه‌ای که commit شده
+    # فقط شمارنده؛ ردیف run با هر صفحه بزرگ‌تر نمی‌شود (آمار هر صفحه در خروجی فرمان چاپ می‌شود)
+    pages_done = models.PositiveIntegerField(default=0)
+    pages_ms = models.PositiveBigIntegerField(default=0)  # مجموع زمان upsert صفحه‌ها
+
+    items = models.PositiveIntegerField(default=0)
+    created = models.PositiveIntegerField(default=0)
+    updated = models.PositiveIntegerField(default=0)
+    unchanged = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+
+    error = models.TextField(blank=True, default="")
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration_ms = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-started_at", "-id"]
+
+    def __str__(self) -> str:
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+    @property
+    def next_page(self) -> int:
+        return (self.last_page + 1) if self.last_page else self.start_page
+
+    def record_page(self, page: int, items: int, stats: dict, ms: int):
+        """ثبت checkpoint یک صفحه (داخل همان تراکنشِ upsert صفحه صدا زده شود)."""
+        self.last_page = page
+        self.pages_done += 1
+        self.pages_ms += ms
+        self.items += items
+        for k in ("created", "updated", "unchanged", "skipped"):
+            setattr(self, k, getattr(self, k) + stats.get(k, 0))
+        self.save(update_fields=[
+            "last_page", "pages_done", "pages_ms", "items", "created", "updated", "unchanged", "skipped",
+        ])
+
+    def finish(self, status: str, error: str = ""):
+        self.status = status
+        self.error = error
+        self.finished_at = timezone.now()
+        self.duration_ms = int((self.finished_at - self.started_at).total_seconds() * 1000)
+        self.save(update_fields=["status", "error", "finished_at", "duration_ms"])
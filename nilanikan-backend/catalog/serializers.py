@@ -16,6 +16,7 @@ from .models import (
     MenuItem,
 )
 from stories.models import Story
+from reviews.models import ProductRatingSummary
 
 
 # ------------------------- Helpers -------------------------
@@ -90,6 +91,15 @@ def product_prices(obj: Product) -> Tuple[Optional[float], Optional[float]]:
     return None, None
 
 
+def product_rating(obj: Product) -> dict:
+    """خلاصهٔ امتیاز از rating_summary (با select_related("rating_summary") بدون query اضافه)"""
+    try:
+        summary = obj.rating_summary
+    except ProductRatingSummary.DoesNotExist:
+        summary = None
+    return summary.as_dict() if summary else ProductRatingSummary.EMPTY
+
+
 # ------------------------- Category -------------------------
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -197,6 +207,7 @@ class ProductSerializer(serializers.ModelSerializer):
     # --- fallback/meta برای فرانت ---
     meta = serializers.SerializerMethodField()
     # ------------------------------------
+    rating = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
@@ -210,6 +221,7 @@ class ProductSerializer(serializers.ModelSerializer):
             "size_guide_title", "size_guide_html", "size_guide_url", "size_chart_image",
             # fallback/meta
             "meta",
+            "rating",
         ]
 
     def get_image(self, obj):
@@ -287,6 +299,9 @@ class ProductSerializer(serializers.ModelSerializer):
         # در حال حاضر Category فیلد html/image ندارد؛ اگر بعداً اضافه شد، اینجا مشابه بالا اضافه کنید.
         return data or None
 
+    def get_rating(self, obj):
+        return product_rating(obj)
+
 
 class ProductItemSerializer(serializers.ModelSerializer):
     title = serializers.SerializerMethodField()
@@ -296,6 +311,7 @@ class ProductItemSerializer(serializers.ModelSerializer):
     compareAtPrice = serializers.SerializerMethodField()
     link = serializers.SerializerMethodField()
     badge = serializers.SerializerMethodField()
+    rating = serializers.SerializerMethodField()
     is_recommended = serializers.BooleanField(read_only=True)
 
     class Meta:
@@ -309,6 +325,7 @@ class ProductItemSerializer(serializers.ModelSerializer):
             "compareAtPrice",
             "link",
             "badge",
+            "rating",
             "is_recommended",
         ]
 
@@ -347,6 +364,9 @@ class ProductItemSerializer(serializers.ModelSerializer):
             return "OFF"
         return None
 
+    def get_rating(self, obj):
+        return product_rating(obj)
+
 
 # ------------------------- Bundle -------------------------
 class BundleImageSerializer(serializers.ModelSerializer):
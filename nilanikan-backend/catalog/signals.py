@@ -2,8 +2,9 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
-from .models import ProductImage
+from .models import Banner, ProductImage
 from core.utils.images import generate_variants
+from core.utils.schedule import invalidate_on_change
 
 
 @receiver(post_save, sender=ProductImage)
@@ -19,3 +20,7 @@ def build_productimage_variants(sender, instance: ProductImage, created, **kwarg
     if variants and instance.image_variants != variants:
         # update بدون سیگنال مجدد
         ProductImage.objects.filter(pk=instance.pk).update(image_variants=variants)
+
+
+# کش بنرهای زمان‌بندی‌شده با هر تغییر بنر باطل شود
+invalidate_on_change(Banner)
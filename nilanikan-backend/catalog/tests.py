@@ -0,0 +1,183 @@
+import logging
+import socket
+from unittest import mock
+
+import requests
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from catalog.holoo_simulator import HolooSimulator
+from catalog.holoo_sync import upsert_page
+from catalog.models import Bundle, Category, Product, ProductVariant
+from holoo_client import CircuitBreaker, HolooError, HolooOutcomeUnknown, HolooTransport, HolooUnavailable
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(threshold=3, reset_timeout=60)
+        for _ in range(2):
+            breaker.record_failure()
+        self.assertEqual(breaker.state, "closed")
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        self.assertFalse(breaker.allow())
+
+    def test_half_open_lets_one_probe_through(self):
+        breaker = CircuitBreaker(threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "half-open")
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+        self.assertTrue(breaker.allow())
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker(threshold=5, reset_timeout=60)
+        breaker.opened_at = 0  # خیلی قبل: half-open
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+
+
+class HolooTransportTests(SimpleTestCase):
+    def setUp(self):
+        logging.disable(logging.INFO)  # لاگ زمان هر درخواست
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.sim = HolooSimulator(products=10, seed=1)
+        self.sim.start()
+        self.addCleanup(self.sim.stop)
+
+    def transport(self, base=None, **kwargs):
+        kwargs.setdefault("backoff_base", 0)
+        kwargs.setdefault("breaker", CircuitBreaker(threshold=3, reset_timeout=60))
+        return HolooTransport(base or self.sim.base_url, "db", "user", "cGFzcw==", **kwargs)
+
+    def test_relogin_after_expired_token(self):
+        t = self.transport()
+        self.assertEqual(len(t.request("GET", "/Product")["product"]), 10)
+        self.sim.expire_tokens()
+
+        self.assertEqual(len(t.request("GET", "/Product")["product"]), 10)
+        self.assertEqual(self.sim.stats["login"], 2)
+
+    def test_get_is_retried_and_records_one_failure(self):
+        self.sim.http_error_rate = 1.0
+        t = self.transport(max_retries=2)
+
+        with self.assertRaisesRegex(HolooError, "after 3 attempts"):
+            t.request("GET", "/Product")
+        self.assertEqual(self.sim.stats["http_errors"], 3)
+        self.assertEqual(t.breaker.failures, 1)
+
+    def test_post_is_not_retried_after_reaching_holoo(self):
+        self.sim.http_error_rate = 1.0
+        t = self.transport(max_retries=3)
+
+        with self.assertRaisesRegex(HolooError, "after 1 attempts"):
+            t.request("POST", "/Invoice/Invoice", data={"invoiceinfo": [{"id": "1"}]})
+        self.assertEqual(self.sim.stats["http_errors"], 1)
+
+    def test_post_is_retried_when_connection_is_refused(self):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        t = self.transport(base=f"http://127.0.0.1:{port}", max_retries=2)
+        t._token = "token"
+
+        with self.assertRaisesRegex(HolooError, "after 3 attempts"):
+            t.request("POST", "/Invoice/Invoice", data={"invoiceinfo": []})
+
+    def test_post_read_timeout_is_outcome_unknown(self):
+        t = self.transport(max_retries=3)
+        t.login()
+        t.timeout = 0.1
+        self.sim.latency_ms = 500
+
+        with self.assertRaises(HolooOutcomeUnknown):
+            t.request("POST", "/Invoice/Invoice", data={"invoiceinfo": [{"id": "1"}]})
+        self.assertEqual(t.breaker.failures, 1)
+
+    def test_client_error_does_not_count_as_outage(self):
+        t = self.transport()
+        with self.assertRaises(requests.HTTPError):
+            t.request("GET", "/NoSuchEndpoint")
+        self.assertEqual(t.breaker.failures, 0)
+
+    def test_open_circuit_skips_holoo(self):
+        t = self.transport(breaker=CircuitBreaker(threshold=1, reset_timeout=60))
+        t.breaker.record_failure()
+
+        with self.assertRaises(HolooUnavailable):
+            t.request("GET", "/Product")
+        self.assertEqual(self.sim.stats["login"], 0)
+
+    def test_login_error_during_probe_clears_probe(self):
+        # استثنای پیش‌بینی‌نشده در لاگین نباید breaker را در half-open قفل کند
+        t = self.transport(breaker=CircuitBreaker(threshold=1, reset_timeout=0))
+        t.breaker.record_failure()
+
+        with mock.patch.object(t.session, "post", side_effect=ValueError("bad json")):
+            with self.assertRaises(ValueError):
+                t.request("GET", "/Product")
+        self.assertFalse(t.breaker._probe)
+
+        # probe بعدی عبور می‌کند و با موفقیت breaker بسته می‌شود
+        t.request("GET", "/Product")
+        self.assertEqual(t.breaker.state, "closed")
+
+
+class UpsertPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="c", slug="c")
+        cls.product = Product.objects.create(name="p", slug="p", sku="p-1", category=cls.category, price=100)
+        ProductVariant.objects.create(product=cls.product, price=100, stock=1, erp_code="V-1")
+
+    def test_variant_codes_do_not_become_products(self):
+        items = [{"Code": "V-1", "Name": "p red", "SellPrice": 120}, {"Code": "N-1", "Name": "new", "SellPrice": 50}]
+
+        stats = upsert_page(items, category=self.category)
+
+        self.assertEqual((stats["created"], stats["skipped"]), (1, 1))
+        self.assertEqual(set(Product.objects.values_list("erp_code", flat=True)), {None, "N-1"})
+
+
+class HomeQueryTests(TestCase):
+    # محصولات/باندل‌ها + اسلاید/بنر/استوری و مرز زمان‌بندی هر کدام + prefetchهای مجموعه‌ها
+    HOME_QUERIES = 15
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="c", slug="c")
+
+    def setUp(self):
+        cache.clear()
+
+    def add_bundles(self, count):
+        start = Bundle.objects.count()
+        for i in range(start, start + count):
+            bundle = Bundle.objects.create(title=f"b{i}", slug=f"b{i}", image="bundles/b.jpg", is_recommended=True)
+            for j in range(3):
+                bundle.products.add(Product.objects.create(
+                    name=f"p{i}-{j}", slug=f"p{i}-{j}", sku=f"p{i}-{j}", category=self.category, price=100,
+                    image="products/p.jpg", is_recommended=True,
+                ))
+
+    def home(self):
+        res = APIClient(HTTP_HOST="localhost").get("/api/home/")
+        self.assertEqual(res.status_code, 200)
+        return res.data
+
+    def test_query_count_does_not_grow_with_bundles(self):
+        self.add_bundles(2)
+        with self.assertNumQueries(self.HOME_QUERIES):
+            self.home()
+
+        self.add_bundles(3)
+        cache.clear()
+        with self.assertNumQueries(self.HOME_QUERIES):
+            data = self.home()
+        self.assertEqual(len(data["setsAndPuffer"]["items"]), 5)
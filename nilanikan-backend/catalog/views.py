@@ -31,6 +31,9 @@ from banners.serializers import SlideSerializer, BannerSerializer
 from stories.models import Story
 from stories.serializers import StorySerializer
 
+from .holoo_cache import cached_call
+from core.utils.schedule import scheduled
+
 # --- Holoo helpers (وقتی HOLOO_ENABLED=false باشد فقط Skip لاگ می‌شود)
 try:
     from holoo_client import (
@@ -82,22 +85,28 @@ def home_view(request):
         } for b in rec_bundles
     ]
 
-    slides_qs = Slide.objects.filter(is_active=True).order_by("order", "-id")
+    # اسلاید/بنر/استوری از کش زمان‌بندی (تا مرز starts_at/ends_at بعدی)
+    slides_qs = scheduled(Slide.objects.filter(is_active=True).order_by("order", "-id"), "catalog-home")
     hero_slides = SlideSerializer(slides_qs, many=True, context={"request": request}).data
 
-    banners_qs = Banner.objects.filter(is_active=True).order_by("order", "-id")
+    banners_qs = scheduled(Banner.objects.filter(is_active=True).order_by("order", "-id"), "catalog-home")
     banners = BannerSerializer(banners_qs, many=True, context={"request": request}).data
 
     slide_imgs = {s.get("imageUrl", "") for s in hero_slides if s.get("imageUrl")}
     banners = [b for b in banners if b.get("imageUrl") and b["imageUrl"] not in slide_imgs]
 
-    best_sellers_qs = Product.objects.filter(is_active=True).order_by("-stock", "-id")[:12]
+    best_sellers_qs = Product.objects.filter(is_active=True).select_related("rating_summary").order_by("-stock", "-id")[:12]
     best_sellers = ProductItemSerializer(best_sellers_qs, many=True, context={"request": request}).data
 
-    new_arrivals_qs = Product.objects.filter(is_active=True).order_by("-created_at")[:12]
+    new_arrivals_qs = Product.objects.filter(is_active=True).select_related("rating_summary").order_by("-created_at")[:12]
     new_arrivals = ProductItemSerializer(new_arrivals_qs, many=True, context={"request": request}).data
 
-    sets_qs = Bundle.objects.all().order_by("-created_at")[:20]
+    sets_qs = Bundle.objects.prefetch_related(
+        Prefetch("products", queryset=Product.objects.select_related("rating_summary")),
+        Prefetch("products__gallery"),
+        Prefetch("gallery"),
+        Prefetch("videos"),
+    ).order_by("-created_at")[:20]
     sets_serialized = BundleSerializer(sets_qs, many=True, context={"request": request}).data
     sets_items = [
         {
@@ -111,7 +120,7 @@ def home_view(request):
         for b in sets_serialized
     ]
 
-    stories_qs = Story.objects.order_by("-created_at")[:50]
+    stories_qs = scheduled(Story.objects.order_by("-created_at"), "catalog-home", limit=50)
     stories = StorySerializer(stories_qs, many=True, context={"request": request}).data
 
     return Response({
@@ -186,7 +195,7 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         return (
             Product.objects.all()  # اگر فقط Activeها را می‌خواهی: .filter(is_active=True)
-            .select_related("category")
+            .select_related("category", "rating_summary")
             .prefetch_related(
                 "gallery", "videos",
                 "variants",
@@ -271,7 +280,7 @@ class BundleViewSet(viewsets.ReadOnlyModelViewSet):
         return (
             Bundle.objects.all()
             .prefetch_related(
-                "products",
+                Prefetch("products", queryset=Product.objects.select_related("rating_summary")),
                 Prefetch("products__gallery"),
                 Prefetch("gallery"),
                 Prefetch("videos"),
@@ -367,6 +376,13 @@ def menu_view(request):
 
 
 # ---------------- Holoo proxy endpoints ----------------
+def _cached_response(data, cache_status, age):
+    resp = Response({"ok": True, "data": data}, status=200)
+    resp["X-Cache"] = cache_status
+    resp["Age"] = str(int(age))
+    return resp
+
+
 @api_view(["GET"])
 @permission_classes([permissions.AllowAny])  # می‌تونی در آینده به IsAdminUser تغییر بدی
 def holoo_ping_view(request):
@@ -382,24 +398,24 @@ def holoo_ping_view(request):
 @permission_classes([permissions.AllowAny])
 def holoo_products_view(request):
     """
-    پروکسی خواندن محصولات از هلو (فقط GET)
+    پروکسی خواندن محصولات از هلو (فقط GET) — با کش (هدرهای X-Cache و Age)
     GET /api/holoo/products/
     """
     params = request.query_params.dict()
-    data = _holoo_products(params=params)
-    return Response({"ok": True, "data": data}, status=200)
+    data, cache_status, age = cached_call("products", _holoo_products, params)
+    return _cached_response(data, cache_status, age)
 
 
 @api_view(["GET"])
 @permission_classes([permissions.AllowAny])
 def holoo_customers_view(request):
     """
-    پروکسی خواندن اشخاص از هلو (فقط GET)
+    پروکسی خواندن اشخاص از هلو (فقط GET) — با کش (هدرهای X-Cache و Age)
     GET /api/holoo/customers/
     """
     params = request.query_params.dict()
-    data = _holoo_customers(params=params)
-    return Response({"ok": True, "data": data}, status=200)
+    data, cache_status, age = cached_call("customers", _holoo_customers, params)
+    return _cached_response(data, cache_status, age)
 
 
 # ---------------- ایجاد فاکتور/پیش‌فاکتور/سفارش ----------------
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Conversation, Message
+from .models import ArchiveSegment, Conversation, Message
 
 @admin.register(Conversation)
 class ConversationAdmin(admin.ModelAdmin):
@@ -11,3 +11,12 @@ class MessageAdmin(admin.ModelAdmin):
     list_display = ("id", "conversation", "sender", "created_at")
     list_filter = ("created_at",)
     search_fields = ("text",)
+
+@admin.register(ArchiveSegment)
+class ArchiveSegmentAdmin(admin.ModelAdmin):
+    list_display = ("id", "conversation", "path", "count", "size", "first_at", "last_at")
+    search_fields = ("conversation__room", "path")
+    readonly_fields = [f.name for f in ArchiveSegment._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
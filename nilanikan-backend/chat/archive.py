@@ -0,0 +1,143 @@
+# chat/archive.py
+"""
+آرشیو پیام‌های قدیمی چت در فایل‌های فشرده (دستور archive_chat_messages):
+
+    CHAT_ARCHIVE_ROOT/<room>/<first_id>-<last_id>.jsonl.gz
+
+هر خط یک پیام JSON ({"id", "sender_id", "text", "created_at"}) به ترتیب id.
+فایل الحاق چند عضو gzip مستقل است (هر block_size پیام یک عضو)؛ zcat کل فایل را می‌خواند و
+برای صفحه‌بندی فقط block لازم با offset ثبت‌شده در ArchiveSegment.blocks خوانده و باز می‌شود.
+"""
+import gzip
+import json
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from .models import ArchiveSegment, Message
+
+BLOCK_SIZE = 200
+
+
+def archive_root() -> Path:
+    return Path(getattr(settings, "CHAT_ARCHIVE_ROOT", settings.BASE_DIR / "chat_archive"))
+
+
+def _record(m: Message) -> dict:
+    return {"id": m.id, "sender_id": m.sender_id, "text": m.text, "created_at": m.created_at.isoformat()}
+
+
+def write_segment(conversation, messages, *, block_size=BLOCK_SIZE) -> ArchiveSegment:
+    """
+    messages (مرتب بر اساس id) را در یک فایل جدید می‌نویسد (tmp + fsync + rename)؛
+    خروجی ArchiveSegment ذخیره‌نشده است تا هم‌زمان با حذف پیام‌ها در یک تراکنش ثبت شود.
+    """
+    rel = f"{conversation.room}/{messages[0].id}-{messages[-1].id}.jsonl.gz"
+    path = archive_root() / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+
+    blocks = []
+    offset = 0
+    with open(tmp, "wb") as f:
+        for i in range(0, len(messages), block_size):
+            chunk = messages[i:i + block_size]
+            raw = "".join(json.dumps(_record(m), ensure_ascii=False) + "\n" for m in chunk)
+            data = gzip.compress(raw.encode("utf-8"), mtime=0)
+            f.write(data)
+            blocks.append([chunk[0].id, offset, len(data)])
+            offset += len(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+    return ArchiveSegment(
+        conversation=conversation,
+        path=rel,
+        first_id=messages[0].id,
+        last_id=messages[-1].id,
+        first_at=min(m.created_at for m in messages),
+        last_at=max(m.created_at for m in messages),
+        count=len(messages),
+        size=offset,
+        blocks=blocks,
+    )
+
+
+def archive_conversation(conversation, cutoff, *, segment_size=5000, block_size=BLOCK_SIZE) -> int:
+    """
+    پیام‌های قدیمی‌تر از cutoff را segment به segment به فایل منتقل و از دیتابیس حذف می‌کند.
+    خلاصهٔ گفتگو (message_count و آخرین پیام) دست نمی‌خورد. خروجی: تعداد پیام‌های آرشیوشده
+    """
+    archived = 0
+    old = Message.objects.filter(conversation=conversation, created_at__lt=cutoff)
+    while True:
+        messages = list(old.order_by("id").only("id", "sender_id", "text", "created_at")[:segment_size])
+        if not messages:
+            return archived
+        # فایل قبل از حذف کامل نوشته شده؛ اگر تراکنش شکست بخورد اجرای بعدی همان فایل را بازنویسی می‌کند
+        segment = write_segment(conversation, messages, block_size=block_size)
+        with transaction.atomic():
+            segment.save()
+            old.filter(id__gte=segment.first_id, id__lte=segment.last_id).delete()
+        archived += len(messages)
+
+
+def read_block(segment: ArchiveSegment, index: int) -> list:
+    _first_id, offset, length = segment.blocks[index]
+    with open(archive_root() / segment.path, "rb") as f:
+        f.seek(offset)
+        data = f.read(length)
+    return [json.loads(line) for line in gzip.decompress(data).decode("utf-8").splitlines() if line]
+
+
+def has_before(conversation_id, before_id=None) -> bool:
+    """آیا پیام آرشیوشده‌ای قبل از before_id (None = هر پیام آرشیوشده) وجود دارد؟ بدون خواندن فایل"""
+    segments = ArchiveSegment.objects.filter(conversation_id=conversation_id)
+    if before_id is not None:
+        segments = segments.filter(first_id__lt=before_id)
+    return segments.exists()
+
+
+def read_before(conversation_id, before_id, limit):
+    """
+    جدیدترین پیام‌های آرشیوشدهٔ قبل از before_id (None = از انتهای آرشیو)، حداکثر limit تا.
+    خروجی: (رکوردها به ترتیب صعودی، has_more)
+    """
+    segments = ArchiveSegment.objects.filter(conversation_id=conversation_id)
+    if before_id is not None:
+        segments = segments.filter(first_id__lt=before_id)
+
+    found = []  # جدیدترین اول
+    for segment in segments.order_by("-last_id").iterator():
+        for index in range(len(segment.blocks) - 1, -1, -1):
+            if before_id is not None and segment.blocks[index][0] >= before_id:
+                continue
+            for rec in reversed(read_block(segment, index)):
+                if before_id is not None and rec["id"] >= before_id:
+                    continue
+                found.append(rec)
+                if len(found) > limit:
+                    return found[:limit][::-1], True
+    return found[::-1], False
+
+
+def to_messages(conversation_id, records) -> list:
+    """رکوردهای آرشیو → Message ذخیره‌نشده با sender بارگذاری‌شده (یک query برای کاربران)"""
+    users = User.objects.in_bulk({r["sender_id"] for r in records if r["sender_id"] is not None})
+    messages = []
+    for r in records:
+        m = Message(
+            id=r["id"],
+            conversation_id=conversation_id,
+            sender_id=r["sender_id"],
+            text=r["text"],
+            created_at=parse_datetime(r["created_at"]),
+        )
+        m.sender = users.get(r["sender_id"])
+        messages.append(m)
+    return messages
@@ -0,0 +1,156 @@
+# chat/buffer.py
+"""
+بافر write-behind برای پیام‌های چت:
+پیام‌ها بلافاصله پخش می‌شوند و اینجا جمع می‌شوند؛ هر CHAT_WRITE_BUFFER_MS میلی‌ثانیه
+یا با رسیدن به CHAT_WRITE_BUFFER_SIZE پیام، یک bulk_create انجام می‌شود.
+بعد از ذخیره، شناسهٔ واقعی پیام‌ها (temp_id → id) به گروه هر اتاق اعلام می‌شود.
+
+اگر ذخیره شکست بخورد (قطعی DB) دسته به ابتدای صف برمی‌گردد و با backoff نمایی (تا
+CHAT_WRITE_RETRY_MAX_MS) دوباره امتحان می‌شود؛ صف حداکثر CHAT_WRITE_BUFFER_MAX_PENDING پیام
+نگه می‌دارد و بیشتر از آن قدیمی‌ترها دور ریخته و لاگ می‌شوند.
+
+هر event loop (هر پروسهٔ ASGI) بافر خودش را دارد؛ پیام‌های در صف در صورت crash پروسه
+از دست می‌روند.
+"""
+import asyncio
+import logging
+import weakref
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+
+from .models import Conversation, Message
+
+logger = logging.getLogger(__name__)
+
+CHAT_WRITE_BUFFER_SIZE = getattr(settings, "CHAT_WRITE_BUFFER_SIZE", 50)
+CHAT_WRITE_BUFFER_MS = getattr(settings, "CHAT_WRITE_BUFFER_MS", 20)
+CHAT_WRITE_BUFFER_MAX_PENDING = getattr(settings, "CHAT_WRITE_BUFFER_MAX_PENDING", 10000)
+CHAT_WRITE_RETRY_MAX_MS = getattr(settings, "CHAT_WRITE_RETRY_MAX_MS", 5000)
+
+
+def _persist(messages):
+    with transaction.atomic():
+        Message.objects.bulk_create(messages)
+        Conversation.record_messages(messages)
+
+
+class MessageWriteBuffer:
+    def __init__(self, max_batch=CHAT_WRITE_BUFFER_SIZE, max_delay_ms=CHAT_WRITE_BUFFER_MS,
+                 max_pending=CHAT_WRITE_BUFFER_MAX_PENDING, retry_max_ms=CHAT_WRITE_RETRY_MAX_MS):
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000.0
+        self.max_pending = max_pending
+        self.retry_max = retry_max_ms / 1000.0
+        self._pending = []  # (Message, group_name, temp_id)
+        self._inflight = []  # دسته‌ای که الان در حال ذخیره است
+        self._timer = None
+        self._flushing = None
+        self.failures = 0  # شکست‌های پیاپی ذخیره
+        self.flushed = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+
+    def add(self, message: Message, group_name: str, temp_id: str):
+        self._pending.append((message, group_name, temp_id))
+        if len(self._pending) >= self.max_batch and not self.failures:
+            self._schedule(0)
+        elif self._timer is None:
+            self._schedule(self._delay())
+
+    def pending_for(self, conversation_id):
+        """پیام‌های هنوز ذخیره‌نشدهٔ یک گفتگو، شامل دستهٔ در حال ذخیره (برای replay)"""
+        return [
+            (m, temp_id)
+            for m, _g, temp_id in self._inflight + self._pending
+            if m.conversation_id == conversation_id
+        ]
+
+    def _delay(self):
+        if not self.failures:
+            return self.max_delay
+        return min(self.retry_max, max(self.max_delay, 0.05) * 2 ** self.failures)
+
+    def _schedule(self, delay):
+        loop = asyncio.get_running_loop()
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = loop.call_later(delay, lambda: loop.create_task(self.flush()))
+
+    async def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # فقط یک flush در هر لحظه؛ بقیه منتظر همان می‌مانند و بعد باقی‌مانده را می‌نویسند
+        while self._flushing is not None:
+            await self._flushing
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        self._inflight = batch
+        self._flushing = asyncio.get_running_loop().create_future()
+        try:
+            try:
+                await database_sync_to_async(_persist)([m for m, _g, _t in batch])
+            except Exception:
+                self._requeue(batch)
+            else:
+                self.failures = 0
+                self.flushed += len(batch)
+                try:
+                    await self._announce(batch)
+                except Exception:
+                    logger.exception("chat write-behind announce failed (%d messages)", len(batch))
+        finally:
+            self._inflight = []
+            done, self._flushing = self._flushing, None
+            done.set_result(None)
+        if self._pending and self._timer is None:
+            self._schedule(self._delay())
+
+    def _requeue(self, batch):
+        """دستهٔ ذخیره‌نشده به ابتدای صف برمی‌گردد؛ بیش از max_pending، قدیمی‌ترها دور ریخته می‌شوند"""
+        self.failures += 1
+        self.failed_flushes += 1
+        for m, _g, _t in batch:
+            # تراکنش rollback شده ولی bulk_create ممکن است pk گذاشته باشد
+            m.pk = None
+            m._state.adding = True
+        self._pending = batch + self._pending
+        logger.exception(
+            "chat write-behind flush failed (%d messages, %d consecutive); requeued, %d pending",
+            len(batch), self.failures, len(self._pending),
+            extra={"chat_flush_failures": self.failures, "chat_pending": len(self._pending)},
+        )
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            del self._pending[:overflow]
+            self.dropped += overflow
+            logger.error(
+                "chat write-behind buffer full: dropped %d oldest unsaved messages (%d total)",
+                overflow, self.dropped, extra={"chat_dropped": self.dropped},
+            )
+
+    async def _announce(self, batch):
+        layer = get_channel_layer()
+        if layer is None:
+            return
+        by_group = {}
+        for m, group_name, temp_id in batch:
+            if m.pk is not None:
+                by_group.setdefault(group_name, {})[temp_id] = m.pk
+        for group_name, ids in by_group.items():
+            await layer.group_send(group_name, {"type": "chat_saved", "ids": ids})
+
+
+_buffers = weakref.WeakKeyDictionary()  # event loop → buffer
+
+
+def get_write_buffer() -> MessageWriteBuffer:
+    loop = asyncio.get_running_loop()
+    buf = _buffers.get(loop)
+    if buf is None:
+        buf = _buffers[loop] = MessageWriteBuffer()
+    return buf
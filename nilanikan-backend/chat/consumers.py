@@ -1,102 +1,201 @@
 # chat/consumers.py
+import asyncio
 import json
+import uuid
+from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.utils import timezone
+from . import throttle
+from .buffer import get_write_buffer
 from .models import Conversation, Message
 
+CHAT_REPLAY_LIMIT = getattr(settings, "CHAT_REPLAY_LIMIT", 50)
+CHAT_SEND_QUEUE_SIZE = getattr(settings, "CHAT_SEND_QUEUE_SIZE", 256)
+CLOSE_TOO_SLOW = 4008  # صف ارسال پر شد؛ کلاینت با last_id دوباره وصل شود
+
 class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.room = self.scope["url_route"]["kwargs"]["room"]
         self.room_group_name = f"chat_{self.room}"
-        
+        self.writer = None
+        self.throttle_key = None
+
+        # گفتگو و فرستنده یک بار در اتصال مشخص می‌شوند و برای همهٔ پیام‌ها استفاده می‌شوند
+        self.conversation_id, self.sender_id, authenticated = await self.resolve_identity()
+        self.throttle_key = f"user:{self.sender_id}" if authenticated else self.guest_throttle_key()
+
         # Join room group
         await self.channel_layer.group_add(
             self.room_group_name,
             self.channel_name
         )
-        
+
         await self.accept()
 
+        # صف ارسال محدود برای هر اتصال: پخش گروهی منتظر کلاینت کند نمی‌ماند
+        self.send_queue = asyncio.Queue(maxsize=CHAT_SEND_QUEUE_SIZE)
+        self.writer = asyncio.create_task(self._drain_send_queue())
+
+        await self.replay_history()
+
+    def guest_throttle_key(self):
+        """
+        مهمان: IP کلاینت + اتاق (پایدار بین اتصال‌ها). پشت reverse proxy، IP واقعی فقط با
+        daphne --proxy-headers یا ProxyHeadersMiddleware در scope["client"] می‌نشیند.
+        """
+        client = self.scope.get("client")
+        if client and client[0]:
+            return f"guest:{client[0]}:{self.room}"
+        return f"conn:{self.channel_name}"
+
     async def disconnect(self, close_code):
         # Leave room group
         await self.channel_layer.group_discard(
             self.room_group_name,
             self.channel_name
         )
+        if self.writer is not None:
+            self.writer.cancel()
+        # سطل throttle عمداً پاک نمی‌شود؛ وصل‌شدن دوباره نباید burst تازه بدهد (sweep در throttle)
+        # پیام‌های بافرشده را بدون انتظار برای تایمر ذخیره کن
+        await get_write_buffer().flush()
 
     async def receive(self, text_data):
         try:
             text_data_json = json.loads(text_data)
             message_text = text_data_json.get('message', '')
-            sender_id = text_data_json.get('sender_id')
-            
-            if message_text and sender_id:
-                # Save message to database
-                message = await self.save_message(
-                    room=self.room,
-                    message_text=message_text,
-                    sender_id=sender_id
-                )
-                
-                # Send message to room group
-                await self.channel_layer.group_send(
-                    self.room_group_name,
-                    {
-                        'type': 'chat_message',
-                        'message': message_text,
-                        'sender_id': sender_id,
-                        'message_id': message.id,
-                        'timestamp': message.created_at.isoformat(),
-                    }
-                )
-                
-        except Exception as e:
-            await self.send(text_data=json.dumps({
-                'error': f'Invalid message format: {str(e)}'
-            }))
+        except (ValueError, AttributeError) as e:
+            self.enqueue({'error': f'Invalid message format: {str(e)}'})
+            return
+
+        if not message_text:
+            return
+
+        allowed, retry_after = throttle.allow(self.throttle_key)
+        if not allowed:
+            self.enqueue({'error': 'rate_limited', 'retry_after': round(retry_after, 2)})
+            return
+
+        now = timezone.now()
+        temp_id = uuid.uuid4().hex
+
+        # اول پخش، بعد ذخیره (write-behind)؛ شناسهٔ واقعی با رویداد chat_saved می‌رسد
+        await self.channel_layer.group_send(
+            self.room_group_name,
+            {
+                'type': 'chat_message',
+                'message': message_text,
+                'sender_id': self.sender_id,
+                'message_id': None,
+                'temp_id': temp_id,
+                'timestamp': now.isoformat(),
+            }
+        )
+        get_write_buffer().add(
+            Message(conversation_id=self.conversation_id, sender_id=self.sender_id, text=message_text, created_at=now),
+            self.room_group_name,
+            temp_id,
+        )
 
     async def chat_message(self, event):
         # Send message to WebSocket
-        await self.send(text_data=json.dumps({
+        self.enqueue({
             'message': event['message'],
             'sender_id': event['sender_id'],
             'message_id': event['message_id'],
+            'temp_id': event.get('temp_id'),
             'timestamp': event['timestamp'],
-        }))
+        })
 
-    @database_sync_to_async
-    def save_message(self, room, message_text, sender_id):
-        """Save message to database"""
+    async def chat_saved(self, event):
+        # نگاشت temp_id → message_id بعد از ذخیره در دیتابیس
+        self.enqueue({'type': 'saved', 'ids': event['ids']})
+
+    # ---------- ارسال با صف محدود ----------
+    def enqueue(self, payload):
+        try:
+            self.send_queue.put_nowait(json.dumps(payload))
+        except asyncio.QueueFull:
+            # کلاینت عقب مانده؛ به جای نگه داشتن حافظه یا کند کردن بقیه، اتصال بسته می‌شود
+            # و کلاینت با ?last_id=... دوباره وصل شده و از replay جا افتاده‌ها را می‌گیرد
+            while not self.send_queue.empty():
+                self.send_queue.get_nowait()
+            self.writer.cancel()
+            asyncio.ensure_future(self.close(code=CLOSE_TOO_SLOW))
+
+    async def _drain_send_queue(self):
+        while True:
+            frame = await self.send_queue.get()
+            await self.send(text_data=frame)
+
+    # ---------- replay تاریخچه در اتصال ----------
+    async def replay_history(self):
+        params = parse_qs((self.scope.get("query_string") or b"").decode())
+        last_id = (params.get("last_id") or [""])[0]
         try:
-            # Get or create conversation
-            conversation, created = Conversation.objects.get_or_create(
-                room=room
-            )
-            
-            # Get sender user
-            sender = User.objects.get(id=sender_id)
-            
-            # Create message
-            message = Message.objects.create(
-                conversation=conversation,
-                sender=sender,
-                text=message_text
-            )
-            
-            return message
-            
-        except User.DoesNotExist:
-            # Handle guest user or create anonymous user
-            guest_user, created = User.objects.get_or_create(
-                username=f"guest_{room}",
-                defaults={'first_name': 'Guest'}
-            )
-            
-            message = Message.objects.create(
-                conversation=conversation,
-                sender=guest_user,
-                text=message_text
-            )
-            
-            return message
+            limit = int((params.get("history") or [CHAT_REPLAY_LIMIT])[0])
+        except ValueError:
+            limit = CHAT_REPLAY_LIMIT
+        limit = max(0, min(limit, CHAT_REPLAY_LIMIT))
+        if not limit and not last_id:
+            return
+
+        messages, has_more = await self.load_history(int(last_id) if last_id.isdigit() else None, limit or CHAT_REPLAY_LIMIT)
+        # پیام‌هایی که هنوز در بافر write-behind هستند (پخش شده ولی ذخیره نشده)
+        loaded = {msg['message_id'] for msg in messages}
+        for m, temp_id in get_write_buffer().pending_for(self.conversation_id):
+            if m.pk is not None and m.pk in loaded:
+                continue  # دستهٔ در حال ذخیره که پیش از load_history commit شد
+            messages.append({
+                'message': m.text,
+                'sender_id': m.sender_id,
+                'message_id': None,
+                'temp_id': temp_id,
+                'timestamp': m.created_at.isoformat(),
+            })
+        self.enqueue({'type': 'history', 'messages': messages, 'has_more': has_more})
+
+    @database_sync_to_async
+    def load_history(self, last_id, limit):
+        qs = Message.objects.filter(conversation_id=self.conversation_id).only(
+            "id", "sender_id", "text", "created_at"
+        )
+        if last_id is not None:
+            # پیام‌های بعد از آخرین پیامی که کلاینت دیده (قدیمی‌ترین‌ها اول)
+            rows = list(qs.filter(id__gt=last_id).order_by("created_at", "id")[:limit + 1])
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+        else:
+            rows = list(qs.order_by("-created_at", "-id")[:limit + 1])
+            has_more = len(rows) > limit
+            rows = rows[:limit][::-1]
+        return [
+            {
+                'message': m.text,
+                'sender_id': m.sender_id,
+                'message_id': m.id,
+                'timestamp': m.created_at.isoformat(),
+            }
+            for m in rows
+        ], has_more
+
+    @database_sync_to_async
+    def resolve_identity(self):
+        """(conversation_id, sender_id, authenticated) از room و scope["user"]؛ کاربر مهمان: guest_{room}"""
+        conversation, created = Conversation.objects.get_or_create(
+            room=self.room
+        )
+
+        user = self.scope.get("user")
+        if user is not None and user.is_authenticated:
+            return conversation.id, user.id, True
+
+        # Handle guest user or create anonymous user
+        guest_user, created = User.objects.get_or_create(
+            username=f"guest_{self.room}",
+            defaults={'first_name': 'Guest'}
+        )
+        return conversation.id, guest_user.id, False
@@ -0,0 +1,54 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from chat.archive import BLOCK_SIZE, archive_conversation, archive_root
+from chat.models import Conversation, Message
+
+
+class Command(BaseCommand):
+    help = (
+        "انتقال پیام‌های چتِ قدیمی‌تر از --days روز به فایل‌های jsonl.gz هر گفتگو در CHAT_ARCHIVE_ROOT "
+        "و حذف آن‌ها از جدول Message؛ خلاصهٔ گفتگوها در دیتابیس می‌ماند و /messages/ "
+        "هنگام رسیدن به انتهای دادهٔ زنده از آرشیو ادامه می‌دهد."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=180, help="پیام‌های قدیمی‌تر از این تعداد روز")
+        parser.add_argument("--room", help="فقط همین گفتگو")
+        parser.add_argument("--segment-size", type=int, default=5000, help="حداکثر پیام در هر فایل")
+        parser.add_argument("--block-size", type=int, default=BLOCK_SIZE, help="پیام در هر block فشرده")
+        parser.add_argument("--dry-run", action="store_true", help="فقط شمارش، بدون نوشتن و حذف")
+
+    def handle(self, *args, **opts):
+        if opts["days"] < 1:
+            raise CommandError("--days باید حداقل ۱ باشد")
+        cutoff = timezone.now() - timedelta(days=opts["days"])
+
+        old = Message.objects.filter(created_at__lt=cutoff)
+        if opts["room"]:
+            old = old.filter(conversation__room=opts["room"])
+        conversation_ids = list(old.values_list("conversation_id", flat=True).distinct())
+        self.stdout.write(f"cutoff {cutoff:%Y-%m-%d %H:%M} | {len(conversation_ids)} گفتگو | مقصد {archive_root()}")
+
+        if opts["dry_run"]:
+            self.stdout.write(f"dry-run: {old.count()} پیام آرشیو می‌شد")
+            return
+
+        started = time.monotonic()
+        total = 0
+        for conversation in Conversation.objects.filter(id__in=conversation_ids).order_by("id"):
+            n = archive_conversation(
+                conversation, cutoff,
+                segment_size=max(1, opts["segment_size"]),
+                block_size=max(1, opts["block_size"]),
+            )
+            total += n
+            if opts["verbosity"] >= 2:
+                self.stdout.write(f"  {conversation.room}: {n}")
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} پیام از {len(conversation_ids)} گفتگو آرشیو شد در {elapsed:.2f}s"
+        ))
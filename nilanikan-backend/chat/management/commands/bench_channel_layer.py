@@ -0,0 +1,79 @@
+import asyncio
+import statistics
+import time
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _pct(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+class Command(BaseCommand):
+    help = (
+        "سنجش latency پخش (fan-out) لایهٔ کانال فعلی: یک گروه با N مشترک، M پیام با group_send، "
+        "و زمان رسیدن هر پیام به هر مشترک (p50/p95/p99)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--alias", default="default", help="نام لایه در CHANNEL_LAYERS")
+        parser.add_argument("--subscribers", type=int, default=50)
+        parser.add_argument("--messages", type=int, default=200)
+        parser.add_argument("--rate", type=float, default=500, help="پیام در ثانیه (۰ = بدون مکث)")
+        parser.add_argument("--timeout", type=float, default=30)
+
+    def handle(self, *args, **opts):
+        layer = get_channel_layer(opts["alias"])
+        if layer is None:
+            raise CommandError(f"channel layer '{opts['alias']}' تعریف نشده است")
+        backend = settings.CHANNEL_LAYERS[opts["alias"]]["BACKEND"]
+        self.stdout.write(f"backend: {backend}")
+        stats = asyncio.run(self._run(layer, opts))
+
+        lat = [x * 1000 for x in stats["latencies"]]
+        expected = opts["subscribers"] * opts["messages"]
+        self.stdout.write(
+            f"delivered {len(lat)}/{expected} ({expected - len(lat)} lost) in {stats['elapsed']:.2f}s | "
+            f"{len(lat) / max(stats['elapsed'], 1e-9):.0f} deliveries/s"
+        )
+        if lat:
+            self.stdout.write(
+                f"latency ms: p50={_pct(lat, 50):.2f} p95={_pct(lat, 95):.2f} p99={_pct(lat, 99):.2f} "
+                f"max={max(lat):.2f} mean={statistics.fmean(lat):.2f}"
+            )
+
+    async def _run(self, layer, opts):
+        group = f"bench_{int(time.time() * 1000)}"
+        n_msgs = opts["messages"]
+        channels = [await layer.new_channel() for _ in range(opts["subscribers"])]
+        for ch in channels:
+            await layer.group_add(group, ch)
+
+        latencies = []
+
+        async def consume(ch):
+            for _ in range(n_msgs):
+                msg = await layer.receive(ch)
+                latencies.append(time.perf_counter() - msg["t"])
+
+        consumers = [asyncio.create_task(consume(ch)) for ch in channels]
+        interval = 1.0 / opts["rate"] if opts["rate"] > 0 else 0
+        started = time.perf_counter()
+        try:
+            for i in range(n_msgs):
+                await layer.group_send(group, {"type": "bench.message", "t": time.perf_counter(), "i": i})
+                await asyncio.sleep(interval)
+            await asyncio.wait_for(asyncio.gather(*consumers), timeout=opts["timeout"])
+        except asyncio.TimeoutError:
+            for task in consumers:
+                task.cancel()
+        finally:
+            elapsed = time.perf_counter() - started
+            for ch in channels:
+                await layer.group_discard(group, ch)
+        return {"latencies": latencies, "elapsed": elapsed}
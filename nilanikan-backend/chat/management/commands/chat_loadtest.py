@@ -0,0 +1,329 @@
+import asyncio
+import gc
+import json
+import random
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from channels.db import database_sync_to_async
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from chat.models import Conversation, Message
+
+try:
+    import resource
+except ImportError:  # ویندوز
+    resource = None
+
+MARK = "lt"  # پیشوند متن پیام‌های تست: "lt <client> <seq> <perf_counter>"
+
+
+def _pct(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def _rss_mb(pid=None):
+    """RSS فعلی پروسه (لینوکس، از /proc)؛ در غیر این صورت بیشینهٔ RSS همین پروسه"""
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if pid is None and resource is not None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return None
+
+
+# ---------- کلاینت‌ها ----------
+class InProcessClient:
+    """اتصال مستقیم به application در همین پروسه با WebsocketCommunicator"""
+
+    def __init__(self, application, path):
+        from channels.testing import WebsocketCommunicator
+
+        self.comm = WebsocketCommunicator(application, path)
+
+    async def connect(self, timeout):
+        connected, _ = await self.comm.connect(timeout=timeout)
+        return connected
+
+    async def send(self, text):
+        await self.comm.send_to(text_data=text)
+
+    async def receive(self, timeout):
+        """متن فریم بعدی؛ None اگر اتصال بسته شد"""
+        event = await self.comm.receive_output(timeout)
+        if event["type"] == "websocket.close":
+            return None
+        return event.get("text")
+
+    async def close(self):
+        await self.comm.disconnect()
+
+
+class RemoteClient:
+    """اتصال واقعی به سرور (daphne/uvicorn) با کلاینت asyncio autobahn (وابستگی daphne)"""
+
+    def __init__(self, url):
+        self.url = url
+        self.queue = asyncio.Queue()
+        self.protocol = None
+
+    async def connect(self, timeout):
+        from autobahn.asyncio.websocket import WebSocketClientFactory, WebSocketClientProtocol
+
+        queue = self.queue
+        opened = asyncio.get_running_loop().create_future()
+
+        class Protocol(WebSocketClientProtocol):
+            def onOpen(self):
+                if not opened.done():
+                    opened.set_result(True)
+
+            def onMessage(self, payload, is_binary):
+                queue.put_nowait(payload.decode("utf-8"))
+
+            def onClose(self, was_clean, code, reason):
+                if not opened.done():
+                    opened.set_result(False)
+                queue.put_nowait(None)
+
+        parts = urlsplit(self.url)
+        factory = WebSocketClientFactory(self.url)
+        factory.protocol = Protocol
+        loop = asyncio.get_running_loop()
+        _, self.protocol = await asyncio.wait_for(
+            loop.create_connection(
+                factory, parts.hostname, parts.port or (443 if parts.scheme == "wss" else 80),
+                ssl=parts.scheme == "wss" or None,
+            ),
+            timeout,
+        )
+        return await asyncio.wait_for(opened, timeout)
+
+    async def send(self, text):
+        self.protocol.sendMessage(text.encode("utf-8"))
+
+    async def receive(self, timeout):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    async def close(self):
+        if self.protocol is not None:
+            self.protocol.sendClose()
+
+
+class Command(BaseCommand):
+    help = (
+        "تست بار چت: N کلاینت شبیه‌سازی‌شده در M اتاق با نرخ پیام مشخص به ChatConsumer وصل می‌شوند "
+        "(در همین پروسه با WebsocketCommunicator یا با --url به daphne محلی). "
+        "گزارش: latency تحویل p50/p95/p99، پیام در ثانیه، حافظهٔ سرور. "
+        "اتاق‌ها و پیام‌های تست در پایان حذف می‌شوند (مگر --keep)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=100, help="تعداد کل کلاینت‌ها")
+        parser.add_argument("--rooms", type=int, default=10)
+        parser.add_argument("--rate", type=float, default=100, help="کل پیام‌های ارسالی در ثانیه (همهٔ کلاینت‌ها)")
+        parser.add_argument("--duration", type=float, default=10, help="ثانیه")
+        parser.add_argument("--payload", type=int, default=64, help="طول تقریبی متن هر پیام (بایت)")
+        parser.add_argument("--url", default="", help="مثلاً ws://127.0.0.1:8000 ؛ خالی = درون همین پروسه")
+        parser.add_argument("--server-pid", type=int, help="برای --url: pid سرور جهت گزارش RSS")
+        parser.add_argument("--connect-timeout", type=float, default=10)
+        parser.add_argument("--drain", type=float, default=3, help="انتظار برای تحویل باقی‌مانده‌ها بعد از پایان ارسال")
+        parser.add_argument("--tracemalloc", action="store_true", help="ردیابی حافظهٔ پایتون (کندتر)")
+        parser.add_argument("--keep", action="store_true", help="اتاق‌ها و پیام‌های تست حذف نشوند")
+
+    def handle(self, *args, **opts):
+        if opts["clients"] < 1 or opts["rooms"] < 1:
+            raise CommandError("--clients و --rooms باید حداقل ۱ باشند")
+        opts["rooms"] = min(opts["rooms"], opts["clients"])
+        prefix = f"loadtest-{int(time.time())}"
+
+        if opts["url"]:
+            application = None
+            self.stdout.write(f"mode: remote {opts['url']}")
+        else:
+            from shop_backend.asgi import application
+
+            self.stdout.write("mode: in-process (کلاینت و سرور روی یک event loop)")
+
+        if opts["tracemalloc"]:
+            import tracemalloc
+
+            tracemalloc.start()
+        gc.collect()
+        rss_before = self._server_rss(opts)
+
+        try:
+            stats = asyncio.run(self._run(application, prefix, opts))
+        finally:
+            if not opts["keep"]:
+                self._cleanup(prefix)
+
+        rss_after = self._server_rss(opts)
+        self._report(stats, opts, rss_before, rss_after)
+
+    # ---------- اجرا ----------
+    async def _run(self, application, prefix, opts):
+        n_clients, n_rooms = opts["clients"], opts["rooms"]
+        rooms = [f"{prefix}-{i}" for i in range(n_rooms)]
+        room_of = [rooms[i % n_rooms] for i in range(n_clients)]
+        room_size = {room: room_of.count(room) for room in rooms}
+
+        def make_client(room):
+            path = f"/ws/chat/{room}/?history=0"
+            if opts["url"]:
+                return RemoteClient(opts["url"].rstrip("/") + path)
+            return InProcessClient(application, path)
+
+        stats = {
+            "latencies": [], "sent": 0, "expected": 0, "saved": 0, "rate_limited": 0,
+            "errors": 0, "closed": 0, "send_lag": [], "connect": 0.0, "elapsed": 0.0,
+        }
+
+        clients = [make_client(room) for room in room_of]
+        t0 = time.perf_counter()
+        results = await asyncio.gather(
+            *(c.connect(opts["connect_timeout"]) for c in clients), return_exceptions=True
+        )
+        stats["connect"] = time.perf_counter() - t0
+        failed = [r for r in results if r is not True]
+        if failed:
+            await asyncio.gather(*(c.close() for c, r in zip(clients, results) if r is True), return_exceptions=True)
+            raise CommandError(f"{len(failed)} از {n_clients} اتصال برقرار نشد: {failed[0]!r}")
+        self.stdout.write(
+            f"connected {n_clients} clients in {n_rooms} rooms in {stats['connect']:.2f}s"
+            + (f" (server RSS {rss:.0f} MB)" if (rss := self._server_rss(opts)) is not None else "")
+        )
+
+        stop = asyncio.Event()
+        filler = "x" * max(0, opts["payload"] - 40)
+        interval = n_clients / opts["rate"] if opts["rate"] > 0 else 0
+
+        async def reader(idx, client):
+            while True:
+                try:
+                    text = await client.receive(3600)
+                except asyncio.TimeoutError:
+                    return
+                if text is None:
+                    stats["closed"] += 1
+                    return
+                now = time.perf_counter()
+                frame = json.loads(text)
+                message = frame.get("message")
+                if isinstance(message, str) and message.startswith(MARK + " "):
+                    stats["latencies"].append(now - float(message.split(" ", 4)[3]))
+                elif frame.get("type") == "saved":
+                    stats["saved"] += len(frame.get("ids") or {})
+                elif frame.get("error") == "rate_limited":
+                    # پیام رد شده پخش نمی‌شود؛ جزو گم‌شده‌ها حساب نشود
+                    stats["rate_limited"] += 1
+                    stats["expected"] -= room_size[room_of[idx]]
+                elif frame.get("error"):
+                    stats["errors"] += 1
+
+        async def writer(idx, client):
+            if not interval:
+                return
+            # شروع پخش‌شده در بازهٔ اول تا همهٔ کلاینت‌ها هم‌زمان نفرستند
+            due = time.perf_counter() + random.uniform(0, interval)
+            seq = 0
+            while not stop.is_set():
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    if stop.is_set():
+                        return
+                else:
+                    stats["send_lag"].append(-delay)  # بار تولیدکننده از برنامه عقب افتاده
+                seq += 1
+                text = f"{MARK} {idx} {seq} {time.perf_counter():.9f} {filler}"
+                await client.send(json.dumps({"message": text}))
+                stats["sent"] += 1
+                stats["expected"] += room_size[room_of[idx]]
+                due += interval
+
+        readers = [asyncio.create_task(reader(i, c)) for i, c in enumerate(clients)]
+        writers = [asyncio.create_task(writer(i, c)) for i, c in enumerate(clients)]
+        started = time.perf_counter()
+        await asyncio.sleep(opts["duration"])
+        stop.set()
+        stats["elapsed"] = time.perf_counter() - started
+        await asyncio.gather(*writers, return_exceptions=True)
+        # تحویل‌های در راه: تا رسیدن همه یا تمام شدن --drain
+        deadline = time.perf_counter() + opts["drain"]
+        while len(stats["latencies"]) < stats["expected"] and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+        for task in readers:
+            task.cancel()
+        await asyncio.gather(*readers, return_exceptions=True)
+
+        stats["rss_peak_load"] = self._server_rss(opts)
+        if opts["tracemalloc"]:
+            import tracemalloc
+
+            stats["tracemalloc"] = tracemalloc.get_traced_memory()
+        await asyncio.gather(*(c.close() for c in clients), return_exceptions=True)
+        stats["persisted"] = await self._persisted(prefix)
+        return stats
+
+    @staticmethod
+    def _server_rss(opts):
+        # در حالت remote بدون --server-pid حافظهٔ سرور در دسترس نیست
+        if opts["url"]:
+            return _rss_mb(opts["server_pid"]) if opts["server_pid"] else None
+        return _rss_mb()
+
+    @database_sync_to_async
+    def _persisted(self, prefix):
+        return Message.objects.filter(conversation__room__startswith=prefix).count()
+
+    def _cleanup(self, prefix):
+        Conversation.objects.filter(room__startswith=prefix).delete()
+        User.objects.filter(username__startswith=f"guest_{prefix}").delete()
+
+    # ---------- گزارش ----------
+    def _report(self, stats, opts, rss_before, rss_after):
+        elapsed = max(stats["elapsed"], 1e-9)
+        lat = [x * 1000 for x in stats["latencies"]]
+        self.stdout.write(
+            f"sent {stats['sent']} msgs in {stats['elapsed']:.2f}s → {stats['sent'] / elapsed:.0f} msgs/s "
+            f"(target {opts['rate']:.0f}) | persisted {stats['persisted']} | saved-acks {stats['saved']}"
+        )
+        lost = stats["expected"] - len(lat)
+        self.stdout.write(
+            f"delivered {len(lat)}/{stats['expected']} ({lost} lost) → {len(lat) / elapsed:.0f} deliveries/s | "
+            f"rate_limited {stats['rate_limited']} errors {stats['errors']} closed {stats['closed']}"
+        )
+        if lat:
+            self.stdout.write(
+                f"latency ms: p50={_pct(lat, 50):.2f} p95={_pct(lat, 95):.2f} p99={_pct(lat, 99):.2f} "
+                f"max={max(lat):.2f} mean={statistics.fmean(lat):.2f}"
+            )
+        if stats["send_lag"]:
+            lag = [x * 1000 for x in stats["send_lag"]]
+            self.stdout.write(
+                self.style.WARNING(
+                    f"load generator fell behind on {len(lag)} sends (p95 lag {_pct(lag, 95):.1f} ms) — "
+                    "نرخ واقعی کمتر از هدف است"
+                )
+            )
+
+        mem = []
+        if rss_before is not None and rss_after is not None:
+            peak = stats.get("rss_peak_load") or rss_after
+            mem.append(f"RSS {rss_before:.0f} → {peak:.0f} MB under load ({rss_after:.0f} MB after close)")
+        if "tracemalloc" in stats:
+            current, peak = stats["tracemalloc"]
+            mem.append(f"python heap {current / 1048576:.1f} MB (peak {peak / 1048576:.1f} MB)")
+        if mem:
+            who = f"server pid {opts['server_pid']}" if opts["url"] else "process"
+            self.stdout.write(f"memory ({who}): " + " | ".join(mem))
@@ -0,0 +1,40 @@
+from django.db import migrations
+from django.db.models import Count, Max, OuterRef, Subquery
+
+
+def backfill(apps, schema_editor):
+    Conversation = apps.get_model("chat", "Conversation")
+    Message = apps.get_model("chat", "Message")
+
+    last = Message.objects.filter(conversation=OuterRef("pk")).order_by("-created_at", "-id")
+    rows = (
+        Conversation.objects.annotate(
+            n=Count("messages"),
+            last_at=Max("messages__created_at"),
+            last_text=Subquery(last.values("text")[:1]),
+        )
+        .filter(n__gt=0)
+        .only("id")
+    )
+    batch = []
+    for c in rows.iterator(chunk_size=1000):
+        c.message_count = c.n
+        c.last_message_at = c.last_at
+        c.last_message_preview = (c.last_text or "")[:255]
+        batch.append(c)
+        if len(batch) >= 1000:
+            Conversation.objects.bulk_update(batch, ["message_count", "last_message_at", "last_message_preview"])
+            batch = []
+    if batch:
+        Conversation.objects.bulk_update(batch, ["message_count", "last_message_at", "last_message_preview"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0002_conversation_last_message_at_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
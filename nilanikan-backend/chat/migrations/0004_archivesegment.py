@@ -0,0 +1,34 @@
+# Generated by Django 4.2.14 on 2026-10-19 16:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_backfill_conversation_summaries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=255)),
+                ('first_id', models.BigIntegerField()),
+                ('last_id', models.BigIntegerField()),
+                ('first_at', models.DateTimeField()),
+                ('last_at', models.DateTimeField()),
+                ('count', models.PositiveIntegerField()),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('blocks', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archive_segments', to='chat.conversation')),
+            ],
+            options={
+                'ordering': ['conversation', 'first_id'],
+                'indexes': [models.Index(fields=['conversation', 'last_id'], name='chat_seg_conv_last_idx')],
+            },
+        ),
+    ]
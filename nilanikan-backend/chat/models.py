@@ -1,12 +1,83 @@
 from django.db import models
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
 from django.contrib.auth.models import User
 
+PREVIEW_LENGTH = 255
+
 class Conversation(models.Model):
     room = models.SlugField(unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # خلاصهٔ دنرمال‌شده؛ لیست گفتگوها بدون خواندن جدول پیام‌ها
+    last_message_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    last_message_preview = models.CharField(max_length=PREVIEW_LENGTH, blank=True, default="")
+    message_count = models.PositiveIntegerField(default=0)
+
+    @classmethod
+    def record_messages(cls, messages):
+        """
+        به‌روزرسانی خلاصهٔ گفتگوها بعد از درج پیام (تکی یا bulk_create)؛ یک UPDATE برای هر گفتگو.
+        آخرین پیام فقط اگر از مقدار فعلی جدیدتر باشد جایگزین می‌شود (flushهای هم‌زمان).
+        """
+        grouped = {}
+        for m in messages:
+            count, last = grouped.get(m.conversation_id, (0, None))
+            if last is None or (m.created_at, m.pk or 0) >= (last.created_at, last.pk or 0):
+                last = m
+            grouped[m.conversation_id] = (count + 1, last)
+
+        for conversation_id, (count, last) in grouped.items():
+            newer = Q(last_message_at__isnull=True) | Q(last_message_at__lte=last.created_at)
+            cls.objects.filter(pk=conversation_id).update(
+                message_count=F("message_count") + count,
+                last_message_at=Case(When(newer, then=Value(last.created_at)), default=F("last_message_at")),
+                last_message_preview=Case(
+                    When(newer, then=Value((last.text or "")[:PREVIEW_LENGTH])),
+                    default=F("last_message_preview"),
+                ),
+            )
+
 class Message(models.Model):
     conversation = models.ForeignKey(Conversation, related_name="messages", on_delete=models.CASCADE)
     sender = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
     text = models.TextField()
+    # نه auto_now_add: بافر نوشتن زمان دریافت پیام را می‌گذارد و نباید با زمان flush جایگزین شود
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=["conversation", "created_at"], name="chat_msg_conv_created_idx")]
+
+
+class ArchiveSegment(models.Model):
+    """
+    یک فایل آرشیو (jsonl.gz) از پیام‌های قدیمی یک گفتگو که از جدول Message حذف شده‌اند.
+    فایل از چند عضو gzip مستقل (block) ساخته شده؛ blocks = [[first_id, offset, length], ...]
+    تا برای صفحه‌بندی فقط همان block خوانده و باز شود.
+    """
+    conversation = models.ForeignKey(Conversation, related_name="archive_segments", on_delete=models.CASCADE)
+    path = models.CharField(max_length=255)  # نسبت به CHAT_ARCHIVE_ROOT
+    first_id = models.BigIntegerField()
+    last_id = models.BigIntegerField()
+    first_at = models.DateTimeField()
+    last_at = models.DateTimeField()
+    count = models.PositiveIntegerField()
+    size = models.PositiveIntegerField(default=0)  # بایت
+    blocks = models.JSONField(default=list)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["conversation", "first_id"]
+        indexes = [models.Index(fields=["conversation", "last_id"], name="chat_seg_conv_last_idx")]
+
+    def __str__(self):
+        return self.path
+
+
+# درج تکی (Message.objects.create)؛ مسیر bulk_create خودش record_messages را صدا می‌زند
+@receiver(post_save, sender=Message)
+def update_conversation_summary(sender, instance, created, **kwargs):
+    if created:
+        Conversation.record_messages([instance])
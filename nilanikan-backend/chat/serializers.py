@@ -16,24 +16,40 @@ class MessageSerializer(serializers.ModelSerializer):
         fields = ['id', 'sender', 'text', 'created_at']
         read_only_fields = ['id', 'created_at']
 
+CONVERSATION_DETAIL_MESSAGES = 50
+
+
 class ConversationSerializer(serializers.ModelSerializer):
-    messages = MessageSerializer(many=True, read_only=True)
-    message_count = serializers.SerializerMethodField()
+    """
+    خلاصهٔ گفتگو از فیلدهای دنرمال‌شده (بدون خواندن جدول پیام‌ها)؛
+    last_message فقط متن کوتاه و زمان آخرین پیام است، تاریخچه از /messages/ با صفحه‌بندی.
+    """
     last_message = serializers.SerializerMethodField()
-    
+
     class Meta:
         model = Conversation
-        fields = ['id', 'room', 'created_at', 'messages', 'message_count', 'last_message']
-        read_only_fields = ['id', 'created_at']
-    
-    def get_message_count(self, obj):
-        return obj.messages.count()
-    
+        fields = ['id', 'room', 'created_at', 'message_count', 'last_message', 'last_message_at', 'last_message_preview']
+        read_only_fields = ['id', 'created_at', 'message_count', 'last_message_at', 'last_message_preview']
+
     def get_last_message(self, obj):
-        last_msg = obj.messages.last()
-        if last_msg:
-            return MessageSerializer(last_msg).data
-        return None
+        if obj.last_message_at is None:
+            return None
+        return {
+            'text': obj.last_message_preview,
+            'created_at': serializers.DateTimeField().to_representation(obj.last_message_at),
+        }
+
+
+class ConversationDetailSerializer(ConversationSerializer):
+    """جزئیات یک گفتگو: به‌علاوهٔ آخرین CONVERSATION_DETAIL_MESSAGES پیام به ترتیب زمان"""
+    messages = serializers.SerializerMethodField()
+
+    class Meta(ConversationSerializer.Meta):
+        fields = ConversationSerializer.Meta.fields + ['messages']
+
+    def get_messages(self, obj):
+        recent = obj.messages.select_related('sender').order_by('-created_at', '-id')[:CONVERSATION_DETAIL_MESSAGES]
+        return MessageSerializer(reversed(list(recent)), many=True).data
 
 class SendMessageSerializer(serializers.Serializer):
     message = serializers.CharField(max_length=1000)
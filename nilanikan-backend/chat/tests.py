@@ -0,0 +1,234 @@
+import asyncio
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from chat import archive, buffer, throttle
+from chat.buffer import MessageWriteBuffer
+from chat.models import Conversation, Message
+from chat.routing import websocket_urlpatterns
+
+
+class FakeLayer:
+    def __init__(self):
+        self.sent = []
+
+    async def group_send(self, group, message):
+        self.sent.append((group, message))
+
+
+class MessageWriteBufferTests(TransactionTestCase):
+    def setUp(self):
+        self.conversation = Conversation.objects.create(room="buffer-test")
+        self.layer = FakeLayer()
+        patcher = mock.patch.object(buffer, "get_channel_layer", return_value=self.layer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def add(self, buf, *texts):
+        for text in texts:
+            buf.add(Message(conversation_id=self.conversation.pk, text=text), "chat_buffer-test", f"tmp-{text}")
+
+    def saved_texts(self):
+        return list(Message.objects.order_by("id").values_list("text", flat=True))
+
+    def test_flush_persists_and_announces_ids(self):
+        async def run():
+            buf = MessageWriteBuffer(max_batch=100, max_delay_ms=1000)
+            self.add(buf, "a", "b")
+            await buf.flush()
+            return buf
+
+        buf = async_to_sync(run)()
+
+        self.assertEqual(self.saved_texts(), ["a", "b"])
+        self.assertEqual(buf.flushed, 2)
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.message_count, 2)
+        self.assertEqual(self.conversation.last_message_preview, "b")
+        group, event = self.layer.sent[0]
+        self.assertEqual(group, "chat_buffer-test")
+        self.assertEqual(set(event["ids"]), {"tmp-a", "tmp-b"})
+
+    def test_flush_keeps_receive_time(self):
+        received = timezone.now() - timedelta(seconds=5)
+
+        async def run():
+            buf = MessageWriteBuffer(max_batch=100, max_delay_ms=1000)
+            buf.add(Message(conversation_id=self.conversation.pk, text="a", created_at=received), "chat_buffer-test", "t")
+            await buf.flush()
+
+        async_to_sync(run)()
+        self.assertEqual(Message.objects.get().created_at, received)
+
+    def test_full_batch_flushes_without_waiting_for_timer(self):
+        async def run():
+            buf = MessageWriteBuffer(max_batch=2, max_delay_ms=60_000)
+            self.add(buf, "a", "b")
+            for _ in range(50):
+                if buf.flushed:
+                    break
+                await asyncio.sleep(0.01)
+
+        async_to_sync(run)()
+        self.assertEqual(self.saved_texts(), ["a", "b"])
+
+    def test_failed_flush_is_requeued_and_retried(self):
+        real_persist = buffer._persist
+        calls = []
+
+        def flaky(messages):
+            calls.append(len(messages))
+            if len(calls) == 1:
+                raise RuntimeError("database is down")
+            return real_persist(messages)
+
+        async def run():
+            buf = MessageWriteBuffer(max_batch=100, max_delay_ms=1000)
+            self.add(buf, "a", "b")
+            with self.assertLogs("chat.buffer", "ERROR"):
+                await buf.flush()
+            after_failure = (buf.failures, [t for _m, t in buf.pending_for(self.conversation.pk)])
+            self.add(buf, "c")
+            await buf.flush()
+            return buf, after_failure
+
+        with mock.patch.object(buffer, "_persist", flaky):
+            buf, (failures, pending) = async_to_sync(run)()
+
+        self.assertEqual(failures, 1)
+        self.assertEqual(pending, ["tmp-a", "tmp-b"])
+        # دستهٔ شکست‌خورده جلوتر از پیام جدید و به همان ترتیب ذخیره می‌شود
+        self.assertEqual(self.saved_texts(), ["a", "b", "c"])
+        self.assertEqual(buf.failures, 0)
+        self.assertEqual(buf.failed_flushes, 1)
+
+    def test_requeue_drops_oldest_beyond_max_pending(self):
+        async def run():
+            buf = MessageWriteBuffer(max_batch=100, max_delay_ms=1000, max_pending=3)
+            self.add(buf, "a", "b", "c", "d")
+            with self.assertLogs("chat.buffer", "ERROR") as logs:
+                await buf.flush()
+            return buf, logs.output
+
+        with mock.patch.object(buffer, "_persist", side_effect=RuntimeError("down")):
+            buf, output = async_to_sync(run)()
+
+        self.assertEqual(buf.dropped, 1)
+        self.assertEqual([t for _m, t in buf.pending_for(self.conversation.pk)], ["tmp-b", "tmp-c", "tmp-d"])
+        self.assertTrue(any("dropped 1" in line for line in output))
+        self.assertEqual(self.saved_texts(), [])
+
+    def test_in_flight_batch_is_visible_to_replay(self):
+        real_persist = buffer._persist
+        seen = []
+
+        async def run():
+            buf = MessageWriteBuffer(max_batch=100, max_delay_ms=1000)
+
+            def persist(messages):
+                seen.extend(t for _m, t in buf.pending_for(self.conversation.pk))
+                return real_persist(messages)
+
+            self.add(buf, "a")
+            with mock.patch.object(buffer, "_persist", persist):
+                await buf.flush()
+            return buf
+
+        buf = async_to_sync(run)()
+
+        self.assertEqual(seen, ["tmp-a"])
+        self.assertEqual(buf.pending_for(self.conversation.pk), [])
+
+
+class GuestThrottleTests(TransactionTestCase):
+    def setUp(self):
+        throttle._buckets.clear()
+        self.addCleanup(throttle._buckets.clear)
+        # بدون refill و burst دو پیام تا نتیجه به زمان اجرای تست وابسته نباشد
+        patcher = mock.patch.object(throttle.TokenBucket.__init__, "__defaults__", (0, 2))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def send(self, ip, count, room="guest-room"):
+        """count پیام از یک اتصال تازهٔ مهمان؛ خروجی: تعداد پاسخ‌های rate_limited"""
+        async def run():
+            comm = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f"/ws/chat/{room}/")
+            comm.scope["client"] = (ip, 50000)
+            connected, _ = await comm.connect()
+            self.assertTrue(connected)
+            limited = 0
+            for i in range(count):
+                await comm.send_json_to({"message": f"m{i}"})
+            while not await comm.receive_nothing(timeout=0.2):
+                frame = await comm.receive_json_from()
+                limited += frame.get("error") == "rate_limited"
+            await comm.disconnect()
+            return limited
+
+        return async_to_sync(run)()
+
+    def test_reconnecting_guest_keeps_bucket(self):
+        self.assertEqual(self.send("10.0.0.1", 3), 1)
+        self.assertEqual(self.send("10.0.0.1", 1), 1)
+
+    def test_guests_are_separated_by_ip_and_room(self):
+        self.assertEqual(self.send("10.0.0.1", 2), 0)
+        self.assertEqual(self.send("10.0.0.2", 2), 0)
+        self.assertEqual(self.send("10.0.0.1", 2, room="other-room"), 0)
+
+
+class ArchivePaginationTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        override = override_settings(CHAT_ARCHIVE_ROOT=tmp.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.conversation = Conversation.objects.create(room="archived")
+        old = timezone.now() - timedelta(days=400)
+        self.ids = [
+            Message.objects.create(
+                conversation=self.conversation, text=f"m{i}", created_at=old if i < 3 else timezone.now(),
+            ).id
+            for i in range(5)
+        ]
+        archived = archive.archive_conversation(self.conversation, timezone.now() - timedelta(days=1), block_size=2)
+        self.assertEqual(archived, 3)
+
+    def page(self, url):
+        res = self.client.get(url, HTTP_HOST="localhost")
+        self.assertEqual(res.status_code, 200)
+        return res.json()
+
+    def test_segment_round_trip(self):
+        self.assertFalse(Message.objects.filter(id__in=self.ids[:3]).exists())
+
+        records, more = archive.read_before(self.conversation.id, None, 2)
+        self.assertEqual(([r["id"] for r in records], more), (self.ids[1:3], True))
+        self.assertEqual(records[0]["text"], "m1")
+
+        records, more = archive.read_before(self.conversation.id, self.ids[1], 5)
+        self.assertEqual(([r["id"] for r in records], more), (self.ids[:1], False))
+
+    def test_full_live_page_continues_into_archive(self):
+        page = self.page("/api/chat/conversations/archived/messages/?limit=2")
+        self.assertEqual([m["id"] for m in page["results"]], self.ids[3:])
+        self.assertTrue(page["has_more"])
+        self.assertEqual(page["next_before"], self.ids[3])
+
+        page = self.page(f"/api/chat/conversations/archived/messages/?limit=2&before={page['next_before']}")
+        self.assertEqual([m["id"] for m in page["results"]], self.ids[1:3])
+        self.assertTrue(page["has_more"])
+
+        page = self.page(f"/api/chat/conversations/archived/messages/?limit=2&before={page['next_before']}")
+        self.assertEqual([m["id"] for m in page["results"]], self.ids[:1])
+        self.assertFalse(page["has_more"])
+        self.assertIsNone(page["next"])
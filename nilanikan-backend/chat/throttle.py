@@ -0,0 +1,51 @@
+# chat/throttle.py
+"""
+محدودیت نرخ پیام به ازای هر فرستنده (token bucket، درون پروسه).
+کاربر واردشده: کلید = user id (مشترک بین همهٔ اتصال‌هایش)؛ مهمان: کلید = IP + اتاق.
+سطل‌ها با قطع اتصال پاک نمی‌شوند؛ وقتی تعدادشان به MAX_BUCKETS برسد سطل‌های پرشده حذف می‌شوند.
+"""
+import time
+
+from django.conf import settings
+
+CHAT_RATE_PER_SEC = getattr(settings, "CHAT_RATE_PER_SEC", 5)
+CHAT_RATE_BURST = getattr(settings, "CHAT_RATE_BURST", 10)
+MAX_BUCKETS = 10000
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate=CHAT_RATE_PER_SEC, capacity=CHAT_RATE_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self):
+        """(allowed, retry_after_seconds)"""
+        now = time.monotonic()
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True, 0.0
+        return False, (1 - self.tokens) / self.rate if self.rate else 1.0
+
+
+_buckets = {}
+
+
+def allow(key):
+    bucket = _buckets.get(key)
+    if bucket is None:
+        if len(_buckets) >= MAX_BUCKETS:
+            # حذف سطل‌های پرشده (فرستنده‌های غیرفعال)
+            now = time.monotonic()
+            for k in [k for k, b in _buckets.items() if b.tokens + (now - b.updated) * b.rate >= b.capacity]:
+                del _buckets[k]
+        bucket = _buckets[key] = TokenBucket()
+    return bucket.take()
@@ -1,37 +1,103 @@
 # chat/views.py
 from rest_framework import generics, status
+from rest_framework.pagination import BasePagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.permissions import AllowAny
 from django.contrib.auth.models import User
+from django.db.models import F, Q
 from django.shortcuts import get_object_or_404
+from . import archive
 from .models import Conversation, Message
-from .serializers import ConversationSerializer, MessageSerializer, SendMessageSerializer
+from .serializers import ConversationDetailSerializer, ConversationSerializer, MessageSerializer, SendMessageSerializer
 import json
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 
+RECENT_FIRST = (F('last_message_at').desc(nulls_last=True), '-created_at')
+
+
+class MessageCursorPagination(BasePagination):
+    """
+    صفحه‌بندی keyset تاریخچهٔ پیام: ?before=<id>&limit=<n>
+    جدیدترین پیام‌های قبل از before (بدون OFFSET/COUNT)، در خروجی به ترتیب زمانی صعودی.
+    وقتی دادهٔ زنده تمام شود، ادامه از فایل‌های آرشیو (chat.archive) خوانده می‌شود؛
+    پیام‌های آرشیوشده همه از پیام‌های زنده قدیمی‌ترند.
+    """
+    page_size = 50
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        try:
+            limit = int(request.query_params.get('limit') or self.page_size)
+        except ValueError:
+            limit = self.page_size
+        limit = max(1, min(limit, self.max_page_size))
+
+        before = request.query_params.get('before')
+        archive_before = None
+        if before and before.isdigit():
+            before = int(before)
+            anchor = queryset.filter(id=before).values_list('created_at', flat=True).first()
+            if anchor is not None:
+                queryset = queryset.filter(Q(created_at__lt=anchor) | Q(created_at=anchor, id__lt=before))
+            else:
+                # before در جدول نیست (آرشیو یا حذف شده)
+                queryset = queryset.filter(id__lt=before)
+                archive_before = before
+
+        rows = list(queryset.order_by('-created_at', '-id')[:limit + 1])
+        self.has_more = len(rows) > limit
+        rows = rows[:limit]
+        rows.reverse()
+
+        conversation = getattr(view, 'conversation', None)
+        if not self.has_more and conversation is not None:
+            if len(rows) < limit:
+                records, self.has_more = archive.read_before(conversation.id, archive_before, limit - len(rows))
+                rows = archive.to_messages(conversation.id, records) + rows
+            else:
+                # صفحهٔ زنده دقیقاً پر شد و دادهٔ زنده تمام است؛ ادامه فقط در آرشیو
+                self.has_more = archive.has_before(conversation.id, archive_before)
+        self.next_before = rows[0].id if (rows and self.has_more) else None
+        return rows
+
+    def get_paginated_response(self, data):
+        next_url = None
+        if self.next_before is not None:
+            next_url = replace_query_param(self.request.build_absolute_uri(), 'before', self.next_before)
+        return Response({
+            'next': next_url,
+            'next_before': self.next_before,
+            'has_more': self.has_more,
+            'results': data,
+        })
+
+
 class ConversationListView(generics.ListCreateAPIView):
     """لیست گفتگوها یا ایجاد گفتگوی جدید"""
-    queryset = Conversation.objects.all().order_by('-created_at')
+    queryset = Conversation.objects.all().order_by(*RECENT_FIRST)
     serializer_class = ConversationSerializer
     permission_classes = [AllowAny]
 
 class ConversationDetailView(generics.RetrieveAPIView):
     """جزئیات یک گفتگو"""
     queryset = Conversation.objects.all()
-    serializer_class = ConversationSerializer
+    serializer_class = ConversationDetailSerializer
     permission_classes = [AllowAny]
     lookup_field = 'room'
 
 class MessageListView(generics.ListAPIView):
-    """لیست پیام‌های یک گفتگو"""
+    """لیست پیام‌های یک گفتگو (?before=<id>&limit=<n>)؛ بعد از دادهٔ زنده، از آرشیو"""
     serializer_class = MessageSerializer
     permission_classes = [AllowAny]
+    pagination_class = MessageCursorPagination
     
     def get_queryset(self):
         room = self.kwargs['room']
-        conversation = get_object_or_404(Conversation, room=room)
-        return Message.objects.filter(conversation=conversation).order_by('created_at')
+        self.conversation = get_object_or_404(Conversation, room=room)
+        return Message.objects.filter(conversation=self.conversation).select_related('sender')
 
 class SendMessageView(generics.CreateAPIView):
     """ارسال پیام جدید"""
@@ -97,4 +163,4 @@ class ChatHistoryView(generics.ListAPIView):
     permission_classes = [AllowAny]  # در production باید IsAdminUser باشد
     
     def get_queryset(self):
-        return Conversation.objects.prefetch_related('messages__sender').order_by('-created_at')
+        return Conversation.objects.order_by(*RECENT_FIRST)
@@ -0,0 +1,104 @@
+# core/utils/schedule.py
+"""
+محتوای زمان‌بندی‌شده (اسلاید/بنر/استوری با starts_at/ends_at):
+
+- window_q(now): شرط «الان نمایش داده شود» (بازهٔ خالی = همیشه)
+- scheduled(queryset, name): آیتم‌های فعالِ الانِ queryset از کش؛ عمر کش دقیقاً تا
+  نزدیک‌ترین starts_at/ends_at آینده است (حداکثر SCHEDULE_CACHE_MAX_TTL) تا شروع/پایان
+  کمپین بدون دست زدن به ادمین و بدون query در هر درخواست اعمال شود.
+- invalidate_on_change(*models): ذخیره/حذف هر ردیف، کش همان مدل را باطل می‌کند (نسخهٔ کلید).
+  با کش مشترک (Redis) در همهٔ پروسه‌ها؛ با LocMem پروسه‌های دیگر حداکثر تا MAX_TTL قدیمی می‌مانند.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Min, Q
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from rest_framework.response import Response
+
+SCHEDULE_CACHE_MAX_TTL = getattr(settings, "SCHEDULE_CACHE_MAX_TTL", 300)
+
+
+def window_q(now=None) -> Q:
+    now = now or timezone.now()
+    return (Q(starts_at__isnull=True) | Q(starts_at__lte=now)) & (Q(ends_at__isnull=True) | Q(ends_at__gt=now))
+
+
+def next_boundary(queryset, now):
+    """نزدیک‌ترین زمان آینده‌ای که مجموعهٔ فعال queryset عوض می‌شود (یا None)"""
+    bounds = queryset.order_by().aggregate(
+        start=Min("starts_at", filter=Q(starts_at__gt=now)),
+        end=Min("ends_at", filter=Q(ends_at__gt=now)),
+    )
+    candidates = [b for b in bounds.values() if b is not None]
+    return min(candidates) if candidates else None
+
+
+def _generation_key(label: str) -> str:
+    return f"schedule:gen:{label}"
+
+
+def scheduled(queryset, name: str, *, limit=None) -> list:
+    """
+    queryset: مجموعهٔ پایه (فیلتر is_active و ترتیب با فراخوان، بدون برش)؛ خروجی لیست آیتم‌های فعال.
+    name: برای جدا کردن کش فراخوان‌های مختلفِ یک مدل؛ هر queryset متفاوت (ترتیب/فیلتر) نام یکتای
+    خودش را لازم دارد، وگرنه نتیجهٔ یکی به دیگری داده می‌شود.
+    """
+    label = queryset.model._meta.label_lower
+    generation = cache.get(_generation_key(label), 0)
+    key = f"schedule:{label}:{name}:{limit or 0}:{generation}"
+    now = timezone.now()
+
+    entry = cache.get(key)
+    if entry is not None and (entry["until"] is None or now < entry["until"]):
+        return entry["items"]
+
+    active = queryset.filter(window_q(now))
+    items = list(active[:limit] if limit else active)
+    until = next_boundary(queryset, now)
+    ttl = SCHEDULE_CACHE_MAX_TTL
+    if until is not None:
+        ttl = min(ttl, max(1, math.ceil((until - now).total_seconds())))
+    cache.set(key, {"items": items, "until": until}, ttl)
+    return items
+
+
+def invalidate(model):
+    cache.set(_generation_key(model._meta.label_lower), time.time_ns(), None)
+
+
+def invalidate_on_change(*models):
+    for model in models:
+        uid = f"schedule-invalidate-{model._meta.label_lower}"
+        handler = lambda sender, **kwargs: invalidate(sender)  # noqa: E731
+        post_save.connect(handler, sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(handler, sender=model, weak=False, dispatch_uid=uid)
+
+
+class ScheduledListMixin:
+    """
+    برای ReadOnlyModelViewSet: لیست از scheduled() (کش تا مرز بعدی)،
+    جزئیات فقط برای آیتم‌هایی که الان در بازهٔ نمایش‌اند.
+    اگر filter_backends درخواست را فیلتر/مرتب کنند (queryset تازه برگردانند)، لیست بدون کش
+    از همان queryset فیلترشده ساخته می‌شود.
+    """
+    schedule_limit = None
+
+    def get_queryset(self):
+        return super().get_queryset().filter(window_q())
+
+    def list(self, request, *args, **kwargs):
+        base = super().get_queryset()
+        filtered = self.filter_queryset(base)
+        if filtered is base:
+            items = scheduled(base, f"{type(self).__module__}.{type(self).__name__}", limit=self.schedule_limit)
+        else:
+            active = filtered.filter(window_q())
+            items = list(active[:self.schedule_limit] if self.schedule_limit else active)
+        page = self.paginate_queryset(items)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(items, many=True).data)
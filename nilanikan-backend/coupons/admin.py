@@ -1,6 +1,12 @@
 from django.contrib import admin
-from .models import Coupon
+from .models import Coupon, CouponRedemption
 @admin.register(Coupon)
 class CouponAdmin(admin.ModelAdmin):
-    list_display = ('code','percent_off','max_uses','used','active','starts_at','ends_at')
+    list_display = ('code','percent_off','max_uses','used','active','once_per_customer','starts_at','ends_at')
     search_fields = ('code',)
+
+@admin.register(CouponRedemption)
+class CouponRedemptionAdmin(admin.ModelAdmin):
+    list_display = ('id','coupon','user','customer','order','discount_amount','created_at')
+    search_fields = ('coupon__code','user__username','customer','order__id')
+    raw_id_fields = ('coupon','user','order')
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.14 on 2026-10-19 15:49
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Coupon',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=40, unique=True)),
+                ('percent_off', models.PositiveIntegerField(default=0)),
+                ('max_uses', models.PositiveIntegerField(default=0)),
+                ('used', models.PositiveIntegerField(default=0)),
+                ('active', models.BooleanField(default=True)),
+                ('starts_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('ends_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.14 on 2026-10-19 15:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('orders', '0009_order_discount_amount'),
+        ('coupons', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CouponRedemption',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('discount_amount', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='coupon',
+            index=models.Index(django.db.models.functions.text.Upper('code'), name='coupon_code_upper_idx'),
+        ),
+        migrations.AddField(
+            model_name='couponredemption',
+            name='coupon',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='redemptions', to='coupons.coupon'),
+        ),
+        migrations.AddField(
+            model_name='couponredemption',
+            name='order',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='coupon_redemption', to='orders.order'),
+        ),
+        migrations.AddField(
+            model_name='couponredemption',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='coupon_redemptions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='couponredemption',
+            constraint=models.UniqueConstraint(fields=('coupon', 'user'), name='uq_coupon_redemption_user'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.14 on 2026-10-19 16:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coupons', '0002_couponredemption_coupon_coupon_code_upper_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='couponredemption',
+            name='customer',
+            field=models.CharField(blank=True, default='', max_length=120),
+        ),
+        migrations.AddConstraint(
+            model_name='couponredemption',
+            constraint=models.UniqueConstraint(condition=models.Q(('customer', ''), _negated=True), fields=('coupon', 'customer'), name='uq_coupon_redemption_customer'),
+        ),
+    ]
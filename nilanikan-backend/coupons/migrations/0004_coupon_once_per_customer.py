@@ -0,0 +1,39 @@
+# Generated by Django 4.2.14 on 2026-10-19 16:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coupons', '0003_couponredemption_customer'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='couponredemption',
+            name='uq_coupon_redemption_user',
+        ),
+        migrations.RemoveConstraint(
+            model_name='couponredemption',
+            name='uq_coupon_redemption_customer',
+        ),
+        migrations.AddField(
+            model_name='coupon',
+            name='once_per_customer',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='couponredemption',
+            name='per_customer',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddConstraint(
+            model_name='couponredemption',
+            constraint=models.UniqueConstraint(condition=models.Q(('per_customer', True)), fields=('coupon', 'user'), name='uq_coupon_redemption_user'),
+        ),
+        migrations.AddConstraint(
+            model_name='couponredemption',
+            constraint=models.UniqueConstraint(condition=models.Q(('per_customer', True), models.Q(('customer', ''), _negated=True)), fields=('coupon', 'customer'), name='uq_coupon_redemption_customer'),
+        ),
+    ]
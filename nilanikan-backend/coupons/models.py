@@ -1,6 +1,27 @@
-from django.db import models
+import re
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Upper
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 
+COUPON_CACHE_TTL = 300        # ثانیه
+COUPON_MISS_CACHE_TTL = 30    # کد نامعتبر کوتاه‌تر کش می‌شود
+# فقط فیلدهای ثابت کش می‌شوند؛ used و active همیشه از دیتابیس خوانده می‌شوند
+COUPON_CACHED_FIELDS = ("id", "code", "percent_off", "max_uses", "starts_at", "ends_at", "once_per_customer")
+
+
+class CouponError(Exception):
+    def __init__(self, code: str):
+        super().__init__(code)
+        self.code = code
+
+
 class Coupon(models.Model):
     code = models.CharField(max_length=40, unique=True)
     percent_off = models.PositiveIntegerField(default=0)  # 0-100
@@ -9,14 +30,131 @@ class Coupon(models.Model):
     active = models.BooleanField(default=True)
     starts_at = models.DateTimeField(default=timezone.now)
     ends_at = models.DateTimeField(blank=True, null=True)
+    # هر مشتری (کاربر یا تلفن/ایمیل مهمان) فقط یک بار؛ در غیر این صورت فقط max_uses محدود می‌کند
+    once_per_customer = models.BooleanField(default=False)
+
+    class Meta:
+        # جست‌وجوی code__iexact در PostgreSQL به شکل UPPER(code) = UPPER(%s) است
+        indexes = [models.Index(Upper("code"), name="coupon_code_upper_idx")]
 
     def __str__(self):
         return self.code
 
+    @classmethod
+    def from_cache(cls, data: dict):
+        """نمونه از فیلدهای کش‌شده؛ used/active deferred می‌مانند تا با دسترسی از دیتابیس خوانده شوند"""
+        names = [f.attname for f in cls._meta.concrete_fields if f.attname in data]
+        return cls.from_db(None, names, [data[n] for n in names])
+
     def is_valid(self):
+        if self.get_deferred_fields() & {"active", "used"}:
+            self.refresh_from_db(fields=["active", "used"])
         now = timezone.now()
         if not self.active: return False
         if self.starts_at and now < self.starts_at: return False
         if self.ends_at and now > self.ends_at: return False
         if self.max_uses and self.used >= self.max_uses: return False
         return True
+
+    def discount_for(self, subtotal) -> Decimal:
+        percent = min(int(self.percent_off or 0), 100)
+        amount = Decimal(subtotal or 0) * Decimal(percent) / Decimal(100)
+        return amount.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+    def redeem(self, *, order, user=None, customer="", discount_amount=Decimal("0")):
+        """
+        مصرف اتمیک کوپن:
+        UPDATE used = used + 1 WHERE فعال و در بازهٔ زمانی و (max_uses = 0 یا used < max_uses)
+        و ثبت ردیف CouponRedemption در همان تراکنش؛ با once_per_customer هر کاربر و هر مشتری
+        (تلفن/ایمیل) فقط یک بار. شرط‌ها روی خود ردیف دیتابیس سنجیده می‌شوند، نه مقادیر کش‌شده.
+        در صورت شکست CouponError برمی‌گرداند و شمارنده برگشت می‌خورد.
+        """
+        if self.once_per_customer and user is None and not customer:
+            raise CouponError("COUPON_CUSTOMER_REQUIRED")
+        now = timezone.now()
+        available = (
+            Q(pk=self.pk, active=True, starts_at__lte=now)
+            & (Q(ends_at__isnull=True) | Q(ends_at__gte=now))
+            & (Q(max_uses=0) | Q(used__lt=F("max_uses")))
+        )
+        try:
+            with transaction.atomic():
+                if not Coupon.objects.filter(available).update(used=F("used") + 1):
+                    raise CouponError("COUPON_UNAVAILABLE")
+                redemption = CouponRedemption.objects.create(
+                    coupon=self, user=user, customer=customer, order=order, discount_amount=discount_amount,
+                    per_customer=self.once_per_customer,
+                )
+        except IntegrityError:
+            raise CouponError("COUPON_ALREADY_USED")
+        return redemption
+
+
+class CouponRedemption(models.Model):
+    """هر ردیف = یک بار استفاده از کوپن در یک سفارش (user خالی = مهمان)"""
+    coupon = models.ForeignKey(Coupon, on_delete=models.CASCADE, related_name="redemptions")
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, null=True, blank=True, related_name="coupon_redemptions"
+    )
+    # کلید مشتری از تلفن/ایمیل (customer_key)؛ محدودیت «یک بار برای هر نفر» برای مهمان‌ها هم
+    customer = models.CharField(max_length=120, blank=True, default="")
+    # کپی once_per_customer کوپن در لحظهٔ مصرف؛ قیدهای یکتایی فقط روی این ردیف‌ها اعمال می‌شوند
+    per_customer = models.BooleanField(default=False)
+    order = models.OneToOneField("orders.Order", on_delete=models.CASCADE, related_name="coupon_redemption")
+    discount_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # NULLها یکتا حساب نمی‌شوند؛ محدودیت user فقط برای کاربران لاگین‌شده اعمال می‌شود
+            models.UniqueConstraint(
+                fields=["coupon", "user"],
+                condition=Q(per_customer=True),
+                name="uq_coupon_redemption_user",
+            ),
+            models.UniqueConstraint(
+                fields=["coupon", "customer"],
+                condition=Q(per_customer=True) & ~Q(customer=""),
+                name="uq_coupon_redemption_customer",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.coupon} → order #{self.order_id}"
+
+
+def customer_key(phone="", email="") -> str:
+    """
+    کلید یکتای مشتری برای محدودیت کوپن: ده رقم آخر موبایل (0912…، +98912… و 98912… یکی‌اند)،
+    وگرنه ایمیل با حروف کوچک؛ بدون هیچ‌کدام رشتهٔ خالی.
+    """
+    digits = re.sub(r"\D", "", str(phone or ""))
+    if len(digits) >= 10:
+        return f"phone:{digits[-10:]}"
+    email = str(email or "").strip().lower()
+    return f"email:{email}"[:120] if email else ""
+
+
+# -------------------------------
+# Lookup کش‌شده (بدون حساسیت به حروف بزرگ/کوچک)
+# -------------------------------
+def coupon_cache_key(code: str) -> str:
+    return f"coupon:{(code or '').strip().upper()}"
+
+
+def get_coupon(code: str):
+    code = (code or "").strip()
+    if not code:
+        return None
+    key = coupon_cache_key(code)
+    cached = cache.get(key)
+    if cached is None:
+        cached = Coupon.objects.filter(code__iexact=code).values(*COUPON_CACHED_FIELDS).first() or False
+        cache.set(key, cached, COUPON_CACHE_TTL if cached else COUPON_MISS_CACHE_TTL)
+    return Coupon.from_cache(cached) if cached else None
+
+
+@receiver(post_save, sender=Coupon)
+@receiver(post_delete, sender=Coupon)
+def invalidate_coupon_cache(sender, instance, **kwargs):
+    cache.delete(coupon_cache_key(instance.code))
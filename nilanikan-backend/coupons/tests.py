@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from catalog.models import Category, Product
+from coupons.models import Coupon, CouponRedemption, get_coupon
+
+
+class CouponTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.guest = User.objects.create_user(username="guest")
+        cls.user = User.objects.create_user(username="ali", password="x")
+        category = Category.objects.create(name="c", slug="c")
+        cls.product = Product.objects.create(name="p", slug="p", sku="p-1", category=category, price=100)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient(HTTP_HOST="localhost")
+
+    def checkout(self, code, **body):
+        body.setdefault("cart", [{"product_id": self.product.pk, "qty": 1}])
+        body.setdefault("shipping_address", {"line1": "تهران"})
+        with self.settings(GUEST_USER_ID=self.guest.pk):
+            return self.client.post("/api/orders/checkout/", {"coupon": code, **body}, format="json")
+
+    def test_cache_does_not_hold_usage_counters(self):
+        coupon = Coupon.objects.create(code="TEN", percent_off=10, max_uses=1)
+        self.assertTrue(get_coupon("ten").is_valid())
+
+        # update گروهی سیگنال ندارد و کش باطل نمی‌شود؛ used با این حال تازه خوانده می‌شود
+        Coupon.objects.filter(pk=coupon.pk).update(used=1)
+        cached = get_coupon("TEN")
+        self.assertEqual(cached.percent_off, 10)
+        self.assertFalse(cached.is_valid())
+
+        Coupon.objects.filter(pk=coupon.pk).update(used=0, active=False)
+        self.assertFalse(get_coupon("TEN").is_valid())
+
+    def test_plain_coupon_can_be_reused_by_same_user(self):
+        Coupon.objects.create(code="ALL", percent_off=10)
+        self.client.force_authenticate(self.user)
+
+        for _ in range(2):
+            res = self.checkout("ALL")
+            self.assertEqual(res.status_code, 201, res.data)
+            self.assertEqual(res.data["discount_amount"], 10)
+
+        self.assertEqual(Coupon.objects.get(code="ALL").used, 2)
+
+    def test_once_per_customer_coupon(self):
+        Coupon.objects.create(code="ONCE", percent_off=10, once_per_customer=True)
+        self.client.force_authenticate(self.user)
+
+        self.assertEqual(self.checkout("ONCE").status_code, 201)
+        res = self.checkout("ONCE")
+
+        self.assertEqual(res.data["error"], "COUPON_ALREADY_USED")
+        self.assertEqual(Coupon.objects.get(code="ONCE").used, 1)
+        self.assertEqual(CouponRedemption.objects.count(), 1)
+
+    def test_once_per_customer_guest_is_keyed_by_phone(self):
+        Coupon.objects.create(code="ONCE", percent_off=10, once_per_customer=True)
+
+        self.assertEqual(self.checkout("ONCE").data["error"], "COUPON_CUSTOMER_REQUIRED")
+        self.assertEqual(self.checkout("ONCE", customer={"phone": "09121234567"}).status_code, 201)
+        res = self.checkout("ONCE", customer={"phone": "+989121234567"})
+        self.assertEqual(res.data["error"], "COUPON_ALREADY_USED")
+
+    def test_exhausted_coupon_is_rejected(self):
+        Coupon.objects.create(code="ONE", percent_off=10, max_uses=1)
+
+        self.assertEqual(self.checkout("ONE").status_code, 201)
+        self.assertEqual(self.checkout("ONE").data["error"], "COUPON_INVALID")
@@ -1,7 +1,7 @@
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import Coupon
+from .models import Coupon, get_coupon
 from .serializers import CouponSerializer
 
 class CouponViewSet(viewsets.ModelViewSet):
@@ -12,8 +12,7 @@ class CouponViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'], permission_classes=[permissions.AllowAny])
     def apply(self, request):
         code = request.data.get('code','').strip()
-        try:
-            coupon = Coupon.objects.get(code__iexact=code)
-        except Coupon.DoesNotExist:
+        coupon = get_coupon(code)
+        if coupon is None:
             return Response({'valid': False, 'detail': 'Invalid coupon'})
         return Response({'valid': coupon.is_valid(), 'percent_off': coupon.percent_off})
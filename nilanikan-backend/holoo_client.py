@@ -2,66 +2,289 @@
 holoo_client.py
 ماژول ساده برای اتصال به وب‌سرویس هلو (TncHolooWebService)
 
-- با HOLOO_ENABLED=false فقط پیام «Skipped» می‌دهد (برای تست بدون سرور هلو)
-- تابع holoo_login() توکن را می‌گیرد و کش می‌کند
+- با HOLOO_ENABLED=false فقط پیام «Skipped» لاگ می‌شود (برای تست بدون سرور هلو)
+- تابع holoo_login() توکن را می‌گیرد و کش می‌کند (با 401 دوباره لاگین می‌کند)
 - تابع holoo_request() هر endpoint را صدا می‌زند (GET / POST / PUT / DELETE)
+
+لایهٔ انتقال (HolooTransport):
+- یک requests.Session مشترک با connection pool و keep-alive
+- retry با backoff نمایی + jitter برای خطای شبکه و 429/502/503/504؛ POST (ثبت فاکتور) فقط
+  وقتی تکرار می‌شود که اتصال اصلاً برقرار نشده (درخواست به هلو نرسیده)
+- circuit breaker: بعد از چند شکست پیاپی، تا مدتی بدون تماس با هلو خطا می‌دهد
+- لاگ زمان هر درخواست روی logger «holoo»
 """
 
 from dotenv import load_dotenv, find_dotenv
+import logging
 import os
+import random
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Optional, Any, Dict
+from urllib3.exceptions import NewConnectionError
 
 load_dotenv(find_dotenv())
 
+logger = logging.getLogger("holoo")
+
 HOLOO_ENABLED = os.getenv("HOLOO_ENABLED", "false").lower() == "true"
 BASE  = os.getenv("HOLOO_ADDRESS")
 DB    = os.getenv("HOLOO_DBNAME")
 USR   = os.getenv("HOLOO_USERNAME")
 PWD64 = os.getenv("HOLOO_PASSWORD_BASE64")
 
-# متغیر برای نگهداری توکن بعد از اولین لاگین
-_cached_token: Optional[str] = None
+TIMEOUT = float(os.getenv("HOLOO_TIMEOUT", "20"))
+RETRY_STATUSES = (429, 502, 503, 504)
+NON_IDEMPOTENT_METHODS = frozenset({"POST", "PATCH"})
 
 
-def holoo_login() -> Optional[str]:
+class HolooError(RuntimeError):
+    pass
+
+
+class HolooUnavailable(HolooError):
+    """circuit breaker باز است؛ درخواست اصلاً به هلو فرستاده نشد."""
+
+
+class HolooOutcomeUnknown(HolooError):
+    """درخواست غیر idempotent فرستاده شد ولی پاسخی نرسید (timeout خواندن/قطع اتصال)؛ شاید در هلو ثبت شده باشد."""
+
+
+def _is_connect_error(exc: Exception) -> bool:
+    """خطا پیش از ارسال درخواست (اتصال برقرار نشد)؛ timeout خواندن یا قطع اتصال در میانهٔ پاسخ نیست"""
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    if isinstance(exc, requests.ConnectionError) and exc.args:
+        return isinstance(getattr(exc.args[0], "reason", None), NewConnectionError)
+    return False
+
+
+class CircuitBreaker:
     """
-    Login به وب‌سرویس هلو و برگرداندن توکن Bearer.
-    اگر HOLOO_ENABLED=false باشد، فقط پیام می‌دهد و None برمی‌گرداند.
+    closed → (threshold شکست پیاپی) → open → (بعد از reset_timeout) → half-open
+    در half-open فقط یک درخواست آزمایشی عبور می‌کند؛ موفقیت = closed، شکست = open.
     """
-    global _cached_token
 
-    if not HOLOO_ENABLED:
-        print("[Holoo] Skipped (HOLOO_ENABLED=false). Would call:", f"{BASE}/Login")
-        return None
+    def __init__(self, threshold: int = 5, reset_timeout: float = 30.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._probe:
+                self._probe = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probe = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe = False
+            if self.opened_at is not None or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+class HolooTransport:
+    def __init__(self, base: Optional[str], dbname: Optional[str], username: Optional[str],
+                 password_b64: Optional[str], *, enabled: bool = True, timeout: float = TIMEOUT,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 pool_size: int = 10, breaker: Optional[CircuitBreaker] = None):
+        self.base = (base or "").rstrip("/")
+        self.dbname = dbname
+        self.username = username
+        self.password_b64 = password_b64
+        self.enabled = enabled
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+
+        self._token: Optional[str] = None
+        self._token_lock = threading.Lock()
+
+    # ---------- helpers ----------
+    def _sleep_backoff(self, attempt: int):
+        # full jitter: عدد تصادفی بین 0 و سقف نمایی
+        cap = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        time.sleep(random.uniform(0, cap))
+
+    def _log(self, method: str, path: str, status, started: float, attempt: int):
+        ms = (time.monotonic() - started) * 1000
+        logger.info(
+            "holoo %s %s status=%s ms=%.1f attempt=%d", method, path, status, ms, attempt,
+            extra={"holoo_method": method, "holoo_path": path, "holoo_status": status,
+                   "holoo_ms": round(ms, 1), "holoo_attempt": attempt},
+        )
+
+    # ---------- login ----------
+    def login(self, force: bool = False) -> Optional[str]:
+        if not self.enabled:
+            logger.info("holoo skipped (HOLOO_ENABLED=false): %s/Login", self.base)
+            return None
+
+        with self._token_lock:
+            if self._token and not force:
+                return self._token
+
+            body = {
+                "userinfo": {
+                    "username": self.username,
+                    "userpass": self.password_b64,
+                    "dbname":   self.dbname,
+                }
+            }
+            started = time.monotonic()
+            r = self.session.post(f"{self.base}/Login", json=body, timeout=self.timeout)
+            self._log("POST", "/Login", r.status_code, started, 0)
+            r.raise_for_status()
+            data = r.json()
+
+            ok = str(data.get("Login", {}).get("State", "")).lower() == "true"
+            token = data.get("Login", {}).get("Token")
+            if not ok or not token:
+                err = data.get("Login", {}).get("Error") or "Login failed"
+                raise HolooError(f"[Holoo] {err}")
+
+            self._token = token
+            return token
+
+    # ---------- request ----------
+    def request(self, method: str, path: str, *, params: Dict[str, Any] = None,
+                data: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            logger.info("holoo skipped (%s) %s", method, path)
+            return None
+
+        if not self.breaker.allow():
+            raise HolooUnavailable(f"[Holoo] circuit open, skipping {method} {path}")
+
+        # هر فراخوانی دقیقاً یک نتیجه در breaker ثبت می‌کند؛ هر استثنا (لاگین، JSON خراب، SSL و ...)
+        # شکست است تا probe حالت half-open هیچ‌وقت باز نماند
+        healthy = False
+        try:
+            result = self._request_with_retries(method, path, params, data)
+            healthy = True
+            return result
+        except requests.HTTPError as e:
+            # خطای سمت کلاینت نشانهٔ از دسترس خارج بودن هلو نیست
+            healthy = e.response is not None and e.response.status_code < 500
+            raise
+        finally:
+            if healthy:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+
+    def _request_with_retries(self, method: str, path: str, params, data):
+        retry_unsent_only = method.upper() in NON_IDEMPOTENT_METHODS
+        relogged = False
+        last_error: Optional[Exception] = None
+        attempt = 0
+        while attempt <= self.max_retries:
+            started = time.monotonic()
+            sending = False
+            try:
+                token = self.login()
+                sending = True
+                r = self.session.request(
+                    method, f"{self.base}{path}",
+                    headers={"Authorization": token}, params=params, json=data, timeout=self.timeout,
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._log(method, path, type(e).__name__, started, attempt)
+                last_error = e
+                if retry_unsent_only and sending and not _is_connect_error(e):
+                    # ممکن است هلو درخواست را ثبت کرده باشد؛ تکرار = فاکتور تکراری
+                    raise HolooOutcomeUnknown(
+                        f"[Holoo] {method} {path} sent without a response (attempt {attempt + 1}): {e}"
+                    ) from e
+            else:
+                self._log(method, path, r.status_code, started, attempt)
+                if r.status_code == 401 and not relogged:
+                    # توکن منقضی شده؛ یک بار دوباره لاگین و بدون مکث تکرار
+                    relogged = True
+                    self.login(force=True)
+                    continue
+                if r.status_code not in RETRY_STATUSES:
+                    r.raise_for_status()
+                    return r.json()
+                last_error = requests.HTTPError(f"{r.status_code} for {method} {path}", response=r)
+                if retry_unsent_only:
+                    break
+
+            if attempt < self.max_retries:
+                self._sleep_backoff(attempt)
+            attempt += 1
 
-    # اگر قبلاً لاگین کرده‌ایم، همان توکن را برگردان
-    if _cached_token:
-        return _cached_token
+        raise HolooError(f"[Holoo] {method} {path} failed after {min(attempt + 1, self.max_retries + 1)} attempts: {last_error}")
 
-    url = f"{BASE}/Login"
-    body = {
-        "userinfo": {
-            "username": USR,
-            "userpass": PWD64,
-            "dbname":   DB
-        }
-    }
-    headers = {"Content-Type": "application/json"}
 
-    r = requests.post(url, json=body, headers=headers, timeout=20)
-    r.raise_for_status()
-    data = r.json()
+# ---- transport پیش‌فرض (از env) ----
+_transport: Optional[HolooTransport] = None
+_transport_lock = threading.Lock()
 
-    ok = str(data.get("Login", {}).get("State", "")).lower() == "true"
-    token = data.get("Login", {}).get("Token")
 
-    if not ok or not token:
-        err = data.get("Login", {}).get("Error") or "Login failed"
-        raise RuntimeError(f"[Holoo] {err}")
+def get_transport() -> HolooTransport:
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = HolooTransport(BASE, DB, USR, PWD64, enabled=HOLOO_ENABLED)
+    return _transport
 
-    _cached_token = token
-    return token
+
+def configure(**kwargs) -> HolooTransport:
+    """
+    جایگزینی transport پیش‌فرض (مثلاً برای شبیه‌ساز محلی):
+        configure(base="http://127.0.0.1:8766", enabled=True)
+    مقادیر داده‌نشده از env خوانده می‌شوند.
+    """
+    global _transport
+    opts = {"base": BASE, "dbname": DB, "username": USR, "password_b64": PWD64, "enabled": HOLOO_ENABLED}
+    opts.update(kwargs)
+    with _transport_lock:
+        _transport = HolooTransport(
+            opts.pop("base"), opts.pop("dbname"), opts.pop("username"), opts.pop("password_b64"), **opts
+        )
+    return _transport
+
+
+def holoo_login() -> Optional[str]:
+    """
+    Login به وب‌سرویس هلو و برگرداندن توکن Bearer.
+    اگر HOLOO_ENABLED=false باشد، فقط لاگ می‌کند و None برمی‌گرداند.
+    """
+    return get_transport().login()
 
 
 def holoo_request(method: str, path: str,
@@ -72,30 +295,7 @@ def holoo_request(method: str, path: str,
     مثال:
         holoo_request("GET", "/Product")
     """
-    if not HOLOO_ENABLED:
-        print(f"[Holoo] Skipped ({method}) {path}")
-        return None
-
-    token = holoo_login()
-    headers = {
-        "Authorization": token,
-        "Content-Type": "application/json"
-    }
-    url = f"{BASE}{path}"
-    r = requests.request(method, url, headers=headers, params=params, json=data, timeout=20)
-    r.raise_for_status()
-    return r.json()
-
-
-# ---- تست سریع وقتی مستقیم اجرا می‌شود ----
-if __name__ == "__main__":
-    print("HOLOO_ENABLED =", HOLOO_ENABLED)
-    t = holoo_login()
-    print("Token =", t)
-    if HOLOO_ENABLED:
-        # نمونه درخواست: لیست محصولات (وقتی سرور هلو در دسترس است)
-        products = holoo_request("GET", "/Product")
-        print("Products:", products)
+    return get_transport().request(method, path, params=params, data=data)
 
 
 def holoo_products(params=None):
@@ -108,7 +308,7 @@ def holoo_customers(params=None):
 def holoo_invoice_create(invoiceinfo: dict):
     """
     ثبت فاکتور فروش در هلو.
-    ساختار بدنه طبق مستند: POST {Address}/Invoice/Invoice  
+    ساختار بدنه طبق مستند: POST {Address}/Invoice/Invoice
     انتظار ورودی: دیکشنری invoiceinfo (ما آن را داخل آرایه می‌گذاریم).
     """
     payload = {"invoiceinfo": [invoiceinfo]}
@@ -120,4 +320,16 @@ def holoo_preinvoice_create(invoiceinfo: dict):
 
 def holoo_order_create(invoiceinfo: dict):
     payload = {"invoiceinfo": [invoiceinfo]}
-    return holoo_request("POST", "/Invoice/Order", data=payload)
\ No newline at end of file
+    return holoo_request("POST", "/Invoice/Order", data=payload)
+
+
+# ---- تست سریع وقتی مستقیم اجرا می‌شود ----
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print("HOLOO_ENABLED =", HOLOO_ENABLED)
+    t = holoo_login()
+    print("Token =", t)
+    if HOLOO_ENABLED:
+        # نمونه درخواست: لیست محصولات (وقتی سرور هلو در دسترس است)
+        products = holoo_request("GET", "/Product")
+        print("Products:", products)
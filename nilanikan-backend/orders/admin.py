@@ -1,5 +1,7 @@
-from django.contrib import admin
-from .models import CartItem, Order, OrderItem
+from django.contrib import admin, messages
+from django.utils import timezone
+
+from .models import CartItem, InvoiceOutbox, Order, OrderEvent, OrderItem
 
 
 @admin.register(CartItem)
@@ -12,25 +14,102 @@ class CartItemAdmin(admin.ModelAdmin):
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
-    fields = ("product", "price", "quantity")
+    fields = ("product", "product_name", "product_sku", "variant_label", "price", "quantity")
+    readonly_fields = ("product_name", "product_sku", "variant_label")
     extra = 0
     autocomplete_fields = ("product",)
 
 
+class OrderEventInline(admin.TabularInline):
+    model = OrderEvent
+    fields = ("created_at", "from_status", "to_status", "actor", "note")
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+def _transition_action(to_status):
+    def action(modeladmin, request, queryset):
+        ids = list(queryset.values_list("id", flat=True))
+        result = Order.bulk_transition(ids, to_status, actor=request.user, note="admin")
+        modeladmin.message_user(
+            request, f"{len(result['updated'])} سفارش → {to_status}", messages.SUCCESS,
+        )
+        if result["skipped"]:
+            modeladmin.message_user(
+                request, f"{len(result['skipped'])} سفارش به‌دلیل گذار نامعتبر رد شد.", messages.WARNING,
+            )
+    action.__name__ = f"mark_{to_status}"
+    action.short_description = f"تغییر وضعیت به {to_status}"
+    return action
+
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ("id", "user", "total_amount", "status", "created_at")
     list_filter = ("status", "created_at")
     search_fields = ("id", "user__username", "user__email")
-    readonly_fields = ("items_subtotal", "total_amount", "created_at")
+    # وضعیت فقط از طریق اکشن‌ها (با اعتبارسنجی گذار و ثبت رویداد) تغییر می‌کند
+    readonly_fields = ("status", "items_subtotal", "total_amount", "created_at")
     date_hierarchy = "created_at"
     ordering = ("-id",)
-    inlines = [OrderItemInline]
+    inlines = [OrderItemInline, OrderEventInline]
+    actions = [_transition_action(s) for s in ("paid", "shipped", "delivered", "canceled")]
+
+
+@admin.register(OrderEvent)
+class OrderEventAdmin(admin.ModelAdmin):
+    list_display = ("id", "order", "from_status", "to_status", "actor", "created_at")
+    list_filter = ("to_status", "created_at")
+    search_fields = ("order__id", "note")
+    ordering = ("-id",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(OrderItem)
 class OrderItemAdmin(admin.ModelAdmin):
-    list_display = ("id", "order", "product", "price", "quantity")
-    search_fields = ("order__id", "product__id")
+    list_display = ("id", "order", "product_name", "variant_label", "price", "quantity")
+    search_fields = ("order__id", "product__id", "product_name", "product_sku")
+    readonly_fields = ("product_name", "product_sku", "variant_label", "image_url")
     autocomplete_fields = ("order", "product")
     ordering = ("-id",)
+
+
+@admin.register(InvoiceOutbox)
+class InvoiceOutboxAdmin(admin.ModelAdmin):
+    list_display = ("id", "order", "status", "attempts", "next_attempt_at", "sent_at", "created_at")
+    list_filter = ("status",)
+    search_fields = ("order__id", "last_error")
+    readonly_fields = (
+        "order", "status", "attempts", "next_attempt_at", "payload", "response",
+        "last_error", "created_at", "sent_at",
+    )
+    actions = ["requeue", "mark_sent"]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="ارسال دوباره به هلو (بازگشت به صف)")
+    def requeue(self, request, queryset):
+        n = queryset.exclude(status=InvoiceOutbox.Status.SENT).update(
+            status=InvoiceOutbox.Status.PENDING, attempts=0, next_attempt_at=timezone.now(), last_error=""
+        )
+        self.message_user(request, f"{n} فاکتور دوباره در صف قرار گرفت.", messages.SUCCESS)
+
+    @admin.action(description="در هلو ثبت شده است (بعد از بررسی NEEDS_REVIEW)")
+    def mark_sent(self, request, queryset):
+        n = queryset.filter(status=InvoiceOutbox.Status.NEEDS_REVIEW).update(
+            status=InvoiceOutbox.Status.SENT, sent_at=timezone.now(), last_error=""
+        )
+        self.message_user(request, f"{n} فاکتور ارسال‌شده علامت خورد.", messages.SUCCESS)
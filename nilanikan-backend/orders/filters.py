@@ -0,0 +1,87 @@
+# orders/filters.py
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+def _parse_bound(value, end=False):
+    """
+    تاریخ (YYYY-MM-DD) یا datetime ISO را به datetime آگاه از منطقهٔ زمانی تبدیل می‌کند.
+    برای تاریخِ خالی در حد بالا، ابتدای روز بعد برمی‌گردد (بازهٔ نیم‌باز، قابل استفاده با ایندکس).
+    """
+    if not value:
+        return None
+    dt = parse_datetime(value)
+    if dt is None:
+        d = parse_date(value)
+        if d is None:
+            return None
+        dt = datetime.combine(d + timedelta(days=1) if end else d, time.min)
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
+def filter_orders(qs, params, *, with_status=True):
+    """
+    فیلترهای مشترک پنل سفارش‌ها:
+    ?status=paid,shipped  ?created_from=&created_to=  ?shipping_method=  ?user=<id|username>  ?tracking_code=
+    """
+    if with_status:
+        statuses = [x for x in (params.get("status") or "").split(",") if x]
+        if len(statuses) == 1:
+            qs = qs.filter(status=statuses[0])
+        elif statuses:
+            qs = qs.filter(status__in=statuses)
+
+    created_from = _parse_bound(params.get("created_from"))
+    created_to = _parse_bound(params.get("created_to"), end=True)
+    if created_from:
+        qs = qs.filter(created_at__gte=created_from)
+    if created_to:
+        qs = qs.filter(created_at__lt=created_to)
+
+    shipping_method = params.get("shipping_method")
+    if shipping_method:
+        qs = qs.filter(shipping_method=shipping_method)
+
+    user = params.get("user")
+    if user:
+        qs = qs.filter(user_id=user) if str(user).isdigit() else qs.filter(user__username=user)
+
+    tracking_code = params.get("tracking_code")
+    if tracking_code:
+        qs = qs.filter(tracking_code=tracking_code)
+    return qs
+
+
+def parse_cursor(value):
+    """
+    کرسر «created_at|id» را (برای ادامهٔ خروجی) به (datetime, id) تبدیل می‌کند.
+    """
+    if not value or "|" not in value:
+        return None
+    ts, _, pk = value.rpartition("|")
+    dt = parse_datetime(ts)
+    if dt is None or not pk.isdigit():
+        return None
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt, int(pk)
+
+
+def after_cursor(qs, value):
+    """سفارش‌های بعد از کرسر به ترتیب (created_at, id)"""
+    cur = parse_cursor(value)
+    if cur is None:
+        return qs
+    dt, pk = cur
+    return qs.filter(Q(created_at__gt=dt) | Q(created_at=dt, id__gt=pk))
+
+
+def encode_cursor(order):
+    """کرسر بدون کاراکتر «+» (UTC با پسوند Z) تا در querystring سالم بماند"""
+    ts = order.created_at.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    return f"{ts}|{order.pk}"
@@ -0,0 +1,230 @@
+# orders/holoo_invoices.py
+"""
+تخلیهٔ InvoiceOutbox به هلو:
+
+1) claim: ردیف‌های سررسیدشده با select_for_update(skip_locked) برداشته و برای مدت LEASE
+   رزرو می‌شوند (چند worker هم‌زمان یک ردیف را نمی‌فرستند)
+2) ساخت invoiceinfo هر سفارش از اسنپ‌شات سطرها + erp_code محصول
+3) ارسال هر فاکتور در یک فراخوانی جدا holoo_invoice_create: هلو کلید idempotency ندارد و
+   شکستِ یک فراخوانی چندفاکتوری (timeout، رد یکی از فاکتورها) معلوم نمی‌کند کدام فاکتورها ثبت
+   شده‌اند؛ تکرار کل دسته فاکتور تکراری می‌ساخت. claim دسته‌ای است ولی ارسال نه.
+4) پیش از هر ارسال lease همان ردیف تمدید می‌شود (اگر ردیف دیگر مال این worker نیست، رد می‌شود) و
+   نتیجهٔ هر ارسال بلافاصله ذخیره می‌شود؛ کرش وسط دسته فقط ردیف در حال ارسال را نامعلوم می‌گذارد
+5) در خطا attempts++ و تلاش بعدی با backoff نمایی (+jitter)؛ اگر circuit باز باشد درخواست اصلاً
+   ارسال نشده و تلاش حساب نمی‌شود؛ اگر POST رفت و پاسخی نیامد (HolooOutcomeUnknown) ردیف
+   NEEDS_REVIEW می‌شود و تا بررسی دستی در هلو دوباره فرستاده نمی‌شود
+"""
+import logging
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from holoo_client import HolooOutcomeUnknown, HolooUnavailable, holoo_invoice_create
+
+from .models import InvoiceOutbox, Order, OrderItem
+
+logger = logging.getLogger("holoo")
+
+LEASE = timedelta(minutes=5)
+BACKOFF_BASE = 30       # ثانیه
+BACKOFF_MAX = 60 * 60   # ثانیه
+UPDATE_FIELDS = ["status", "attempts", "next_attempt_at", "payload", "response", "last_error", "sent_at"]
+
+
+class InvoiceBuildError(ValueError):
+    """خطای دائمی ساخت فاکتور (تلاش مجدد کمکی نمی‌کند)"""
+
+
+def build_invoiceinfo(order: Order, customer_code: str) -> dict:
+    details = []
+    for i, it in enumerate(order.items.all(), start=1):
+        erp_code = getattr(it.product, "erp_code", None)
+        if not erp_code:
+            raise InvoiceBuildError(f"MISSING_ERP_CODE:product={it.product_id}")
+        details.append({
+            "id": str(i),
+            "ProductErpCode": erp_code,
+            "few": float(it.quantity or 0),
+            "price": float(it.price or 0),
+            "levy": 0.0,
+            "scot": 0.0,
+        })
+    if not details:
+        raise InvoiceBuildError("EMPTY_ORDER")
+
+    created = timezone.localtime(order.created_at)
+    return {
+        "id": str(order.pk),  # برای تطبیق پاسخ هلو با سفارش
+        "Type": 1,  # فروش
+        "customererpcode": customer_code,
+        "date": created.strftime("%Y-%m-%d"),
+        "time": created.strftime("%H:%M"),
+        "Cash": 0.0,
+        "Bank": float(order.total_amount or 0),  # پرداخت آنلاین/کیف پول
+        "Nesiyeh": 0.0,
+        "Discount": float(order.discount_amount or 0),
+        "detailinfo": details,
+    }
+
+
+def _backoff(attempts: int) -> timedelta:
+    cap = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** max(0, attempts - 1)))
+    return timedelta(seconds=random.uniform(cap / 2, cap))
+
+
+def _invoice_result(response, invoice_id: str):
+    """
+    بخش مربوط به همین فاکتور اگر هلو نتیجه را به شکل لیست (با id) برگرداند؛
+    در غیر این صورت کل پاسخ.
+    """
+    candidates = []
+    if isinstance(response, list):
+        candidates = response
+    elif isinstance(response, dict):
+        for key in ("invoiceinfo", "Invoice", "invoice", "result", "Result"):
+            if isinstance(response.get(key), list):
+                candidates = response[key]
+                break
+    for part in candidates:
+        if isinstance(part, dict) and str(part.get("id", "")) == invoice_id:
+            return part
+    return response
+
+
+def _retry_or_fail(row, error, now, max_attempts, stats):
+    row.last_error = str(error)[:2000]
+    if row.attempts >= max_attempts:
+        row.status = InvoiceOutbox.Status.FAILED
+        stats["failed"] += 1
+    else:
+        row.next_attempt_at = now + _backoff(row.attempts)
+        stats["retry"] += 1
+
+
+def claim_due(batch_size: int):
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            InvoiceOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status=InvoiceOutbox.Status.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        if rows:
+            InvoiceOutbox.objects.filter(pk__in=[r.pk for r in rows]).update(next_attempt_at=now + LEASE)
+            for r in rows:
+                r.next_attempt_at = now + LEASE  # توکن lease برای _renew_lease
+    return rows
+
+
+def _renew_lease(row) -> bool:
+    """
+    تمدید lease پیش از ارسال؛ فقط اگر ردیف هنوز PENDING و با همان lease این worker باشد.
+    False یعنی lease منقضی و ردیف توسط worker دیگری claim یا وضعیتش عوض شده است.
+    """
+    until = timezone.now() + LEASE
+    renewed = InvoiceOutbox.objects.filter(
+        pk=row.pk, status=InvoiceOutbox.Status.PENDING, next_attempt_at=row.next_attempt_at,
+    ).update(next_attempt_at=until)
+    if renewed:
+        row.next_attempt_at = until
+    return bool(renewed)
+
+
+def send_batch(rows, *, customer_code: str, max_attempts: int) -> dict:
+    """
+    ارسال ردیف‌های claim‌شده، هر فاکتور در یک POST جدا.
+    بده‌بستان: هر فاکتور یک رفت‌وبرگشت به هلو است و توان عملیاتی به تأخیر هلو محدود می‌شود
+    (دسته‌ای به اندازهٔ N تقریباً N برابر یک درخواست طول می‌کشد)؛ در عوض نتیجهٔ هر فاکتور معلوم است
+    و شکست یکی باعث ارسال دوبارهٔ بقیه نمی‌شود.
+    """
+    stats = {"sent": 0, "retry": 0, "failed": 0, "review": 0, "skipped": 0}
+    orders = {
+        o.pk: o
+        for o in Order.objects.filter(pk__in=[r.order_id for r in rows]).prefetch_related(
+            Prefetch("items", queryset=OrderItem.objects.select_related("product").only(
+                "id", "order_id", "price", "quantity", "product_id", "product__erp_code"
+            ))
+        )
+    }
+
+    for row in rows:
+        if not _renew_lease(row):
+            logger.warning("holoo invoice outbox #%s: lease lost, skipped", row.pk)
+            stats["skipped"] += 1
+            continue
+        _send_one(row, orders[row.order_id], customer_code, max_attempts, stats)
+        row.save(update_fields=UPDATE_FIELDS)
+    return stats
+
+
+def _send_one(row, order, customer_code, max_attempts, stats):
+    now = timezone.now()
+    try:
+        row.payload = build_invoiceinfo(order, customer_code)
+    except InvoiceBuildError as e:
+        row.status = InvoiceOutbox.Status.FAILED
+        row.last_error = str(e)
+        stats["failed"] += 1
+        return
+
+    key = str(row.order_id)
+    try:
+        response = holoo_invoice_create(row.payload)
+        if response is None:
+            raise RuntimeError("HOLOO_DISABLED")
+    except HolooUnavailable as e:
+        # ارسال نشده؛ بدون مصرف تلاش، بعد از backoff دوباره
+        row.last_error = str(e)[:2000]
+        row.next_attempt_at = now + _backoff(row.attempts + 1)
+        stats["retry"] += 1
+        return
+    except HolooOutcomeUnknown as e:
+        # شاید فاکتور ثبت شده باشد؛ تکرار خودکار = فاکتور تکراری
+        row.attempts += 1
+        row.status = InvoiceOutbox.Status.NEEDS_REVIEW
+        row.last_error = str(e)[:2000]
+        logger.error("holoo invoice outcome unknown (order %s), needs review: %s", key, e)
+        stats["review"] += 1
+        return
+    except Exception as e:
+        row.attempts += 1
+        logger.warning("holoo invoice failed (order %s, attempt %d): %s", key, row.attempts, e)
+        _retry_or_fail(row, e, now, max_attempts, stats)
+        return
+
+    row.attempts += 1
+    row.response = _invoice_result(response, key)
+    part = row.response
+    error = (part.get("Error") or part.get("error")) if isinstance(part, dict) else None
+    if error:
+        _retry_or_fail(row, error, now, max_attempts, stats)
+    else:
+        row.status = InvoiceOutbox.Status.SENT
+        row.sent_at = now
+        row.last_error = ""
+        stats["sent"] += 1
+
+
+def drain(*, batch_size: int = 50, max_attempts: int = 8, limit: int = 0, customer_code: str = None) -> dict:
+    """تا خالی شدن صف سررسیدشده (یا رسیدن به limit) دسته‌دسته ارسال می‌کند."""
+    customer_code = customer_code or settings.HOLOO_DEFAULT_CUSTOMER_CODE
+    if not customer_code:
+        raise ValueError("HOLOO_DEFAULT_CUSTOMER_CODE is not configured")
+
+    totals = {"sent": 0, "retry": 0, "failed": 0, "review": 0, "skipped": 0, "batches": 0}
+    done = 0
+    while not limit or done < limit:
+        size = min(batch_size, limit - done) if limit else batch_size
+        rows = claim_due(size)
+        if not rows:
+            break
+        stats = send_batch(rows, customer_code=customer_code, max_attempts=max_attempts)
+        for k, v in stats.items():
+            totals[k] += v
+        totals["batches"] += 1
+        done += len(rows)
+    return totals
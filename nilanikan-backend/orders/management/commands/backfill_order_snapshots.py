@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from orders.models import OrderItem
+
+
+class Command(BaseCommand):
+    help = "پر کردن اسنپ‌شات محصول (نام/SKU/تصویر) برای سطرهای سفارش قدیمی"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="تعداد سطر در هر دسته")
+        parser.add_argument("--force", action="store_true", help="بازنویسی سطرهایی که اسنپ‌شات دارند")
+
+    def handle(self, *args, **opts):
+        batch_size = max(1, opts["batch_size"])
+        qs = OrderItem.objects.all()
+        if not opts["force"]:
+            qs = qs.filter(product_name="")
+
+        fields = ["product_name", "product_sku", "variant_label", "image_url"]
+        last_id, total = 0, 0
+        while True:
+            # صفحه‌بندی بر اساس id تا حافظه ثابت بماند و هر دسته مستقل commit شود
+            batch = list(
+                qs.filter(pk__gt=last_id)
+                .select_related("product")
+                .prefetch_related("product__gallery")
+                .order_by("pk")[:batch_size]
+            )
+            if not batch:
+                break
+
+            for item in batch:
+                snap = OrderItem.snapshot_fields(item.product)
+                # برچسب واریانت برای سفارش‌های قدیمی قابل بازیابی نیست
+                snap["variant_label"] = item.variant_label
+                for k, v in snap.items():
+                    setattr(item, k, v)
+
+            with transaction.atomic():
+                OrderItem.objects.bulk_update(batch, fields)
+
+            total += len(batch)
+            last_id = batch[-1].pk
+            self.stdout.write(f"{total} سطر به‌روزرسانی شد (تا id={last_id}).")
+
+        self.stdout.write(self.style.SUCCESS(f"تمام شد: {total} سطر سفارش."))
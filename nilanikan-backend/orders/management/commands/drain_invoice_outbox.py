@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.holoo_invoices import drain
+
+
+class Command(BaseCommand):
+    help = (
+        "ارسال فاکتور سفارش‌های پرداخت‌شده از InvoiceOutbox به هلو. claim دسته‌ای است ولی هر فاکتور "
+        "در یک فراخوانی جدا فرستاده می‌شود (هلو کلید idempotency ندارد): هر فاکتور یک رفت‌وبرگشت است "
+        "و سرعت به تأخیر هلو محدود است، در عوض شکست یکی باعث تکرار بقیه نمی‌شود. POSTی که پاسخش "
+        "نرسید NEEDS_REVIEW می‌شود و تا بررسی دستی دوباره فرستاده نمی‌شود."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50, help="تعداد ردیفی که هر دور claim می‌شود")
+        parser.add_argument("--max-attempts", type=int, default=8, help="بعد از این تعداد تلاش، FAILED")
+        parser.add_argument("--limit", type=int, default=0, help="حداکثر ردیف در هر دور (۰ = همه)")
+        parser.add_argument("--customer-code", default=None, help="پیش‌فرض: HOLOO_DEFAULT_CUSTOMER_CODE")
+        parser.add_argument("--loop", action="store_true", help="اجرای دائمی با فاصلهٔ --interval")
+        parser.add_argument("--interval", type=float, default=10, help="فاصلهٔ دو دور (ثانیه)")
+
+    def handle(self, *args, **opts):
+        while True:
+            started = time.monotonic()
+            try:
+                stats = drain(
+                    batch_size=max(1, opts["batch_size"]),
+                    max_attempts=max(1, opts["max_attempts"]),
+                    limit=opts["limit"],
+                    customer_code=opts["customer_code"],
+                )
+            except ValueError as e:
+                raise CommandError(str(e))
+            elapsed = time.monotonic() - started
+            if stats["batches"] or not opts["loop"]:
+                self.stdout.write(
+                    f"ارسال‌شده: {stats['sent']} | تلاش مجدد: {stats['retry']} | ناموفق: {stats['failed']} | "
+                    f"نیازمند بررسی: {stats['review']} | "
+                    f"{stats['batches']} دسته در {elapsed:.2f}s"
+                )
+            if not opts["loop"]:
+                break
+            time.sleep(max(0.0, opts["interval"] - elapsed))
@@ -0,0 +1,55 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.exports import DEFAULT_CHUNK_SIZE, EXPORT_FORMATS, export_queryset, iter_rows, stream_csv, stream_jsonl
+
+
+class Command(BaseCommand):
+    help = "خروجی جریانی سفارش‌ها و اقلام (CSV یا JSON-Lines) برای حسابداری / دامپ شبانه"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", dest="fmt", choices=EXPORT_FORMATS, default="csv")
+        parser.add_argument("--output", "-o", default="-", help="مسیر فایل خروجی (پیش‌فرض stdout)")
+        parser.add_argument("--status", default="", help="مثلاً paid,shipped")
+        parser.add_argument("--from", dest="created_from", default="", help="YYYY-MM-DD یا datetime ISO")
+        parser.add_argument("--to", dest="created_to", default="", help="YYYY-MM-DD یا datetime ISO (شامل همان روز)")
+        parser.add_argument("--after", default="", help="کرسر آخرین سطر خروجی قبلی برای ادامه")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **opts):
+        params = {
+            "status": opts["status"],
+            "created_from": opts["created_from"],
+            "created_to": opts["created_to"],
+            "after": opts["after"],
+        }
+        qs = export_queryset(params)
+
+        last = {}
+
+        def tracked(rows):
+            # آخرین کرسر را نگه می‌داریم تا در پایان برای ادامهٔ دفعهٔ بعد گزارش شود
+            for row in rows:
+                last["cursor"] = row["cursor"]
+                last["rows"] = last.get("rows", 0) + 1
+                yield row
+
+        rows = tracked(iter_rows(qs, chunk_size=max(1, opts["chunk_size"])))
+        chunks = stream_jsonl(rows) if opts["fmt"] == "jsonl" else stream_csv(rows)
+
+        path = opts["output"]
+        try:
+            out = sys.stdout if path == "-" else open(path, "w", encoding="utf-8", newline="")
+        except OSError as e:
+            raise CommandError(f"Cannot open {path}: {e}")
+        try:
+            for chunk in chunks:
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+        self.stderr.write(
+            f"{last.get('rows', 0)} سطر نوشته شد. کرسر ادامه: {last.get('cursor', opts['after'] or '-')}"
+        )
@@ -0,0 +1,69 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from orders.models import Wallet, WalletTransaction
+
+
+class Command(BaseCommand):
+    help = "تطبیق موجودی کیف پول‌ها با دفتر تراکنش‌ها (یک کوئری گروهی برای کل دفتر)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="موجودی مغایر را با مقدار دفتر اصلاح کن")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    @staticmethod
+    def ledger_rows(queryset):
+        return (
+            queryset.filter(status=WalletTransaction.Status.SUCCESS)
+            .order_by()
+            .values("user_id")
+            .annotate(
+                credits=Sum("amount", filter=Q(trx_type=WalletTransaction.Type.CREDIT)),
+                debits=Sum("amount", filter=Q(trx_type=WalletTransaction.Type.DEBIT)),
+            )
+        )
+
+    def fix_wallet(self, pk):
+        """
+        قفل کیف پول، محاسبهٔ دوبارهٔ جمع دفتر همان کاربر داخل همان تراکنش و اصلاح موجودی؛
+        تراکنشی که بین اسکن گروهی و اینجا ثبت شده در جمع جدید دیده می‌شود.
+        """
+        with transaction.atomic():
+            wallet = Wallet.objects.select_for_update().get(pk=pk)
+            row = self.ledger_rows(WalletTransaction.objects.filter(user_id=wallet.user_id)).order_by("user_id").first()
+            expected = (row["credits"] or Decimal("0")) - (row["debits"] or Decimal("0")) if row else Decimal("0")
+            if wallet.balance == expected:
+                return False
+            wallet.balance = expected
+            wallet.save(update_fields=["balance"])
+            return True
+
+    def handle(self, *args, **opts):
+        ledger_rows = self.ledger_rows(WalletTransaction.objects.all())
+        ledger = {
+            r["user_id"]: (r["credits"] or Decimal("0")) - (r["debits"] or Decimal("0"))
+            for r in ledger_rows.iterator(chunk_size=opts["chunk_size"])
+        }
+
+        checked, mismatches, fixed = 0, 0, 0
+        wallets = Wallet.objects.order_by("pk").values_list("pk", "user_id", "balance")
+        for pk, user_id, balance in wallets.iterator(chunk_size=opts["chunk_size"]):
+            checked += 1
+            expected = ledger.get(user_id, Decimal("0"))
+            if balance == expected:
+                continue
+            mismatches += 1
+            self.stdout.write(
+                f"wallet={pk} user={user_id} balance={balance} ledger={expected} diff={balance - expected}"
+            )
+            if opts["fix"]:
+                fixed += self.fix_wallet(pk)
+
+        style = self.style.SUCCESS if not mismatches else self.style.WARNING
+        msg = f"{checked} کیف پول بررسی شد | مغایرت: {mismatches}"
+        if opts["fix"]:
+            msg += f" | اصلاح‌شده: {fixed}"
+        self.stdout.write(style(msg))
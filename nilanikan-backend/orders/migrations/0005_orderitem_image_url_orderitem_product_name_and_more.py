@@ -0,0 +1,33 @@
+# Generated by Django 4.2.14 on 2026-10-19 15:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_remove_order_postal_code'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='image_url',
+            field=models.CharField(blank=True, default='', max_length=500),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='product_name',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='product_sku',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='variant_label',
+            field=models.CharField(blank=True, default='', max_length=120),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.14 on 2026-10-19 15:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_orderevent'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='wallettransaction',
+            index=models.Index(fields=['user', 'created_at'], name='wallettrx_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.14 on 2026-10-19 15:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_wallettransaction_wallettrx_user_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='discount_amount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+    ]
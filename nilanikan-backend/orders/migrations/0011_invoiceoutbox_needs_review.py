@@ -0,0 +1,18 @@
+# Generated by Django 4.2.14 on 2026-10-19 16:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0010_invoiceoutbox'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='invoiceoutbox',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('SENT', 'Sent'), ('FAILED', 'Failed'), ('NEEDS_REVIEW', 'Needs review')], default='PENDING', max_length=16),
+        ),
+    ]
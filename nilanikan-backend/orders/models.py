@@ -1,5 +1,7 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth.models import User
+from django.utils import timezone
 from catalog.models import Product
 from decimal import Decimal
 from django.db.models.signals import post_save
@@ -41,15 +43,95 @@ class Order(models.Model):
         max_length=20, choices=STATUS_CHOICES, default="pending"
     )
     address = models.TextField(blank=True, null=True)
-    tracking_code = models.CharField(max_length=64, blank=True, null=True)
+    tracking_code = models.CharField(max_length=64, blank=True, null=True, db_index=True)
     shipping_method = models.CharField(max_length=50, default="post")
     shipping_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     items_subtotal = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    discount_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # متناسب با فیلترهای پنل سفارش‌های ادمین (وضعیت/کاربر + بازهٔ زمانی)
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="order_status_created_idx"),
+            models.Index(fields=["user", "created_at"], name="order_user_created_idx"),
+        ]
+
+    # گذارهای مجاز وضعیت: pending→paid→shipped→delivered و لغو پیش از ارسال
+    TRANSITIONS = {
+        "pending": ("paid", "canceled"),
+        "paid": ("shipped", "canceled"),
+        "shipped": ("delivered",),
+        "delivered": (),
+        "canceled": (),
+    }
+
     def __str__(self):
         return f"Order #{self.id} - {self.user} - {self.status}"
 
+    def can_transition(self, to_status: str) -> bool:
+        return to_status in self.TRANSITIONS.get(self.status, ())
+
+    def transition_to(self, to_status: str, *, actor=None, note: str = "") -> bool:
+        """گذار تکی؛ همان مسیر bulk_transition را استفاده می‌کند تا رویداد ثبت شود."""
+        result = Order.bulk_transition([self.pk], to_status, actor=actor, note=note)
+        if self.pk in result["updated"]:
+            self.status = to_status
+            return True
+        return False
+
+    @classmethod
+    def bulk_transition(cls, order_ids, to_status: str, *, actor=None, note: str = "", chunk_size: int = 500):
+        """
+        اعمال گذار وضعیت روی تعداد زیادی سفارش با چند کوئری مجموعه‌ای:
+        خواندن وضعیت فعلی (با قفل ردیف)، یک UPDATE برای هر وضعیت مبدأ، و bulk_create رویدادها.
+        خروجی: {"updated": [ids], "skipped": {id: reason}}
+        """
+        if to_status not in dict(cls.STATUS_CHOICES):
+            raise ValueError(f"Unknown order status: {to_status}")
+
+        ids = list(dict.fromkeys(int(pk) for pk in order_ids))
+        updated, skipped = [], {}
+        actor_id = getattr(actor, "pk", None)
+
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            with transaction.atomic():
+                current = dict(
+                    cls.objects.select_for_update()
+                    .filter(pk__in=chunk)
+                    .values_list("id", "status")
+                )
+
+                by_source = {}
+                for pk in chunk:
+                    src = current.get(pk)
+                    if src is None:
+                        skipped[pk] = "NOT_FOUND"
+                    elif to_status not in cls.TRANSITIONS.get(src, ()):
+                        skipped[pk] = f"INVALID_TRANSITION:{src}->{to_status}"
+                    else:
+                        by_source.setdefault(src, []).append(pk)
+
+                events = []
+                for src, pks in by_source.items():
+                    # شرط status=src تضمین می‌کند گذار هم‌زمان دیگری بازنویسی نشود
+                    cls.objects.filter(pk__in=pks, status=src).update(status=to_status)
+                    events.extend(
+                        OrderEvent(order_id=pk, from_status=src, to_status=to_status, actor_id=actor_id, note=note)
+                        for pk in pks
+                    )
+                    updated.extend(pks)
+                OrderEvent.objects.bulk_create(events)
+
+                if to_status == "paid" and events:
+                    # outbox فاکتور هلو در همان تراکنش تغییر وضعیت؛ ارسال با drain_invoice_outbox
+                    InvoiceOutbox.objects.bulk_create(
+                        [InvoiceOutbox(order_id=e.order_id) for e in events], ignore_conflicts=True
+                    )
+
+        return {"updated": updated, "skipped": skipped}
+
     # محاسبه جمع آیتم‌ها از روی OrderItemها (اختیاری اگر جایی دیگر محاسبه می‌کنید)
     def compute_items_subtotal(self):
         subtotal = Decimal("0")
@@ -58,10 +140,11 @@ class Order(models.Model):
         self.items_subtotal = subtotal
         return subtotal
 
-    # محاسبه total_amount بر اساس subtotal + هزینه ارسال
+    # محاسبه total_amount بر اساس subtotal - تخفیف + هزینه ارسال
     def compute_total(self, save: bool = True):
         subtotal = self.compute_items_subtotal()
-        total = (subtotal or Decimal("0")) + (self.shipping_cost or Decimal("0"))
+        discounted = max((subtotal or Decimal("0")) - (self.discount_amount or Decimal("0")), Decimal("0"))
+        total = discounted + (self.shipping_cost or Decimal("0"))
         self.total_amount = total
         if save:
             self.save(update_fields=["items_subtotal", "total_amount"])
@@ -74,20 +157,78 @@ class Order(models.Model):
             self.compute_total(save=True)
 
         amount = Decimal(self.total_amount or 0)
-        w = getattr(self.user, "wallet", None)
+        w = Wallet.objects.filter(user_id=self.user_id).first()
         if not w:
             return {"ok": False, "error": "WALLET_NOT_FOUND"}
 
-        trx = w.debit(amount, reason="ORDER_PAYMENT", meta={"order_id": self.id})
-        trx.order = self
-        trx.save(update_fields=["order"])
+        with transaction.atomic():
+            # قفل سفارش تا دو پرداخت هم‌زمانِ یک سفارش، دو بار کسر نکنند
+            current = (
+                Order.objects.select_for_update()
+                .filter(pk=self.pk).values_list("status", flat=True).first()
+            )
+            if current != "pending":
+                return {"ok": False, "error": "ORDER_NOT_PAYABLE"}
+
+            trx = w.debit(amount, reason="ORDER_PAYMENT", meta={"order_id": self.id}, order=self)
+            if trx.status != WalletTransaction.Status.SUCCESS:
+                return {"ok": False, "error": "INSUFFICIENT_FUNDS"}
+
+            self.transition_to("paid", note="wallet")
+        return {"ok": True, "transaction_id": trx.id}
+
+
+class OrderEvent(models.Model):
+    """لاگ فقط‌افزودنی تغییر وضعیت سفارش"""
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="events")
+    from_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    note = models.CharField(max_length=255, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["created_at", "id"]
+        indexes = [models.Index(fields=["order", "created_at"], name="orderevent_order_created_idx")]
+
+    def __str__(self):
+        return f"Order #{self.order_id}: {self.from_status} → {self.to_status}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("OrderEvent is append-only")
+        super().save(*args, **kwargs)
+
+
+class InvoiceOutbox(models.Model):
+    """
+    صف ارسال فاکتور فروش سفارش‌های پرداخت‌شده به هلو (transactional outbox).
+    ردیف هم‌زمان با گذار به paid ساخته می‌شود؛ worker (drain_invoice_outbox) ردیف‌ها را دسته‌ای
+    claim می‌کند، هر فاکتور را جدا می‌فرستد و پاسخ/خطا و زمان تلاش بعدی را بلافاصله ثبت می‌کند.
+    """
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        SENT = "SENT", "Sent"
+        FAILED = "FAILED", "Failed"  # بعد از حداکثر تلاش یا خطای دائمی (مثلاً کد کالای هلو ندارد)
+        # POST فرستاده شد ولی پاسخی نرسید؛ تا بررسی دستی در هلو دوباره فرستاده نمی‌شود (فاکتور تکراری)
+        NEEDS_REVIEW = "NEEDS_REVIEW", "Needs review"
 
-        if trx.status == WalletTransaction.Status.SUCCESS:
-            self.status = "paid"
-            self.save(update_fields=["status"])
-            return {"ok": True, "transaction_id": trx.id}
-        else:
-            return {"ok": False, "error": "INSUFFICIENT_FUNDS"}
+    order = models.OneToOneField(Order, on_delete=models.CASCADE, related_name="invoice_outbox")
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    payload = models.JSONField(null=True, blank=True)   # invoiceinfo ارسال‌شده
+    response = models.JSONField(null=True, blank=True)  # پاسخ هلو
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["next_attempt_at", "id"]
+        indexes = [models.Index(fields=["status", "next_attempt_at"], name="invoiceoutbox_due_idx")]
+
+    def __str__(self):
+        return f"Invoice outbox #{self.pk} (order {self.order_id}, {self.status})"
 
 
 class OrderItem(models.Model):
@@ -95,11 +236,54 @@ class OrderItem(models.Model):
         Order, on_delete=models.CASCADE, related_name="items"
     )
     product = models.ForeignKey(Product, on_delete=models.PROTECT)
-    price = models.DecimalField(max_digits=10, decimal_places=2)
+    price = models.DecimalField(max_digits=10, decimal_places=2)  # قیمت واحد در لحظهٔ خرید
     quantity = models.PositiveIntegerField(default=1)
 
+    # اسنپ‌شات محصول در لحظهٔ ثبت سفارش (برای خواندن سفارش بدون join به کاتالوگ)
+    product_name = models.CharField(max_length=200, blank=True, default="")
+    product_sku = models.CharField(max_length=64, blank=True, default="")
+    variant_label = models.CharField(max_length=120, blank=True, default="")
+    image_url = models.CharField(max_length=500, blank=True, default="")
+
     def __str__(self):
-        return f"{self.product} x {self.quantity} (Order {self.order.id})"
+        return f"{self.product_name or self.product_id} x {self.quantity} (Order {self.order_id})"
+
+    @staticmethod
+    def snapshot_fields(product, variant=None) -> dict:
+        """
+        مقادیر اسنپ‌شات یک سطر سفارش را از محصول (و واریانت اختیاری) می‌سازد.
+        تصویر: کاور محصول، در غیر این صورت اولین تصویر گالری (اگر prefetch شده باشد).
+        """
+        image = ""
+        try:
+            if product.image and getattr(product.image, "name", ""):
+                image = product.image.url
+        except Exception:
+            image = ""
+        if not image:
+            cache = getattr(product, "_prefetched_objects_cache", {}) or {}
+            gallery = cache.get("gallery")
+            if gallery is not None:
+                first = next((g for g in gallery if g.is_primary), None) or next(iter(gallery), None)
+                try:
+                    image = first.image.url if first and first.image else ""
+                except Exception:
+                    image = ""
+
+        label = ""
+        if variant is not None:
+            parts = [
+                getattr(variant.color, "value", None) if variant.color_id else None,
+                getattr(variant.size, "value", None) if variant.size_id else None,
+            ]
+            label = " / ".join(p for p in parts if p)
+
+        return {
+            "product_name": (product.name or "")[:200],
+            "product_sku": (product.sku or "")[:64],
+            "variant_label": label[:120],
+            "image_url": image[:500],
+        }
 
 
 # -------------------------------
@@ -112,40 +296,57 @@ class Wallet(models.Model):
     def __str__(self):
         return f"Wallet({self.user.username}) - {self.balance}"
 
-    def credit(self, amount: Decimal, reason: str = "", meta: dict = None):
+    # هر عملیات = یک UPDATE شرطی روی موجودی + یک ردیف دفتر (ledger) در همان تراکنش؛
+    # موجودیِ حافظه فقط با همان مقدار جابه‌جا می‌شود و مرجع اصلی، دیتابیس است.
+    def credit(self, amount: Decimal, reason: str = "", meta: dict = None, order=None):
         amount = Decimal(amount)
+        if amount <= 0:
+            raise ValueError("amount must be positive")
+        with transaction.atomic():
+            Wallet.objects.filter(pk=self.pk).update(balance=F("balance") + amount)
+            trx = WalletTransaction.objects.create(
+                user_id=self.user_id,
+                amount=amount,
+                trx_type=WalletTransaction.Type.CREDIT,
+                status=WalletTransaction.Status.SUCCESS,
+                reason=reason,
+                meta=meta or {},
+                order=order,
+            )
         self.balance = (self.balance or Decimal("0")) + amount
-        self.save(update_fields=["balance"])
-        return WalletTransaction.objects.create(
-            user=self.user,
-            amount=amount,
-            trx_type=WalletTransaction.Type.CREDIT,
-            status=WalletTransaction.Status.SUCCESS,
-            reason=reason,
-            meta=meta or {},
-        )
-
-    def debit(self, amount: Decimal, reason: str = "", meta: dict = None):
+        return trx
+
+    def debit(self, amount: Decimal, reason: str = "", meta: dict = None, order=None):
         amount = Decimal(amount)
-        if (self.balance or Decimal("0")) < amount:
-            return WalletTransaction.objects.create(
-                user=self.user,
+        if amount <= 0:
+            raise ValueError("amount must be positive")
+        with transaction.atomic():
+            # UPDATE ... SET balance = balance - x WHERE balance >= x
+            updated = (
+                Wallet.objects.filter(pk=self.pk, balance__gte=amount)
+                .update(balance=F("balance") - amount)
+            )
+            if not updated:
+                return WalletTransaction.objects.create(
+                    user_id=self.user_id,
+                    amount=amount,
+                    trx_type=WalletTransaction.Type.DEBIT,
+                    status=WalletTransaction.Status.FAILED,
+                    reason="INSUFFICIENT_FUNDS",
+                    meta={"requested_reason": reason, **(meta or {})},
+                    order=order,
+                )
+            trx = WalletTransaction.objects.create(
+                user_id=self.user_id,
                 amount=amount,
                 trx_type=WalletTransaction.Type.DEBIT,
-                status=WalletTransaction.Status.FAILED,
-                reason="INSUFFICIENT_FUNDS",
-                meta={"requested_reason": reason, **(meta or {})},
+                status=WalletTransaction.Status.SUCCESS,
+                reason=reason,
+                meta=meta or {},
+                order=order,
             )
         self.balance = (self.balance or Decimal("0")) - amount
-        self.save(update_fields=["balance"])
-        return WalletTransaction.objects.create(
-            user=self.user,
-            amount=amount,
-            trx_type=WalletTransaction.Type.DEBIT,
-            status=WalletTransaction.Status.SUCCESS,
-            reason=reason,
-            meta=meta or {},
-        )
+        return trx
 
 
 class WalletTransaction(models.Model):
@@ -167,6 +368,11 @@ class WalletTransaction(models.Model):
     order = models.ForeignKey(Order, on_delete=models.SET_NULL, null=True, blank=True, related_name="wallet_transactions")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "created_at"], name="wallettrx_user_created_idx"),
+        ]
+
     def __str__(self):
         return f"{self.trx_type} {self.amount} - {self.user} - {self.status}"
 
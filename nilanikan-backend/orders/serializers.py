@@ -1,7 +1,7 @@
 from rest_framework import serializers
 from .models import CartItem, Order, OrderItem
 from catalog.models import Product
-from catalog.serializers import ProductSerializer  # اگر دارید
+from catalog.serializers import ProductSerializer, abs_url  # اگر دارید
 
 
 class CartItemSerializer(serializers.ModelSerializer):
@@ -24,11 +24,32 @@ class CartItemSerializer(serializers.ModelSerializer):
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
-    product = ProductSerializer(read_only=True)
+    """
+    فقط از اسنپ‌شات ذخیره‌شده در OrderItem می‌خواند (بدون join به کاتالوگ).
+    فیلد product برای سازگاری با فرانت به شکل سبک برگردانده می‌شود.
+    """
+    product = serializers.SerializerMethodField()
+    image = serializers.SerializerMethodField()
 
     class Meta:
         model = OrderItem
-        fields = ["id", "product", "price", "quantity"]
+        fields = [
+            "id", "product", "product_name", "product_sku",
+            "variant_label", "image", "price", "quantity",
+        ]
+
+    def get_image(self, obj):
+        req = self.context.get("request")
+        return abs_url(req, obj.image_url) or ""
+
+    def get_product(self, obj):
+        return {
+            "id": obj.product_id,
+            "name": obj.product_name,
+            "sku": obj.product_sku,
+            "image": self.get_image(obj),
+            "price": obj.price,
+        }
 
 
 class OrderSerializer(serializers.ModelSerializer):
@@ -40,7 +61,7 @@ class OrderSerializer(serializers.ModelSerializer):
             "id", "user", "status", "address",
             # "postal_code",  ← حذف شد
             "shipping_method", "shipping_cost",
-            "items_subtotal", "total_amount",
+            "items_subtotal", "discount_amount", "total_amount",
             "tracking_code", "created_at", "items",
         ]
-        read_only_fields = ["user", "status", "items_subtotal", "total_amount", "created_at"]
+        read_only_fields = ["user", "status", "items_subtotal", "discount_amount", "total_amount", "created_at"]
@@ -0,0 +1,152 @@
+import logging
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from catalog.models import Attribute, AttributeValue, Category, Product, ProductVariant
+from holoo_client import HolooOutcomeUnknown, HolooUnavailable
+from orders import holoo_invoices
+from orders.holoo_invoices import claim_due, send_batch
+from orders.models import CartItem, InvoiceOutbox, Order, OrderItem
+
+
+class CheckoutCartTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.guest = User.objects.create_user(username="guest")
+        cls.user = User.objects.create_user(username="ali", password="x")
+        category = Category.objects.create(name="c", slug="c")
+        cls.product = Product.objects.create(name="p", slug="p", sku="p-1", category=category, price=100)
+        cls.other = Product.objects.create(name="q", slug="q", sku="q-1", category=category, price=50)
+        color = Attribute.objects.create(name="color", slug="color", type=Attribute.COLOR)
+        red = AttributeValue.objects.create(attribute=color, value="قرمز", slug="red")
+        cls.variant = ProductVariant.objects.create(product=cls.product, color=red, price=120, stock=3)
+
+    def setUp(self):
+        self.client = APIClient(HTTP_HOST="localhost")
+
+    def checkout(self, **body):
+        body.setdefault("shipping_address", {"line1": "تهران"})
+        return self.client.post("/api/orders/checkout/", body, format="json")
+
+    def test_signed_in_user_checks_out_posted_cart(self):
+        CartItem.objects.create(user=self.user, product=self.other, quantity=5)
+        self.client.force_authenticate(self.user)
+
+        res = self.checkout(cart=[{"product_id": self.product.pk, "qty": 2, "variant_id": self.variant.pk}])
+
+        self.assertEqual(res.status_code, 201, res.data)
+        order = Order.objects.get(pk=res.data["order_id"])
+        self.assertEqual(order.user, self.user)
+        item = order.items.get()
+        self.assertEqual((item.product_id, item.quantity), (self.product.pk, 2))
+        self.assertIn("قرمز", item.variant_label)
+        # سبد سمت سرور دست نمی‌خورد
+        self.assertTrue(CartItem.objects.filter(user=self.user).exists())
+
+    def test_signed_in_user_without_body_cart_uses_server_cart(self):
+        CartItem.objects.create(user=self.user, product=self.other, quantity=3)
+        self.client.force_authenticate(self.user)
+
+        res = self.checkout()
+
+        self.assertEqual(res.status_code, 201, res.data)
+        item = Order.objects.get(pk=res.data["order_id"]).items.get()
+        self.assertEqual((item.product_id, item.quantity), (self.other.pk, 3))
+        self.assertFalse(CartItem.objects.filter(user=self.user).exists())
+
+    def test_guest_checkout_with_string_ids(self):
+        with self.settings(GUEST_USER_ID=self.guest.pk):
+            res = self.checkout(cart=[{"product_id": str(self.other.pk), "qty": "2"}])
+
+        self.assertEqual(res.status_code, 201, res.data)
+        order = Order.objects.get(pk=res.data["order_id"])
+        self.assertEqual(order.user, self.guest)
+        self.assertEqual(int(order.total_amount), 100)
+
+    def test_variant_of_another_product_is_ignored(self):
+        self.client.force_authenticate(self.user)
+
+        res = self.checkout(cart=[{"product_id": self.other.pk, "qty": 1, "variant_id": self.variant.pk}])
+
+        self.assertEqual(res.status_code, 201, res.data)
+        self.assertEqual(Order.objects.get(pk=res.data["order_id"]).items.get().variant_label, "")
+
+    def test_invalid_cart_is_rejected(self):
+        self.client.force_authenticate(self.user)
+
+        self.assertEqual(self.checkout(cart={"product_id": 1}).data["error"], "CART_INVALID")
+        self.assertEqual(self.checkout(cart=[{"product_id": "x"}]).data["error"], "CART_INVALID")
+        self.assertFalse(Order.objects.exists())
+
+
+class Crash(BaseException):
+    """قطع ناگهانی worker وسط دسته"""
+
+
+class InvoiceOutboxTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create_user(username="ali")
+        category = Category.objects.create(name="c", slug="c")
+        product = Product.objects.create(
+            name="p", slug="p", sku="p-1", category=category, price=100, erp_code="H-1",
+        )
+        for _ in range(3):
+            order = Order.objects.create(user=user, status="paid", total_amount=100)
+            OrderItem.objects.create(order=order, product=product, price=100, quantity=1)
+            InvoiceOutbox.objects.create(order=order)
+
+    def setUp(self):
+        logging.disable(logging.ERROR)
+        self.addCleanup(logging.disable, logging.NOTSET)
+
+    def send(self, side_effect):
+        with mock.patch.object(holoo_invoices, "holoo_invoice_create", side_effect=side_effect) as create:
+            stats = send_batch(claim_due(10), customer_code="C-1", max_attempts=3)
+        return stats, create
+
+    def statuses(self):
+        return list(InvoiceOutbox.objects.order_by("id").values_list("status", flat=True))
+
+    def test_each_result_is_saved_right_after_its_post(self):
+        def create(payload):
+            if create.calls:
+                raise Crash()
+            create.calls += 1
+            return {"invoiceinfo": [{"id": payload["id"]}]}
+        create.calls = 0
+
+        with self.assertRaises(Crash):
+            self.send(create)
+
+        S = InvoiceOutbox.Status
+        self.assertEqual(self.statuses(), [S.SENT, S.PENDING, S.PENDING])
+
+    def test_unknown_outcome_is_parked_for_review(self):
+        stats, _ = self.send(HolooOutcomeUnknown("read timeout"))
+
+        self.assertEqual(stats["review"], 3)
+        self.assertEqual(set(self.statuses()), {InvoiceOutbox.Status.NEEDS_REVIEW})
+        self.assertEqual(claim_due(10), [])
+
+    def test_open_circuit_does_not_consume_attempts(self):
+        stats, _ = self.send(HolooUnavailable("circuit open"))
+
+        self.assertEqual(stats["retry"], 3)
+        self.assertEqual(set(InvoiceOutbox.objects.values_list("attempts", flat=True)), {0})
+
+    def test_row_with_lost_lease_is_not_sent(self):
+        rows = claim_due(10)
+        # lease ردیف اول منقضی شد و worker دیگری آن را برداشت
+        InvoiceOutbox.objects.filter(pk=rows[0].pk).update(next_attempt_at=rows[0].next_attempt_at + timedelta(minutes=1))
+
+        with mock.patch.object(holoo_invoices, "holoo_invoice_create", return_value={}) as create:
+            stats = send_batch(rows, customer_code="C-1", max_attempts=3)
+
+        self.assertEqual((stats["skipped"], stats["sent"], create.call_count), (1, 2, 2))
+        self.assertEqual(InvoiceOutbox.objects.get(pk=rows[0].pk).status, InvoiceOutbox.Status.PENDING)
@@ -1,17 +1,27 @@
 # orders/views.py
+from urllib.parse import urlencode
+
 from django.db import transaction
-from django.db.models import F
+from django.db.models import Count, F
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.http import HttpResponseRedirect, StreamingHttpResponse
+from django.utils import timezone
 
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
 from .models import CartItem, Order, OrderItem
 from .serializers import CartItemSerializer, OrderSerializer
-from catalog.models import Product
+from .filters import filter_orders
+from .exports import EXPORT_FORMATS, export_queryset, stream_export
+from catalog.models import Product, ProductVariant
+from coupons.models import CouponError, customer_key, get_coupon
+from payments.models import PaymentAttempt
+from payments.zarinpal import request_payment, verify_payment
 
 
 # --- helpers ---
@@ -35,9 +45,17 @@ class CartViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
+        # CartItemSerializer کل ProductSerializer را تو در تو دارد (امتیاز، گالری، تنوع‌ها)
         return CartItem.objects.filter(
             **user_filter(CartItem, self.request.user)
-        ).select_related("product")
+        ).select_related(
+            "product", "product__category", "product__rating_summary"
+        ).prefetch_related(
+            "product__gallery", "product__videos",
+            "product__variants",
+            "product__variants__color", "product__variants__color__attribute",
+            "product__variants__size", "product__variants__size__attribute",
+        )
 
     def create(self, request, *args, **kwargs):
         pid = request.data.get("product_id") or request.data.get("product")
@@ -90,11 +108,12 @@ class OrderViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
+        # سطرهای سفارش از اسنپ‌شات خوانده می‌شوند؛ نیازی به join محصول نیست
         qs = Order.objects.filter(
             **user_filter(Order, self.request.user)
-        ).prefetch_related("items__product")
+        ).prefetch_related("items")
         if self.request.user.is_staff:
-            qs = Order.objects.all().prefetch_related("items__product")
+            qs = Order.objects.all().prefetch_related("items")
         return qs
 
     # 👇 فقط برای تست: اجازهٔ مشاهدهٔ یک سفارش بدون لاگین
@@ -107,12 +126,106 @@ class OrderViewSet(viewsets.ModelViewSet):
     def retrieve(self, request, *args, **kwargs):
         pk = kwargs.get("pk")
         try:
-            order = Order.objects.prefetch_related("items__product").get(pk=pk)
+            order = Order.objects.prefetch_related("items").get(pk=pk)
         except Order.DoesNotExist:
             return Response({"detail": "Not found."}, status=404)
         data = OrderSerializer(order, context={"request": request}).data
         return Response(data, status=200)
 
+    # ============================
+    #  پرداخت آنلاین (زرین‌پال)
+    # ============================
+    @action(detail=True, methods=["post"], url_path="pay")
+    def pay(self, request, pk=None):
+        """
+        POST /api/orders/{id}/pay/ → {"ok": true, "url": "<StartPay>", "authority": "..."}
+        """
+        order = self.get_object()
+        if order.status != "pending":
+            return Response({"ok": False, "error": "ORDER_NOT_PAYABLE"}, status=400)
+        user = order.user
+        result = request_payment(
+            order.total_amount,
+            f"Order #{order.id}",
+            settings.ZARINPAL_CALLBACK_URL,
+            email=getattr(user, "email", None) or None,
+            order=order,
+        )
+        if not result.get("ok"):
+            return Response(result, status=502)
+        return Response({"ok": True, "url": result["url"], "authority": result["authority"]})
+
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=[AllowAny],
+        authentication_classes=[],
+        url_path="payment/callback",
+    )
+    def payment_callback(self, request):
+        """
+        بازگشت از زرین‌پال: ?Authority=...&Status=OK|NOK
+        مبلغ از PaymentAttempt خوانده می‌شود، پس روی هر worker قابل پردازش است.
+        """
+        authority = request.query_params.get("Authority") or ""
+        gateway_status = request.query_params.get("Status") or ""
+        fail_url = settings.ZARINPAL_FAIL_REDIRECT
+
+        if not authority:
+            return HttpResponseRedirect(fail_url)
+
+        if gateway_status != "OK":
+            PaymentAttempt.objects.filter(
+                authority=authority, status=PaymentAttempt.Status.PENDING
+            ).update(status=PaymentAttempt.Status.CANCELED, updated_at=timezone.now())
+            return HttpResponseRedirect(f"{fail_url}?{urlencode({'authority': authority})}")
+
+        result = verify_payment(authority)
+        attempt = result.get("attempt")
+        if not result.get("ok") or attempt is None:
+            params = {"authority": authority, "error": result.get("error") or ""}
+            return HttpResponseRedirect(f"{fail_url}?{urlencode(params)}")
+
+        if attempt.order_id:
+            Order.bulk_transition([attempt.order_id], "paid", note=f"zarinpal:{attempt.ref_id}")
+        params = {"order": attempt.order_id or "", "ref_id": attempt.ref_id}
+        return HttpResponseRedirect(f"{settings.ZARINPAL_SUCCESS_REDIRECT}?{urlencode(params)}")
+
+    @staticmethod
+    def _body_cart_lines(body_cart):
+        """
+        [{product_id, qty, variant_id?}, ...] → [{"product", "qty", "variant"}]؛ ورودی نامعتبر → None.
+        شناسه‌ها ممکن است رشته باشند (فرم/JSON)؛ کلیدهای in_bulk عددی‌اند.
+        """
+        rows = []
+        try:
+            for item in body_cart:
+                pid = int(item.get("product_id") or 0)
+                vid = item.get("variant_id")
+                vid = int(vid) if vid not in (None, "") else None
+                qty = int(item.get("qty") or item.get("quantity") or 1)
+                rows.append((pid, vid, qty))
+        except (TypeError, ValueError, AttributeError):
+            return None
+
+        product_ids = [pid for pid, _vid, _qty in rows if pid]
+        products = Product.objects.prefetch_related("gallery").in_bulk(product_ids)
+
+        variant_ids = [vid for _pid, vid, _qty in rows if vid]
+        variants = (
+            ProductVariant.objects.select_related("color", "size").in_bulk(variant_ids)
+            if variant_ids else {}
+        )
+
+        lines = []
+        for pid, vid, qty in rows:
+            if pid in products and qty > 0:
+                variant = variants.get(vid)
+                if variant is not None and variant.product_id != pid:
+                    variant = None
+                lines.append({"product": products[pid], "qty": qty, "variant": variant})
+        return lines
+
     # ============================
     #  Checkout – پرداخت درب منزل (COD)
     # ============================
@@ -120,8 +233,7 @@ class OrderViewSet(viewsets.ModelViewSet):
     @action(
         detail=False,
         methods=["post"],
-        permission_classes=[AllowAny],      # برای تست لوکال
-        authentication_classes=[],          # در تولید حذف شود
+        permission_classes=[AllowAny],      # مهمان مجاز؛ با توکن، کاربر لاگین‌شده شناخته می‌شود
         url_path="checkout",
     )
     def checkout(self, request):
@@ -129,19 +241,16 @@ class OrderViewSet(viewsets.ModelViewSet):
         سفارش را می‌سازد و پرداخت را «درب منزل» قرار می‌دهد.
         انتظار بدنه:
         {
-          "cart":[{"product_id":1,"qty":2}, ...],
+          "cart":[{"product_id":1,"qty":2,"variant_id":5?}, ...],
           "customer":{"first_name":"...","last_name":"","email":"","phone":"0912..."},
           "shipping_address":{"line1":"...","city":""},
-          "shipping_method":"post"
+          "shipping_method":"post",
+          "coupon":"CODE"   ← اختیاری
         }
         """
         # 1) تعیین کاربر و سبد
         if request.user.is_authenticated:
             order_user = request.user
-            cart_qs = CartItem.objects.filter(
-                **user_filter(CartItem, order_user)
-            ).select_related("product")
-            cart_list = [{"product": ci.product, "qty": ci.quantity} for ci in cart_qs]
         else:
             User = get_user_model()
             guest_id = int(getattr(settings, "GUEST_USER_ID", 1))
@@ -152,21 +261,29 @@ class OrderViewSet(viewsets.ModelViewSet):
                     status=400,
                 )
 
-            body_cart = request.data.get("cart") or []
-            if not isinstance(body_cart, list) or not body_cart:
-                return Response({"detail": "Cart is empty. Send: cart: [{product_id, qty}]."}, status=400)
-
-            product_ids = [item.get("product_id") for item in body_cart if item.get("product_id")]
-            products = Product.objects.in_bulk(product_ids)
-
-            cart_list = []
-            for item in body_cart:
-                pid = item.get("product_id")
-                qty = int(item.get("qty") or item.get("quantity") or 1)
-                if pid in products and qty > 0:
-                    cart_list.append({"product": products[pid], "qty": qty})
-
-            cart_qs = None  # مهمان
+        # سبد بدنه (فرانت برای مهمان و کاربر لاگین‌شده می‌فرستد) اولویت دارد؛
+        # فقط کاربر لاگین‌شده بدون cart در بدنه از CartItem سمت سرور خوانده می‌شود
+        body_cart = request.data.get("cart")
+        cart_qs = None
+        if body_cart:
+            if not isinstance(body_cart, list):
+                return Response(
+                    {"detail": "cart must be a list of {product_id, qty, variant_id?}", "error": "CART_INVALID"},
+                    status=400,
+                )
+            cart_list = self._body_cart_lines(body_cart)
+            if cart_list is None:
+                return Response(
+                    {"detail": "cart items need integer product_id, variant_id and qty", "error": "CART_INVALID"},
+                    status=400,
+                )
+        elif request.user.is_authenticated:
+            cart_qs = CartItem.objects.filter(
+                **user_filter(CartItem, order_user)
+            ).select_related("product").prefetch_related("product__gallery")
+            cart_list = [{"product": ci.product, "qty": ci.quantity, "variant": None} for ci in cart_qs]
+        else:
+            return Response({"detail": "Cart is empty. Send: cart: [{product_id, qty}]."}, status=400)
 
         if not cart_list:
             return Response({"detail": "Cart is empty"}, status=400)
@@ -188,6 +305,28 @@ class OrderViewSet(viewsets.ModelViewSet):
             or 0
         )
 
+        # کوپن (اختیاری) پیش از ساخت سفارش اعتبارسنجی می‌شود؛ مصرف اتمیک بعد از محاسبهٔ جمع
+        coupon_code = (request.data.get("coupon") or request.data.get("coupon_code") or "").strip()
+        coupon = None
+        redeemer = ""
+        if coupon_code:
+            coupon = get_coupon(coupon_code)
+            if coupon is None or not coupon.is_valid():
+                return Response({"detail": "Invalid coupon", "error": "COUPON_INVALID"}, status=400)
+            # once_per_customer: کاربر لاگین‌شده با user، مهمان با تلفن/ایمیل
+            customer = request.data.get("customer")
+            customer = customer if isinstance(customer, dict) else {}
+            redeemer = customer_key(
+                customer.get("phone") or request.data.get("phone"),
+                customer.get("email") or request.data.get("email")
+                or (request.user.email if request.user.is_authenticated else ""),
+            )
+            if coupon.once_per_customer and not redeemer and not request.user.is_authenticated:
+                return Response(
+                    {"detail": "Coupon needs customer phone or email", "error": "COUPON_CUSTOMER_REQUIRED"},
+                    status=400,
+                )
+
         # 3) ساخت سفارش (پرداخت COD)
         order = Order.objects.create(
             user=order_user,
@@ -197,15 +336,35 @@ class OrderViewSet(viewsets.ModelViewSet):
         )
 
         total = 0
+        order_items = []
         for row in cart_list:
             product = row["product"]
             qty = row["qty"]
             price = getattr(product, "discount_price", None) or product.price
-            OrderItem.objects.create(order=order, product=product, price=price, quantity=qty)
+            order_items.append(OrderItem(
+                order=order, product=product, price=price, quantity=qty,
+                **OrderItem.snapshot_fields(product, row.get("variant")),
+            ))
             total += price * qty
+        OrderItem.objects.bulk_create(order_items)
+
+        discount = 0
+        if coupon is not None:
+            discount = coupon.discount_for(total)
+            try:
+                coupon.redeem(
+                    order=order,
+                    user=request.user if request.user.is_authenticated else None,
+                    customer=redeemer,
+                    discount_amount=discount,
+                )
+            except CouponError as e:
+                transaction.set_rollback(True)
+                return Response({"detail": "Coupon could not be applied", "error": e.code}, status=400)
 
         order.items_subtotal = total
-        order.total_amount = total + (order.shipping_cost or 0)
+        order.discount_amount = discount
+        order.total_amount = max(total - discount, 0) + (order.shipping_cost or 0)
 
         # اگر مدل Order فیلد status دارد، وضعیت را مناسب COD بگذار
         if hasattr(order, "status"):
@@ -220,7 +379,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         except Exception:
             pass
 
-        order.save(update_fields=["items_subtotal", "total_amount", "status", "tracking_code"])
+        order.save(update_fields=["items_subtotal", "discount_amount", "total_amount", "status", "tracking_code"])
 
         # اگر کاربر لاگین بود، سبد را خالی کن
         if cart_qs is not None:
@@ -231,9 +390,96 @@ class OrderViewSet(viewsets.ModelViewSet):
             {
                 "ok": True,
                 "order_id": order.id,
+                "discount_amount": int(order.discount_amount),
                 "total_amount": int(order.total_amount),
                 "payment_method": "cod",
                 "status": getattr(order, "status", "pending"),
             },
             status=201,
         )
+
+
+# ============================
+#  پنل سفارش‌های ادمین
+# ============================
+class StaffOrderPagination(CursorPagination):
+    """صفحه‌بندی keyset روی (created_at, id) به جای OFFSET روی کل جدول"""
+    ordering = ("-created_at", "-id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+
+class StaffOrderViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    GET /api/staff/orders/?status=&created_from=&created_to=&shipping_method=&user=&tracking_code=
+    خروجی: results + next/previous (cursor) + counts (تعداد هر وضعیت با همین فیلترها)
+    """
+    serializer_class = OrderSerializer
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = StaffOrderPagination
+
+    def get_queryset(self):
+        qs = Order.objects.select_related("user").prefetch_related("items")
+        return filter_orders(qs, self.request.query_params)
+
+    def status_counts(self):
+        # شمارش بدون فیلتر وضعیت تا تب‌های وضعیت در پنل، عدد همهٔ وضعیت‌ها را نشان دهند
+        base = filter_orders(Order.objects.all(), self.request.query_params, with_status=False)
+        rows = base.order_by().values("status").annotate(n=Count("id"))
+        counts = {key: 0 for key, _ in Order.STATUS_CHOICES}
+        for row in rows:
+            counts[row["status"]] = row["n"]
+        counts["all"] = sum(counts.values())
+        return counts
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        response.data["counts"] = self.status_counts()
+        return response
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        """
+        GET /api/staff/orders/export/?output=csv|jsonl&after=<cursor>&chunk_size=2000 (+ همان فیلترهای لیست)
+        خروجی جریانی؛ برای ادامه، مقدار ستون cursor آخرین سطر دریافتی را در ?after= بفرستید.
+        """
+        fmt = request.query_params.get("output") or "csv"
+        if fmt not in EXPORT_FORMATS:
+            return Response({"detail": f"output must be one of {EXPORT_FORMATS}"}, status=400)
+        try:
+            chunk_size = max(100, min(int(request.query_params.get("chunk_size") or 2000), 10000))
+        except ValueError:
+            return Response({"detail": "chunk_size must be an integer"}, status=400)
+
+        qs = export_queryset(request.query_params)
+        content_type = "text/csv; charset=utf-8" if fmt == "csv" else "application/x-ndjson; charset=utf-8"
+        response = StreamingHttpResponse(stream_export(qs, fmt, chunk_size), content_type=content_type)
+        stamp = timezone.localtime().strftime("%Y%m%d-%H%M%S")
+        response["Content-Disposition"] = f'attachment; filename="orders-{stamp}.{fmt}"'
+        return response
+
+    @action(detail=False, methods=["post"], url_path="bulk-transition")
+    def bulk_transition(self, request):
+        """
+        POST /api/staff/orders/bulk-transition/
+        body: {"ids": [1, 2, ...], "status": "shipped", "note": "..."}
+        """
+        ids = request.data.get("ids") or []
+        to_status = request.data.get("status")
+        if not isinstance(ids, list) or not ids:
+            return Response({"detail": "ids required"}, status=400)
+        if to_status not in dict(Order.STATUS_CHOICES):
+            return Response({"detail": "invalid status"}, status=400)
+        try:
+            result = Order.bulk_transition(
+                ids, to_status, actor=request.user, note=str(request.data.get("note") or "")[:255]
+            )
+        except (TypeError, ValueError):
+            return Response({"detail": "ids must be integers"}, status=400)
+        return Response({
+            "status": to_status,
+            "updated": len(result["updated"]),
+            "updated_ids": result["updated"],
+            "skipped": result["skipped"],
+        })
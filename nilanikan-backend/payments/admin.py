@@ -0,0 +1,12 @@
+from django.contrib import admin
+from .models import PaymentAttempt
+
+
+@admin.register(PaymentAttempt)
+class PaymentAttemptAdmin(admin.ModelAdmin):
+    list_display = ("id", "order", "authority", "amount", "status", "ref_id", "created_at", "verified_at")
+    list_filter = ("status", "created_at")
+    search_fields = ("authority", "ref_id", "order__id")
+    readonly_fields = ("response", "created_at", "updated_at", "verified_at")
+    raw_id_fields = ("order",)
+    ordering = ("-id",)
@@ -0,0 +1,141 @@
+# nilanikan-backend/payments/fake_gateway.py
+"""
+درگاه جعلی زرین‌پال (v4) برای تست آفلاین و سنجش throughput:
+
+    POST /pg/v4/payment/request.json  → authority جدید
+    POST /pg/v4/payment/verify.json   → 100 (اولین بار) / 101 (تکراری) یا خطا
+    GET  /pg/StartPay/<authority>     → فقط یک صفحهٔ ساده
+
+با latency، jitter، نرخ خطای HTTP (503) و نرخ «پرداخت‌نشده» (-51) قابل تنظیم.
+استفاده:
+    python manage.py fake_zarinpal --port 8765 --latency-ms 150 --unpaid-rate 0.2
+    ZARINPAL_API_BASE=http://127.0.0.1:8765/pg/v4/payment
+"""
+import json
+import random
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+API_PREFIX = "/pg/v4/payment"
+
+
+class FakeZarinpal:
+    def __init__(self, host="127.0.0.1", port=0, *, latency_ms=0, jitter_ms=0,
+                 http_error_rate=0.0, unpaid_rate=0.0, error_code=-51, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.http_error_rate = http_error_rate
+        self.unpaid_rate = unpaid_rate
+        self.error_code = error_code
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.payments = {}  # authority -> {"amount", "paid", "verified", "ref_id"}
+        self.stats = {"request": 0, "verify": 0, "http_errors": 0}
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    # ---------- lifecycle ----------
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_base(self):
+        return f"{self.base_url}{API_PREFIX}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    # ---------- منطق درگاه ----------
+    def _sleep(self):
+        delay = self.latency_ms + (self.random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+    def handle_request(self, body):
+        amount = body.get("amount")
+        if not body.get("merchant_id") or not isinstance(amount, int) or amount <= 0:
+            return {"data": [], "errors": {"code": -9, "message": "The input params invalid, validation error."}}
+        authority = "A" + secrets.token_hex(18)[:35]
+        with self.lock:
+            self.stats["request"] += 1
+            paid = self.random.random() >= self.unpaid_rate
+            self.payments[authority] = {"amount": amount, "paid": paid, "verified": False, "ref_id": None}
+        return {
+            "data": {"code": 100, "message": "Success", "authority": authority, "fee_type": "Merchant", "fee": 0},
+            "errors": [],
+        }
+
+    def handle_verify(self, body):
+        authority = body.get("authority")
+        with self.lock:
+            self.stats["verify"] += 1
+            p = self.payments.get(authority)
+            if p is None:
+                return {"data": [], "errors": {"code": -54, "message": "Invalid authority."}}
+            if p["amount"] != body.get("amount"):
+                return {"data": [], "errors": {"code": -50, "message": "Session is not valid, amounts values is not the same."}}
+            if not p["paid"]:
+                return {"data": [], "errors": {"code": self.error_code, "message": "Session is not valid, session is not active paid try."}}
+            code = 101 if p["verified"] else 100
+            if not p["verified"]:
+                p["verified"] = True
+                p["ref_id"] = self.random.randint(10 ** 8, 10 ** 9)
+            ref_id = p["ref_id"]
+        return {
+            "data": {
+                "code": code, "message": "Verified" if code == 100 else "Paid",
+                "card_pan": "502229******5995", "card_hash": secrets.token_hex(16),
+                "ref_id": ref_id, "fee_type": "Merchant", "fee": 0,
+            },
+            "errors": [],
+        }
+
+    def _handler_class(gateway):
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive برای Session سمت کلاینت
+
+            def log_message(self, fmt, *args):
+                return
+
+            def _send(self, status, payload, content_type="application/json"):
+                raw = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    body = {}
+                gateway._sleep()
+                if gateway.http_error_rate and gateway.random.random() < gateway.http_error_rate:
+                    with gateway.lock:
+                        gateway.stats["http_errors"] += 1
+                    return self._send(503, {"message": "Service Unavailable"})
+                if self.path == f"{API_PREFIX}/request.json":
+                    return self._send(200, gateway.handle_request(body))
+                if self.path == f"{API_PREFIX}/verify.json":
+                    return self._send(200, gateway.handle_verify(body))
+                return self._send(404, {"message": "Not Found"})
+
+            def do_GET(self):
+                if self.path.startswith("/pg/StartPay/"):
+                    return self._send(200, b"<h1>Fake Zarinpal</h1>", "text/html; charset=utf-8")
+                return self._send(404, {"message": "Not Found"})
+
+        return Handler
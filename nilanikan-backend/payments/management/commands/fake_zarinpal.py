@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from payments.fake_gateway import FakeZarinpal
+
+
+class Command(BaseCommand):
+    help = "اجرای درگاه جعلی زرین‌پال روی لوکال (برای تست آفلاین پرداخت و reconcile_payments)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--latency-ms", type=int, default=0)
+        parser.add_argument("--jitter-ms", type=int, default=0)
+        parser.add_argument("--http-error-rate", type=float, default=0.0, help="نسبت پاسخ‌های 503")
+        parser.add_argument("--unpaid-rate", type=float, default=0.0, help="نسبت پرداخت‌های ناموفق (verify → --error-code)")
+        parser.add_argument(
+            "--error-code", type=int, default=-51,
+            help="کد خطای verify برای پرداخت‌های ناموفق (مثلاً -51، -54 یا کد ناشناخته برای تست reconcile)",
+        )
+
+    def handle(self, *args, **opts):
+        gw = FakeZarinpal(
+            opts["host"], opts["port"],
+            latency_ms=opts["latency_ms"], jitter_ms=opts["jitter_ms"],
+            http_error_rate=opts["http_error_rate"], unpaid_rate=opts["unpaid_rate"],
+            error_code=opts["error_code"],
+        ).start()
+        self.stdout.write(self.style.SUCCESS(f"Fake Zarinpal: ZARINPAL_API_BASE={gw.api_base}"))
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            gw.stop()
+            self.stdout.write(f"stats: {gw.stats}")
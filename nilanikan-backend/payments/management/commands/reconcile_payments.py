@@ -0,0 +1,125 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from orders.models import Order
+from payments import zarinpal
+from payments.models import PaymentAttempt
+
+
+class Command(BaseCommand):
+    help = "verify هم‌زمان تلاش‌های پرداختِ معلقِ قدیمی (callback ازدست‌رفته) و به‌روزرسانی گروهی سفارش‌ها"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stale-minutes", type=int, default=15, help="فقط تلاش‌های قدیمی‌تر از این")
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument("--workers", type=int, default=8, help="حداکثر درخواست هم‌زمان به درگاه")
+        parser.add_argument("--limit", type=int, default=0, help="حداکثر تعداد کل (۰ یعنی همه)")
+        parser.add_argument("--cancel-failed", action="store_true",
+                            help="سفارشِ تلاش‌هایی که درگاه قطعاً رد کرده را (اگر هنوز pending است) لغو کن")
+        parser.add_argument("--recheck-failed-days", type=int, default=7,
+                            help="تلاش‌های FAILED این چند روز اخیر که ردِ قطعی درگاه نبوده‌اند دوباره verify شوند")
+        parser.add_argument("--gateway-base", default="", help="مثلاً آدرس درگاه جعلی: http://127.0.0.1:8765/pg/v4/payment")
+
+    def handle(self, *args, **opts):
+        if opts["gateway_base"]:
+            zarinpal.API_BASE = opts["gateway_base"].rstrip("/")
+
+        cutoff = timezone.now() - timedelta(minutes=opts["stale_minutes"])
+        reopened = self.reopen_uncertain_failures(cutoff, opts["recheck_failed_days"])
+        if reopened:
+            self.stdout.write(f"{reopened} تلاش FAILED بدون ردِ قطعی درگاه دوباره PENDING شد")
+        base = PaymentAttempt.objects.filter(status=PaymentAttempt.Status.PENDING, created_at__lt=cutoff)
+        batch_size, limit = max(1, opts["batch_size"]), opts["limit"]
+        totals = {"checked": 0, "verified": 0, "failed": 0, "errors": 0, "orders_paid": 0, "orders_canceled": 0}
+
+        started = time.monotonic()
+        last_id = 0
+        with ThreadPoolExecutor(max_workers=max(1, opts["workers"])) as pool:
+            while True:
+                size = batch_size if not limit else min(batch_size, limit - totals["checked"])
+                if size <= 0:
+                    break
+                batch = list(base.filter(pk__gt=last_id).order_by("pk")[:size])
+                if not batch:
+                    break
+                last_id = batch[-1].pk
+
+                # فقط HTTP در threadها؛ همهٔ نوشتن‌ها بعداً در همین thread و به‌صورت گروهی
+                results = list(pool.map(
+                    lambda a: zarinpal.verify_payment_with_amount(a.authority, a.amount), batch
+                ))
+                self.apply_batch(batch, results, totals, opts["cancel_failed"])
+                self.stdout.write(
+                    f"batch تا id={last_id}: checked={totals['checked']} verified={totals['verified']} "
+                    f"failed={totals['failed']} errors={totals['errors']}"
+                )
+
+        elapsed = time.monotonic() - started
+        rate = totals["checked"] / elapsed if elapsed > 0 else 0
+        self.stdout.write(self.style.SUCCESS(
+            " | ".join(f"{k}={v}" for k, v in totals.items()) + f" | {elapsed:.2f}s ({rate:.1f}/s)"
+        ))
+
+    def reopen_uncertain_failures(self, cutoff, days):
+        """
+        FAILEDهایی که با خطای انتقال/5xx یا پاسخ بی‌کد ثبت شده‌اند (پیش از اصلاح نگاشت verify)
+        ممکن است پرداخت موفق باشند: به PENDING برمی‌گردند تا در همین اجرا دوباره verify شوند.
+        """
+        if days <= 0:
+            return 0
+        failed = PaymentAttempt.objects.filter(
+            status=PaymentAttempt.Status.FAILED,
+            created_at__gte=timezone.now() - timedelta(days=days),
+            created_at__lt=cutoff,
+        )
+        uncertain = [
+            pk for pk, response in failed.values_list("pk", "response").iterator(chunk_size=2000)
+            if not zarinpal.is_definitive_failure(response)
+        ]
+        if not uncertain:
+            return 0
+        return PaymentAttempt.objects.filter(pk__in=uncertain, status=PaymentAttempt.Status.FAILED).update(
+            status=PaymentAttempt.Status.PENDING, updated_at=timezone.now()
+        )
+
+    def apply_batch(self, batch, results, totals, cancel_failed):
+        changed, paid_orders, failed_orders = [], [], []
+        for attempt, result in zip(batch, results):
+            totals["checked"] += 1
+            if result.get("error") == "NETWORK_ERROR":
+                totals["errors"] += 1  # وضعیت تغییر نمی‌کند؛ اجرای بعدی دوباره امتحان می‌کند
+                continue
+            zarinpal.apply_verify_result(attempt, result)
+            changed.append(attempt)
+            if attempt.status == PaymentAttempt.Status.VERIFIED:
+                totals["verified"] += 1
+                if attempt.order_id:
+                    paid_orders.append(attempt.order_id)
+            else:
+                totals["failed"] += 1
+                # فقط ردِ قطعی درگاه سفارش را لغو می‌کند
+                if attempt.order_id and zarinpal.is_definitive_failure(result):
+                    failed_orders.append(attempt.order_id)
+
+        with transaction.atomic():
+            PaymentAttempt.objects.bulk_update(changed, zarinpal.VERIFY_RESULT_FIELDS)
+            if paid_orders:
+                res = Order.bulk_transition(paid_orders, "paid", note="zarinpal:reconcile")
+                totals["orders_paid"] += len(res["updated"])
+            if cancel_failed and failed_orders:
+                # سفارشی که تلاش معلق یا موفق دیگری دارد لغو نمی‌شود
+                busy = set(
+                    PaymentAttempt.objects.filter(
+                        order_id__in=failed_orders,
+                        status__in=[PaymentAttempt.Status.PENDING, PaymentAttempt.Status.VERIFIED],
+                    ).values_list("order_id", flat=True)
+                )
+                to_cancel = [pk for pk in failed_orders if pk not in busy]
+                if to_cancel:
+                    res = Order.bulk_transition(to_cancel, "canceled", note="zarinpal:reconcile")
+                    totals["orders_canceled"] += len(res["updated"])
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.14 on 2026-10-19 15:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('orders', '0009_order_discount_amount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('authority', models.CharField(max_length=64, unique=True)),
+                ('amount', models.PositiveBigIntegerField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('VERIFIED', 'Verified'), ('FAILED', 'Failed'), ('CANCELED', 'Canceled')], default='PENDING', max_length=10)),
+                ('ref_id', models.CharField(blank=True, default='', max_length=64)),
+                ('card_pan', models.CharField(blank=True, default='', max_length=32)),
+                ('response', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('verified_at', models.DateTimeField(blank=True, null=True)),
+                ('order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='payment_attempts', to='orders.order')),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.14 on 2026-10-19 15:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='paymentattempt',
+            index=models.Index(fields=['status', 'created_at'], name='payattempt_status_created_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import models
+
+
+class PaymentAttempt(models.Model):
+    """
+    هر درخواست پرداخت زرین‌پال (authority ↔ مبلغ ↔ سفارش).
+    جایگزین دیکشنری درون‌پردازه‌ای: بین workerها مشترک است و با ری‌استارت از بین نمی‌رود.
+    """
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        VERIFIED = "VERIFIED", "Verified"
+        FAILED = "FAILED", "Failed"
+        CANCELED = "CANCELED", "Canceled"
+
+    order = models.ForeignKey(
+        "orders.Order", on_delete=models.CASCADE, null=True, blank=True, related_name="payment_attempts"
+    )
+    authority = models.CharField(max_length=64, unique=True)
+    amount = models.PositiveBigIntegerField()  # تومان (IRT)، همان مقداری که به درگاه فرستاده شد
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    ref_id = models.CharField(max_length=64, blank=True, default="")
+    card_pan = models.CharField(max_length=32, blank=True, default="")
+    response = models.JSONField(default=dict, blank=True)  # آخرین پاسخ درگاه
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    verified_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        # اسکن تلاش‌های معلق قدیمی در reconcile_payments
+        indexes = [models.Index(fields=["status", "created_at"], name="payattempt_status_created_idx")]
+
+    def __str__(self):
+        return f"{self.authority} - {self.amount} - {self.status}"
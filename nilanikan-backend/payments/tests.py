@@ -0,0 +1,109 @@
+from unittest import mock
+
+import requests
+from django.test import TestCase
+
+from payments import zarinpal
+from payments.fake_gateway import FakeZarinpal
+from payments.models import PaymentAttempt
+
+
+def _response(status, body: bytes):
+    r = requests.Response()
+    r.status_code = status
+    r._content = body
+    return r
+
+
+class GatewayTestMixin:
+    gateway_options = {}
+
+    def setUp(self):
+        self.gateway = FakeZarinpal(seed=1, **self.gateway_options)
+        self.gateway.start()
+        self.addCleanup(self.gateway.stop)
+        patcher = mock.patch.object(zarinpal, "API_BASE", self.gateway.api_base)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_attempt(self, amount=50000):
+        result = zarinpal.request_payment(amount, "test", "http://localhost/callback")
+        self.assertTrue(result["ok"], result)
+        return PaymentAttempt.objects.get(authority=result["authority"])
+
+
+class VerifyPaidTests(GatewayTestMixin, TestCase):
+    def test_paid_attempt_is_verified_once(self):
+        attempt = self.create_attempt()
+
+        result = zarinpal.verify_payment(attempt.authority)
+
+        self.assertTrue(result["ok"])
+        self.assertEqual(result["code"], 100)
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.status, PaymentAttempt.Status.VERIFIED)
+        self.assertTrue(attempt.ref_id)
+
+        # verify دوم از DB جواب می‌دهد و درگاه دوباره صدا زده نمی‌شود
+        again = zarinpal.verify_payment(attempt.authority)
+        self.assertEqual(again["code"], 101)
+        self.assertEqual(self.gateway.stats["verify"], 1)
+
+    def test_unknown_authority(self):
+        result = zarinpal.verify_payment("A-missing")
+        self.assertEqual(result["error"], "AMOUNT_NOT_FOUND")
+
+
+class VerifyRejectedTests(GatewayTestMixin, TestCase):
+    gateway_options = {"unpaid_rate": 1.0, "error_code": -51}
+
+    def test_gateway_error_code_fails_attempt(self):
+        attempt = self.create_attempt()
+
+        result = zarinpal.verify_payment(attempt.authority)
+
+        self.assertEqual(result["error"], "VERIFY_FAILED")
+        self.assertEqual(result["code"], -51)
+        self.assertTrue(zarinpal.is_definitive_failure(result))
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.status, PaymentAttempt.Status.FAILED)
+
+
+class VerifyTransientTests(TestCase):
+    """پاسخ‌هایی که نتیجهٔ پرداخت را معلوم نمی‌کنند attempt را PENDING نگه می‌دارند"""
+
+    def setUp(self):
+        self.attempt = PaymentAttempt.objects.create(authority="A1", amount=50000)
+
+    def verify_with(self, **post):
+        with mock.patch.object(zarinpal._verify_session, "post", **post):
+            return zarinpal.verify_payment(self.attempt.authority)
+
+    def assertStillPending(self, result):
+        self.assertFalse(result["ok"])
+        self.assertEqual(result["error"], "NETWORK_ERROR")
+        self.assertFalse(zarinpal.is_definitive_failure(result))
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.status, PaymentAttempt.Status.PENDING)
+
+    def test_connection_error(self):
+        self.assertStillPending(self.verify_with(side_effect=requests.ConnectionError("refused")))
+
+    def test_5xx_html_body(self):
+        self.assertStillPending(self.verify_with(return_value=_response(502, b"<html>Bad Gateway</html>")))
+
+    def test_5xx_with_error_code(self):
+        body = b'{"data": [], "errors": {"code": -9, "message": "x"}}'
+        self.assertStillPending(self.verify_with(return_value=_response(500, body)))
+
+    def test_body_without_data_or_errors(self):
+        self.assertStillPending(self.verify_with(return_value=_response(200, b"{}")))
+
+    def test_4xx_with_error_code_is_definitive(self):
+        body = b'{"data": [], "errors": {"code": -54, "message": "Invalid authority."}}'
+        result = self.verify_with(return_value=_response(404, body))
+
+        self.assertEqual(result["error"], "VERIFY_FAILED")
+        self.assertTrue(zarinpal.is_definitive_failure(result))
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.status, PaymentAttempt.Status.FAILED)
@@ -2,13 +2,20 @@
 import os
 import requests
 from decimal import Decimal
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from django.utils import timezone
+
+from .models import PaymentAttempt
 
 # ========= تنظیمات =========
 MERCHANT_ID = os.getenv("ZARINPAL_MERCHANT_ID", "7be9a33e-e18b-4731-9320-99c4a1053e92")
 MODE = os.getenv("ZARINPAL_MODE", "sandbox").lower()  # "production" | "sandbox"
 TIMEOUT = 12
 
-API_BASE = (
+# ZARINPAL_API_BASE برای اشاره به درگاه محلی (payments/fake_gateway.py) در تست آفلاین
+API_BASE = os.getenv("ZARINPAL_API_BASE") or (
     "https://api.zarinpal.com/pg/v4/payment"
     if MODE == "production" else
     "https://sandbox.zarinpal.com/pg/v4/payment"
@@ -19,8 +26,31 @@ STARTPAY_BASE = (
     "https://sandbox.zarinpal.com/pg/StartPay/"
 )
 
-# جهت ساده‌سازی، مقدار پرداخت را با authority نگه می‌داریم تا در verify الزامیِ زرین‌پال استفاده شود
-_pending_amounts = {}
+
+def _build_session(*, retry_reads: bool) -> requests.Session:
+    """
+    Session مشترک با connection pool و keep-alive.
+    retry محدود با backoff روی خطای اتصال (درخواست به درگاه نرسیده) برای همهٔ POSTها.
+    retry_reads: خطای read و 502/503/504 هم تکرار شود — فقط برای verify که تکرارپذیر است
+    (کد 101 برمی‌گرداند)؛ request.json تکرار نمی‌شود تا authority دوم ساخته نشود.
+    """
+    retry = Retry(
+        total=3, connect=3, read=1 if retry_reads else 0, status=2 if retry_reads else 0,
+        backoff_factor=0.5,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"POST"}) if retry_reads else Retry.DEFAULT_ALLOWED_METHODS,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=int(os.getenv("ZARINPAL_POOL_SIZE", "10")), max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Accept": "application/json"})
+    return session
+
+
+_session = _build_session(retry_reads=False)
+_verify_session = _build_session(retry_reads=True)
 
 def _to_int_amount(amount):
     """
@@ -33,11 +63,16 @@ def _to_int_amount(amount):
         return int(amount.quantize(Decimal("1")))
     return int(Decimal(str(amount)).quantize(Decimal("1")))
 
-def request_payment(amount, description, callback_url, email=None, mobile=None):
+def _section(data, key):
+    value = data.get(key) if isinstance(data, dict) else None
+    return value if isinstance(value, dict) else {}
+
+def request_payment(amount, description, callback_url, email=None, mobile=None, order=None):
     """
     amount: عدد صحیح تومان (IRT) – مثال: 50000
     description: توضیح پرداخت
     callback_url: آدرس بازگشت
+    order: سفارش مرتبط (اختیاری)؛ authority و مبلغ در PaymentAttempt ذخیره می‌شوند
     """
     amt = _to_int_amount(amount)
 
@@ -54,15 +89,17 @@ def request_payment(amount, description, callback_url, email=None, mobile=None):
         payload["metadata"]["mobile"] = mobile
 
     try:
-        r = requests.post(f"{API_BASE}/request.json", json=payload, timeout=TIMEOUT)
+        r = _session.post(f"{API_BASE}/request.json", json=payload, timeout=TIMEOUT)
         data = r.json()
     except Exception as e:
         return {"ok": False, "error": "NETWORK_ERROR", "detail": str(e)}
 
-    # پاسخ v4: {'data': {...}, 'errors': {...}}
-    if data.get("data", {}).get("code") == 100:
-        authority = data["data"]["authority"]
-        _pending_amounts[authority] = amt  # برای verify نیاز است
+    # پاسخ v4: {'data': {...}, 'errors': {...}} — طرف خالی به شکل [] می‌آید
+    d = _section(data, "data")
+    if d.get("code") == 100:
+        authority = d["authority"]
+        # برای verify نیاز است؛ در DB تا callback روی هر workerی پیدا شود
+        PaymentAttempt.objects.create(order=order, authority=authority, amount=amt, response=data)
         return {
             "ok": True,
             "authority": authority,
@@ -75,22 +112,59 @@ def request_payment(amount, description, callback_url, email=None, mobile=None):
     return {
         "ok": False,
         "error": "REQUEST_FAILED",
-        "code": data.get("errors", {}).get("code"),
-        "message": data.get("errors", {}).get("message"),
+        "code": _section(data, "errors").get("code"),
+        "message": _section(data, "errors").get("message"),
         "raw": data
     }
 
 def verify_payment(authority):
     """
     توجه: در v4، verify نیاز به amount دارد.
-    این تابع مقدار را از کش موقت ما برمی‌دارد (که در request_payment ذخیره شده).
-    اگر در جریان واقعی مقدار را از DB نگه می‌دارید، بهتر است verify_payment_with_amount را صدا بزنید.
+    مبلغ از PaymentAttempt (ذخیره‌شده در request_payment) خوانده می‌شود و نتیجه روی همان رکورد ثبت می‌شود.
     """
-    amt = _pending_amounts.get(authority)
-    if not amt:
-        return {"ok": False, "error": "AMOUNT_NOT_FOUND", "message": "Amount for this authority not found. Store amount per order and use verify_payment_with_amount(authority, amount)."}
+    attempt = PaymentAttempt.objects.filter(authority=authority).first()
+    if attempt is None:
+        return {"ok": False, "error": "AMOUNT_NOT_FOUND", "message": "No payment attempt for this authority."}
+
+    if attempt.status == PaymentAttempt.Status.VERIFIED:
+        return {
+            "ok": True, "code": 101, "ref_id": attempt.ref_id, "card_pan": attempt.card_pan,
+            "message": "Already Verified", "attempt": attempt,
+        }
+
+    result = verify_payment_with_amount(authority, attempt.amount)
+    apply_verify_result(attempt, result)
+    attempt.save(update_fields=VERIFY_RESULT_FIELDS)
+    return {**result, "attempt": attempt}
+
 
-    return verify_payment_with_amount(authority, amt)
+VERIFY_RESULT_FIELDS = ["status", "ref_id", "card_pan", "verified_at", "response", "updated_at"]
+
+
+def apply_verify_result(attempt, result):
+    """
+    نتیجهٔ verify را روی PaymentAttempt (در حافظه) اعمال می‌کند؛ ذخیره با فراخواننده است
+    (save تکی یا bulk_update روی VERIFY_RESULT_FIELDS). خطای شبکه وضعیت را تغییر نمی‌دهد.
+    """
+    if result.get("ok"):
+        attempt.status = PaymentAttempt.Status.VERIFIED
+        attempt.ref_id = str(result.get("ref_id") or "")
+        attempt.card_pan = str(result.get("card_pan") or "")
+        attempt.verified_at = timezone.now()
+    elif result.get("error") == "VERIFY_FAILED":
+        attempt.status = PaymentAttempt.Status.FAILED
+    attempt.response = {k: v for k, v in result.items() if k != "attempt"}
+    attempt.updated_at = timezone.now()
+    return attempt
+
+def is_definitive_failure(result) -> bool:
+    """رد قطعی درگاه (کد خطای عددی در پاسخ غیر 5xx)؛ بقیهٔ شکست‌ها ممکن است پرداخت موفق باشند"""
+    result = result or {}
+    return (
+        result.get("error") == "VERIFY_FAILED"
+        and isinstance(result.get("code"), int)
+        and (result.get("http_status") or 200) < 500
+    )
 
 def verify_payment_with_amount(authority, amount):
     """
@@ -105,21 +179,22 @@ def verify_payment_with_amount(authority, amount):
     }
 
     try:
-        r = requests.post(f"{API_BASE}/verify.json", json=payload, timeout=TIMEOUT)
-        data = r.json()
+        r = _verify_session.post(f"{API_BASE}/verify.json", json=payload, timeout=TIMEOUT)
     except Exception as e:
         return {"ok": False, "error": "NETWORK_ERROR", "detail": str(e)}
+    try:
+        data = r.json()
+    except ValueError:
+        data = None
 
     # موفق: code == 100 (پرداخت موفق) یا 101 (تراکنش قبلاً تأیید شده)
-    d = data.get("data", {})
+    d = _section(data, "data")
     code = d.get("code")
     if code in (100, 101):
         ref_id = d.get("ref_id")
         card_pan = d.get("card_pan")
         fee_type = d.get("fee_type")
         fee = d.get("fee")
-        # پاک کردن کش موقت
-        _pending_amounts.pop(authority, None)
         return {
             "ok": True,
             "code": code,
@@ -130,11 +205,23 @@ def verify_payment_with_amount(authority, amount):
             "message": "Verified" if code == 100 else "Already Verified"
         }
 
+    # فقط پاسخ قطعی درگاه (کد خطا در بدنه، بدون 5xx) پرداخت را رد می‌کند؛ 5xx یا بدنهٔ بی‌کد
+    # (HTML پراکسی، {}) مثل خطای شبکه است تا attempt در PENDING بماند و دوباره verify شود
+    error_code = _section(data, "errors").get("code")
+    if r.status_code >= 500 or (code is None and error_code is None):
+        return {
+            "ok": False,
+            "error": "NETWORK_ERROR",
+            "detail": f"HTTP {r.status_code}: no verify result in response",
+            "http_status": r.status_code,
+        }
+
     # خطا
     return {
         "ok": False,
         "error": "VERIFY_FAILED",
-        "code": data.get("errors", {}).get("code"),
-        "message": data.get("errors", {}).get("message"),
+        "code": error_code if error_code is not None else code,
+        "message": _section(data, "errors").get("message"),
+        "http_status": r.status_code,
         "raw": data
     }
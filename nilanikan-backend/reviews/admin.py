@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Review
+from .models import ProductRatingSummary, Review
 
 
 @admin.register(Review)
@@ -16,3 +16,30 @@ class ReviewAdmin(admin.ModelAdmin):
     list_filter = ("is_approved", "rating")
     search_fields = ("name", "comment", "product_slug")
     ordering = ("-created_at",)
+    actions = ["approve_reviews", "reject_reviews"]
+
+    def _moderate(self, request, queryset, approve):
+        result = Review.moderate(queryset, approve)
+        self.message_user(
+            request,
+            f"{result['updated']} دیدگاه از {result['matched']} تغییر کرد؛ "
+            f"خلاصهٔ امتیاز {len(result['products'])} محصول به‌روز شد.",
+        )
+
+    @admin.action(description="تأیید دیدگاه‌های انتخاب‌شده")
+    def approve_reviews(self, request, queryset):
+        self._moderate(request, queryset, True)
+
+    @admin.action(description="رد (عدم نمایش) دیدگاه‌های انتخاب‌شده")
+    def reject_reviews(self, request, queryset):
+        self._moderate(request, queryset, False)
+
+
+@admin.register(ProductRatingSummary)
+class ProductRatingSummaryAdmin(admin.ModelAdmin):
+    list_display = ("product", "count", "average", "star_1", "star_2", "star_3", "star_4", "star_5", "updated_at")
+    search_fields = ("product__name", "product__slug")
+    readonly_fields = [f.name for f in ProductRatingSummary._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.14 on 2026-10-19 16:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0023_productvariant_erp_code'),
+        ('reviews', '0002_alter_review_is_approved'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductRatingSummary',
+            fields=[
+                ('product', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_summary', serialize=False, to='catalog.product')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('star_1', models.PositiveIntegerField(default=0)),
+                ('star_2', models.PositiveIntegerField(default=0)),
+                ('star_3', models.PositiveIntegerField(default=0)),
+                ('star_4', models.PositiveIntegerField(default=0)),
+                ('star_5', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
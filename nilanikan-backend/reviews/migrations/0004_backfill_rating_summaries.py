@@ -0,0 +1,37 @@
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+
+
+def backfill(apps, schema_editor):
+    Review = apps.get_model("reviews", "Review")
+    ProductRatingSummary = apps.get_model("reviews", "ProductRatingSummary")
+
+    rows = (
+        Review.objects.filter(is_approved=True)
+        .order_by()
+        .values("product_id")
+        .annotate(
+            count=Count("id"),
+            total=Sum("rating"),
+            **{f"star_{i}": Count("id", filter=Q(rating=i)) for i in range(1, 6)},
+        )
+    )
+    batch = []
+    for r in rows.iterator(chunk_size=1000):
+        batch.append(ProductRatingSummary(**r))
+        if len(batch) >= 1000:
+            ProductRatingSummary.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        ProductRatingSummary.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0003_productratingsummary"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
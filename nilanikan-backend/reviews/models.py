@@ -1,5 +1,11 @@
 # reviews/models.py
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+STARS = range(1, 6)
+
 
 class Review(models.Model):
     product_id = models.IntegerField(db_index=True)
@@ -19,3 +25,151 @@ class Review(models.Model):
 
     def __str__(self):
         return f"{self.product_slug or self.product_id} - {self.name} ({self.rating})"
+
+    @classmethod
+    def moderate(cls, queryset, approve: bool):
+        """
+        تأیید/رد گروهی دیدگاه‌ها: فقط محصولات درگیر خوانده می‌شوند (نه تک‌تک دیدگاه‌ها)، یک UPDATE
+        مستقیم روی همان queryset، و یک محاسبهٔ گروهی خلاصهٔ امتیاز آن محصولات (سیگنال‌های تکی اجرا نمی‌شوند).
+        خروجی: {"matched", "updated", "products": {product_id: {"avg", "count", "histogram", "delta"}}}
+        """
+        with transaction.atomic():
+            matched = queryset.count()
+            changing = queryset.exclude(is_approved=approve)
+            product_ids = set(changing.order_by().values_list("product_id", flat=True).distinct())
+            if not product_ids:
+                return {"matched": matched, "updated": 0, "products": {}}
+
+            # قفل خلاصه‌ها تا سیگنال دیدگاه‌های هم‌زمان بین before و recompute ننویسند
+            before = {
+                s.pk: s.as_dict()
+                for s in ProductRatingSummary.objects.select_for_update().filter(pk__in=product_ids)
+            }
+            updated = changing.update(is_approved=approve)
+            after = ProductRatingSummary.recompute(product_ids)
+
+        products = {}
+        for product_id, now in after.items():
+            old = before.get(product_id, ProductRatingSummary.EMPTY)
+            products[product_id] = {
+                **now,
+                "delta": {
+                    "count": now["count"] - old["count"],
+                    "avg": round(now["avg"] - old["avg"], 1),
+                    "histogram": {k: v - old["histogram"][k] for k, v in now["histogram"].items()},
+                },
+            }
+        return {"matched": matched, "updated": updated, "products": products}
+
+
+class ProductRatingSummary(models.Model):
+    """
+    خلاصهٔ امتیاز دیدگاه‌های تأییدشدهٔ هر محصول (تعداد، مجموع، هیستوگرام ۱ تا ۵ ستاره).
+    با سیگنال‌های Review افزایشی به‌روز می‌شود؛ تغییرهای گروهی (queryset.update) باید
+    recompute را برای محصولات درگیر صدا بزنند.
+    """
+    product = models.OneToOneField(
+        "catalog.Product",
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name="rating_summary",
+        db_constraint=False,  # Review.product_id کلید خارجی نیست
+    )
+    count = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)  # مجموع امتیازها
+    star_1 = models.PositiveIntegerField(default=0)
+    star_2 = models.PositiveIntegerField(default=0)
+    star_3 = models.PositiveIntegerField(default=0)
+    star_4 = models.PositiveIntegerField(default=0)
+    star_5 = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    COUNTER_FIELDS = ["count", "total"] + [f"star_{i}" for i in STARS]
+    EMPTY = {"avg": 0.0, "count": 0, "histogram": {str(i): 0 for i in STARS}}
+
+    def __str__(self):
+        return f"{self.product_id}: {self.average} ({self.count})"
+
+    @property
+    def average(self):
+        return round(self.total / self.count, 1) if self.count else 0.0
+
+    def as_dict(self):
+        return {
+            "avg": self.average,
+            "count": self.count,
+            "histogram": {str(i): getattr(self, f"star_{i}") for i in STARS},
+        }
+
+    @classmethod
+    def apply(cls, product_id, rating, sign):
+        """افزودن (sign=1) یا کم کردن (sign=-1) یک امتیاز با یک UPDATE اتمیک"""
+        changes = {"count": F("count") + sign, "total": F("total") + sign * rating}
+        if rating in STARS:
+            changes[f"star_{rating}"] = F(f"star_{rating}") + sign
+        with transaction.atomic():
+            cls.objects.get_or_create(product_id=product_id)
+            cls.objects.filter(pk=product_id).update(**changes)
+
+    @classmethod
+    def recompute(cls, product_ids):
+        """
+        محاسبهٔ دوبارهٔ خلاصهٔ چند محصول با یک aggregate گروهی و یک upsert؛
+        خروجی: {product_id: as_dict()}
+        """
+        ids = {int(pid) for pid in product_ids}
+        if not ids:
+            return {}
+        rows = {
+            r.pop("product_id"): r
+            for r in Review.objects.filter(is_approved=True, product_id__in=ids)
+            .order_by()
+            .values("product_id")
+            .annotate(
+                count=Count("id"),
+                total=Sum("rating"),
+                **{f"star_{i}": Count("id", filter=Q(rating=i)) for i in STARS},
+            )
+        }
+        zero = dict.fromkeys(cls.COUNTER_FIELDS, 0)
+        summaries = [cls(product_id=pid, **rows.get(pid, zero)) for pid in sorted(ids)]
+        cls.objects.bulk_create(
+            summaries,
+            update_conflicts=True,
+            unique_fields=["product"],
+            update_fields=cls.COUNTER_FIELDS + ["updated_at"],
+        )
+        return {s.product_id: s.as_dict() for s in summaries}
+
+
+# ---------- به‌روزرسانی افزایشی خلاصه با ذخیره/حذف تکی ----------
+def _contribution(product_id, rating, is_approved):
+    return (product_id, rating) if is_approved else None
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_rating(sender, instance, **kwargs):
+    previous = None
+    if instance.pk:
+        previous = sender.objects.filter(pk=instance.pk).values_list(
+            "product_id", "rating", "is_approved"
+        ).first()
+    instance._rating_previous = _contribution(*previous) if previous else None
+
+
+@receiver(post_save, sender=Review)
+def update_rating_summary(sender, instance, created, **kwargs):
+    old = getattr(instance, "_rating_previous", None)
+    new = _contribution(instance.product_id, instance.rating, instance.is_approved)
+    if old == new:
+        return
+    if old:
+        ProductRatingSummary.apply(*old, -1)
+    if new:
+        ProductRatingSummary.apply(*new, 1)
+
+
+@receiver(post_delete, sender=Review)
+def remove_from_rating_summary(sender, instance, **kwargs):
+    if instance.is_approved:
+        ProductRatingSummary.apply(instance.product_id, instance.rating, -1)
@@ -1,7 +1,8 @@
 from django.urls import path
-from .views import ReviewListCreateAPIView, ReviewDestroyAPIView
+from .views import ReviewListCreateAPIView, ReviewDestroyAPIView, ReviewModerationAPIView
 
 urlpatterns = [
     path("reviews/", ReviewListCreateAPIView.as_view(), name="review-list-create"),
+    path("reviews/moderate/", ReviewModerationAPIView.as_view(), name="review-moderate"),
     path("reviews/<int:pk>/", ReviewDestroyAPIView.as_view(), name="review-destroy"),
 ]
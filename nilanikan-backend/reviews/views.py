@@ -1,10 +1,21 @@
 from rest_framework import generics, permissions, status
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
-from django.db.models import Avg, Count
-from .models import Review
+from rest_framework.views import APIView
+from django.utils.dateparse import parse_datetime
+from django.db.models import Count, Q, Sum
+from .models import STARS, ProductRatingSummary, Review
 from .serializers import ReviewSerializer
 
 
+class ReviewCursorPagination(CursorPagination):
+    """صفحه‌بندی keyset دیدگاه‌ها (جدیدترین اول)؛ ?cursor=...&page_size=<n>"""
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("-created_at", "-id")
+
+
 class ReviewListCreateAPIView(generics.ListCreateAPIView):
     """
     GET → لیست دیدگاه‌های تأییدشده (با ?product= و/یا ?slug=)
@@ -12,6 +23,7 @@ class ReviewListCreateAPIView(generics.ListCreateAPIView):
     """
     serializer_class = ReviewSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = ReviewCursorPagination
 
     def get_queryset(self):
         qs = Review.objects.filter(is_approved=True)  # فقط تأییدشده‌ها
@@ -25,13 +37,30 @@ class ReviewListCreateAPIView(generics.ListCreateAPIView):
 
     def list(self, request, *args, **kwargs):
         qs = self.get_queryset()
-        stats = qs.aggregate(avg=Avg("rating"), count=Count("id"))
-        serializer = self.get_serializer(qs, many=True)
-        return Response({
-            "results": serializer.data,
-            "avg": round((stats["avg"] or 0.0), 1),
-            "count": stats["count"] or 0
-        })
+        page = self.paginate_queryset(qs)
+        response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        response.data.update(self.rating_stats(qs))
+        return response
+
+    def rating_stats(self, qs):
+        """avg/count/histogram از ProductRatingSummary؛ فقط برای لیست بدون محصول aggregate می‌شود"""
+        product_id = self.request.query_params.get("product")
+        slug = self.request.query_params.get("slug")
+        summaries = ProductRatingSummary.objects.all()
+        if product_id and product_id.isdigit():
+            summary = summaries.filter(pk=product_id).first()
+            return summary.as_dict() if summary else ProductRatingSummary.EMPTY
+        if slug and not product_id:
+            summary = summaries.filter(product__slug=slug).first()
+            if summary:
+                return summary.as_dict()
+
+        stats = qs.order_by().aggregate(
+            count=Count("id"),
+            total=Sum("rating"),
+            **{f"star_{i}": Count("id", filter=Q(rating=i)) for i in STARS},
+        )
+        return ProductRatingSummary(**{k: v or 0 for k, v in stats.items()}).as_dict()
 
     def create(self, request, *args, **kwargs):
         data = request.data.copy()
@@ -45,6 +74,68 @@ class ReviewListCreateAPIView(generics.ListCreateAPIView):
         )
 
 
+MODERATION_MAX_IDS = 20000
+MODERATION_ACTIONS = {"approve": True, "reject": False}
+
+
+def moderation_queryset(data):
+    """
+    انتخاب دیدگاه‌ها برای تأیید/رد گروهی؛ با ids یا filter (حداقل یکی الزامی است).
+    filter: product, slug, rating, status=pending|approved, created_after, created_before
+    """
+    ids = data.get("ids")
+    filters = data.get("filter") or {}
+    if not isinstance(filters, dict):
+        raise ValueError("filter must be an object")
+    if not ids and not any(v not in (None, "") for v in filters.values()):
+        raise ValueError("ids or filter required")
+
+    qs = Review.objects.all()
+    if ids:
+        if not isinstance(ids, list) or len(ids) > MODERATION_MAX_IDS:
+            raise ValueError(f"ids must be a list of at most {MODERATION_MAX_IDS} items")
+        qs = qs.filter(pk__in=[int(pk) for pk in ids])
+    if filters.get("product") not in (None, ""):
+        qs = qs.filter(product_id=int(filters["product"]))
+    if filters.get("slug"):
+        qs = qs.filter(product_slug=filters["slug"])
+    if filters.get("rating") not in (None, ""):
+        qs = qs.filter(rating=int(filters["rating"]))
+    if filters.get("status"):
+        if filters["status"] not in ("pending", "approved"):
+            raise ValueError("status must be pending or approved")
+        qs = qs.filter(is_approved=filters["status"] == "approved")
+    for key, lookup in (("created_after", "created_at__gte"), ("created_before", "created_at__lt")):
+        if filters.get(key):
+            moment = parse_datetime(str(filters[key]))
+            if moment is None:
+                raise ValueError(f"{key} must be an ISO datetime")
+            qs = qs.filter(**{lookup: moment})
+    return qs
+
+
+class ReviewModerationAPIView(APIView):
+    """
+    POST /api/reviews/moderate/ (فقط ادمین)
+    body: {"action": "approve"|"reject", "ids": [1, 2, ...]}
+       یا {"action": "approve", "filter": {"product": 12, "status": "pending", "created_before": "..."}}
+    خروجی: matched/updated + تغییر خلاصهٔ امتیاز هر محصول درگیر
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request, *args, **kwargs):
+        action = request.data.get("action")
+        if action not in MODERATION_ACTIONS:
+            return Response({"detail": "action must be approve or reject"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            qs = moderation_queryset(request.data)
+        except (TypeError, ValueError) as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = Review.moderate(qs, MODERATION_ACTIONS[action])
+        return Response({"action": action, **result})
+
+
 class ReviewDestroyAPIView(generics.DestroyAPIView):
     """
     حذف دیدگاه (فقط ادمین)
@@ -52,6 +52,7 @@ INSTALLED_APPS = [
     "stories",
     "reviews",
     "chat",
+    "payments",
 ]
 
 # ───────── Middleware (CORS باید بالای Common باشد) ─────────
@@ -194,6 +195,62 @@ ZARINPAL_FAIL_REDIRECT = os.getenv(
     f"http://{_default_host}:3000/checkout/fail"
 )
 
-CHANNEL_LAYERS = {
-    "default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}
+# ───────── Channels ─────────
+# با REDIS_URL (مثلاً redis://redis:6379/0) لایهٔ channels-redis استفاده می‌شود تا پیام‌های چت بین
+# چند پروسه/سرور ASGI پخش شوند؛ بدون آن InMemory (فقط یک پروسه؛ مناسب توسعه و تست).
+# CHANNEL_LAYER_BACKEND=pubsub → RedisPubSubChannelLayer (latency کمتر، بدون صف پایدار)
+REDIS_URL = os.getenv("REDIS_URL", "")
+if REDIS_URL:
+    _pubsub = os.getenv("CHANNEL_LAYER_BACKEND", "").lower() == "pubsub"
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": (
+                "channels_redis.pubsub.RedisPubSubChannelLayer" if _pubsub
+                else "channels_redis.core.RedisChannelLayer"
+            ),
+            "CONFIG": {"hosts": [REDIS_URL]} if _pubsub else {
+                "hosts": [REDIS_URL],
+                "capacity": int(os.getenv("CHANNEL_LAYER_CAPACITY", "1000")),
+                "expiry": int(os.getenv("CHANNEL_LAYER_EXPIRY", "60")),
+                "prefix": os.getenv("CHANNEL_LAYER_PREFIX", "asgi"),
+            },
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}
+    }
+
+# آرشیو پیام‌های قدیمی چت (archive_chat_messages): فایل‌های jsonl.gz هر گفتگو
+CHAT_ARCHIVE_ROOT = Path(os.getenv("CHAT_ARCHIVE_ROOT", str(BASE_DIR / "chat_archive")))
+
+# با REDIS_URL کش Django هم مشترک می‌شود (کش هلو و باطل‌سازی محتوای زمان‌بندی‌شده در همهٔ پروسه‌ها)
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": os.getenv("CACHE_KEY_PREFIX", "nilanikan"),
+        }
+    }
+
+# محتوای زمان‌بندی‌شده (اسلاید/بنر/استوری): سقف عمر کش وقتی مرز بعدی دورتر است (ثانیه)
+SCHEDULE_CACHE_MAX_TTL = int(os.getenv("SCHEDULE_CACHE_MAX_TTL", "300"))
+
+# کش پروکسی‌های هلو (ثانیه): تازه تا TTL، سپس تا STALE دادهٔ قدیمی + به‌روزرسانی در پس‌زمینه
+HOLOO_CACHE_TTL = int(os.getenv("HOLOO_CACHE_TTL", "60"))
+HOLOO_CACHE_STALE = int(os.getenv("HOLOO_CACHE_STALE", "300"))
+
+# کد شخص (مشتری) هلو برای فاکتور فروش سفارش‌های آنلاین (drain_invoice_outbox)
+HOLOO_DEFAULT_CUSTOMER_CODE = os.getenv("HOLOO_DEFAULT_CUSTOMER_CODE", "")
+
+# ───────── لاگ ─────────
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        # زمان هر درخواست به هلو (holoo_client)
+        "holoo": {"handlers": ["console"], "level": os.getenv("HOLOO_LOG_LEVEL", "INFO")},
+    },
 }
@@ -21,7 +21,7 @@ from catalog.views import (
     holoo_preinvoice_create_view,  # ← جدید
     holoo_order_create_view,       # ← جدید
 )
-from orders.views import CartViewSet, OrderViewSet
+from orders.views import CartViewSet, OrderViewSet, StaffOrderViewSet
 from coupons.views import CouponViewSet
 from support.views import TicketViewSet
 from accounts.views import MeView, RegisterView, LoginView, UserViewSet
@@ -33,6 +33,7 @@ router.register(r"products",   ProductViewSet,  basename="product")
 router.register(r"bundles",    BundleViewSet,   basename="bundle")
 router.register(r"cart",       CartViewSet,     basename="cart")
 router.register(r"orders",     OrderViewSet,    basename="order")
+router.register(r"staff/orders", StaffOrderViewSet, basename="staff-order")
 router.register(r"coupons",    CouponViewSet,   basename="coupon")
 router.register(r"tickets",    TicketViewSet,   basename="ticket")
 router.register(r"users",      UserViewSet,     basename="user")
@@ -3,4 +3,5 @@ from .models import Story
 
 @admin.register(Story)
 class StoryAdmin(admin.ModelAdmin):
-    list_display = ("title", "link", "created_at")
+    list_display = ("title", "link", "starts_at", "ends_at", "created_at")
+    list_filter = ("starts_at", "ends_at")
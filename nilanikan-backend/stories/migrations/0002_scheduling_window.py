@@ -0,0 +1,23 @@
+# Generated by Django 4.2.14 on 2026-10-19 16:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stories', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='story',
+            name='ends_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='story',
+            name='starts_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -1,10 +1,18 @@
 from django.db import models
 
+from core.utils.schedule import invalidate_on_change
+
 class Story(models.Model):
     title = models.CharField(max_length=200)
     image = models.ImageField(upload_to="stories/")
     link = models.URLField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # بازهٔ نمایش؛ خالی = بدون محدودیت
+    starts_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    ends_at = models.DateTimeField(null=True, blank=True, db_index=True)
 
     def __str__(self):
         return self.title
+
+
+invalidate_on_change(Story)
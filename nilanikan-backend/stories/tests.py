@@ -1,3 +1,111 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework import filters
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core.utils import schedule
+from core.utils.schedule import scheduled
+from .models import Story
+from .views import StoryViewSet
+
+
+class ScheduledStoriesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+
+    def story(self, title, starts=None, ends=None):
+        return Story.objects.create(
+            title=title,
+            image=f"stories/{title}.jpg",
+            starts_at=self.now + timedelta(seconds=starts) if starts is not None else None,
+            ends_at=self.now + timedelta(seconds=ends) if ends is not None else None,
+        )
+
+    def titles(self, items):
+        return sorted(s.title for s in items)
+
+    def resolve(self):
+        return scheduled(Story.objects.order_by("-created_at"), "test")
+
+    def test_only_stories_inside_window(self):
+        self.story("always")
+        self.story("running", starts=-60, ends=60)
+        self.story("future", starts=60)
+        self.story("expired", ends=-1)
+
+        self.assertEqual(self.titles(self.resolve()), ["always", "running"])
+
+    def test_ttl_runs_until_next_boundary(self):
+        self.story("running", ends=10)
+        self.story("future", starts=40)
+
+        with mock.patch.object(schedule.cache, "set", wraps=schedule.cache.set) as cache_set:
+            self.resolve()
+
+        ttl = cache_set.call_args.args[2]
+        self.assertTrue(9 <= ttl <= 10, ttl)
+
+    def test_ttl_capped_without_boundaries(self):
+        self.story("always")
+
+        with mock.patch.object(schedule.cache, "set", wraps=schedule.cache.set) as cache_set:
+            self.resolve()
+
+        self.assertEqual(cache_set.call_args.args[2], schedule.SCHEDULE_CACHE_MAX_TTL)
+
+    def test_cached_until_boundary_then_recomputed(self):
+        self.story("running", ends=10)
+        self.story("future", starts=10)
+        self.resolve()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.titles(self.resolve()), ["running"])
+
+        # بعد از مرز، حتی اگر ورودی هنوز در کش باشد، دوباره از DB ساخته می‌شود
+        later = self.now + timedelta(seconds=11)
+        with mock.patch.object(schedule.timezone, "now", return_value=later):
+            self.assertEqual(self.titles(self.resolve()), ["future"])
+
+    def test_save_invalidates_cache(self):
+        self.story("first")
+        self.assertEqual(self.titles(self.resolve()), ["first"])
+
+        self.story("second")
+
+        self.assertEqual(self.titles(self.resolve()), ["first", "second"])
+
+    def test_api_lists_and_retrieves_only_active(self):
+        active = self.story("active")
+        future = self.story("future", starts=60)
+        client = APIClient(HTTP_HOST="localhost")
+
+        res = client.get("/api/stories/")
+        results = res.data["results"] if isinstance(res.data, dict) else res.data
+        self.assertEqual([s["id"] for s in results], [active.pk])
+        self.assertEqual(client.get(f"/api/stories/{active.pk}/").status_code, 200)
+        self.assertEqual(client.get(f"/api/stories/{future.pk}/").status_code, 404)
+
+    def test_list_applies_filter_backends(self):
+        class SearchableStoryViewSet(StoryViewSet):
+            filter_backends = [filters.SearchFilter]
+            search_fields = ["title"]
+
+        self.story("alpha")
+        self.story("beta")
+        self.story("alpine", starts=60)
+        view = SearchableStoryViewSet.as_view({"get": "list"})
+        factory = APIRequestFactory()
+
+        def titles(query):
+            res = view(factory.get(f"/api/stories/{query}", HTTP_HOST="localhost"))
+            results = res.data["results"] if isinstance(res.data, dict) else res.data
+            return sorted(s["title"] for s in results)
 
-# Create your tests here.
+        self.assertEqual(titles(""), ["alpha", "beta"])
+        self.assertEqual(titles("?search=alp"), ["alpha"])
+        self.assertEqual(titles(""), ["alpha", "beta"])
@@ -1,13 +1,13 @@
 from rest_framework import viewsets
+from core.utils.schedule import ScheduledListMixin
 from .models import Story
 from .serializers import StorySerializer
 
-class StoryViewSet(viewsets.ReadOnlyModelViewSet):
+class StoryViewSet(ScheduledListMixin, viewsets.ReadOnlyModelViewSet):
     """
-    API endpoint برای نمایش آخرین 20 استوری.
+    API endpoint برای نمایش آخرین 20 استوری (در بازهٔ starts_at/ends_at).
     """
     serializer_class = StorySerializer
-
-    def get_queryset(self):
-        # آخرین 20 استوری براساس زمان ساخته شدن
-        return Story.objects.all().order_by("-created_at")[:20]
+    # آخرین 20 استوری براساس زمان ساخته شدن
+    queryset = Story.objects.all().order_by("-created_at")
+    schedule_limit = 20